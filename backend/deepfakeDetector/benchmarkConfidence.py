@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru calculateAdvancedConfidence: bucla MC originală vs. MC dropout vectorizat
+Măsoară latența per imagine și verifică echivalența scorurilor de încredere printr-un test TOST
+(două teste t unilaterale pe diferențele pe perechi) față de o marjă explicită, în puncte de încredere.
+Un test t care nu găsește o diferență nu arată că scorurile coincid; TOST respinge explicit
+ipoteza că diferența medie depășește marja.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from customModel import DeepfakeDetector
+
+def collect_images(image_dir, limit):
+    images = []
+    for root, _, files in os.walk(image_dir):
+        for file in sorted(files):
+            if file.lower().endswith(('.png', '.jpg', '.jpeg')):
+                images.append(os.path.join(root, file))
+                if len(images) >= limit:
+                    return images
+    return images
+
+def run_confidence(detector, img_tensor, prediction_prob, n_samples, vectorized):
+    detector.vectorized_mc = vectorized
+    start = time.perf_counter()
+    confidence, details = detector.calculateAdvancedConfidence(img_tensor, prediction_prob, n_samples=n_samples)
+    return time.perf_counter() - start, float(confidence), details
+
+def tost_paired(differences, margin):
+    """
+    Testul de echivalență TOST pentru diferențele pe perechi, cu marja (-margin, margin).
+    Returnează p-value-ul (maximul celor două teste unilaterale).
+    """
+    from scipy import stats
+
+    if np.std(differences) == 0:
+        # Diferențe identice: testul t nu este definit, echivalența este exactă sau imposibilă
+        return 0.0 if abs(float(np.mean(differences))) < margin else 1.0
+    p_lower = stats.ttest_1samp(differences, -margin, alternative="greater").pvalue
+    p_upper = stats.ttest_1samp(differences, margin, alternative="less").pvalue
+    return float(max(p_lower, p_upper))
+
+def benchmark(image_dir, limit=20, repeats=5, n_samples=7, margin=2.0, alpha=0.05):
+    from scipy import stats
+    import tensorflow as tf
+
+    images = collect_images(image_dir, limit)
+    if not images:
+        return {"error": f"Nu s-au găsit imagini în {image_dir}"}
+
+    detector = DeepfakeDetector()
+
+    timings = {"loop": [], "vectorized": []}
+    confidences = {"loop": [], "vectorized": []}
+    mc_stds = {"loop": [], "vectorized": []}
+
+    for image_path in images:
+        img = detector.loadImageForModel(image_path)
+        if img is None:
+            continue
+        img_tensor = tf.convert_to_tensor(np.expand_dims(img, axis=0))
+        prediction_prob = float(detector.predictBatch(img_tensor.numpy())[0]["prediction"])
+
+        # Încălzire, pentru ca trasarea grafului să nu intre în măsurători
+        run_confidence(detector, img_tensor, prediction_prob, n_samples, False)
+        run_confidence(detector, img_tensor, prediction_prob, n_samples, True)
+
+        for _ in range(repeats):
+            for mode, vectorized in (("loop", False), ("vectorized", True)):
+                elapsed, confidence, details = run_confidence(detector, img_tensor, prediction_prob, n_samples, vectorized)
+                timings[mode].append(elapsed)
+                confidences[mode].append(confidence)
+                if details.get("mc_std") is not None:
+                    mc_stds[mode].append(details["mc_std"])
+
+    loop_conf = np.array(confidences["loop"])
+    vec_conf = np.array(confidences["vectorized"])
+    differences = vec_conf - loop_conf
+
+    # Testele pe perechi: aceeași imagine, aceeași repetiție
+    tost_pvalue = tost_paired(differences, margin)
+    ks_stat, ks_pvalue = stats.ks_2samp(mc_stds["vectorized"], mc_stds["loop"]) if mc_stds["loop"] and mc_stds["vectorized"] else (None, None)
+
+    def latency_summary(values):
+        values_ms = np.array(values) * 1000
+        return {
+            "mean_ms": round(float(np.mean(values_ms)), 2),
+            "p50_ms": round(float(np.percentile(values_ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(values_ms, 95)), 2)
+        }
+
+    return {
+        "images": len(images),
+        "repeats": repeats,
+        "n_samples": n_samples,
+        "latency": {
+            "loop": latency_summary(timings["loop"]),
+            "vectorized": latency_summary(timings["vectorized"]),
+            "speedup": round(float(np.mean(timings["loop"]) / np.mean(timings["vectorized"])), 2)
+        },
+        "confidence": {
+            "loop_mean": round(float(np.mean(loop_conf)), 3),
+            "vectorized_mean": round(float(np.mean(vec_conf)), 3),
+            "mean_difference": round(float(np.mean(differences)), 3),
+            "mean_abs_difference": round(float(np.mean(np.abs(differences))), 3),
+            "max_abs_difference": round(float(np.max(np.abs(differences))), 3),
+            "equivalence_margin": margin,
+            "alpha": alpha,
+            "tost_pvalue": round(tost_pvalue, 4),
+            "mc_std_ks_pvalue": round(float(ks_pvalue), 4) if ks_pvalue is not None else None,
+            # Diferența medie este demonstrat în interiorul marjei
+            "equivalent_within_margin": bool(tost_pvalue < alpha),
+            # Fiecare pereche este în interiorul marjei
+            "all_within_margin": bool(np.max(np.abs(differences)) <= margin)
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MC dropout: buclă vs. vectorizat')
+    parser.add_argument('image_dir', help='Director cu imagini de test')
+    parser.add_argument('--limit', type=int, default=20, help='Numărul maxim de imagini')
+    parser.add_argument('--repeats', type=int, default=5, help='Repetiții per imagine')
+    parser.add_argument('--samples', type=int, default=7, help='Eșantioane MC dropout')
+    parser.add_argument('--margin', type=float, default=2.0, help='Marja de echivalență (puncte de încredere) pentru TOST')
+    parser.add_argument('--alpha', type=float, default=0.05, help='Nivelul de semnificație al testului TOST')
+
+    args = parser.parse_args()
+    result = benchmark(args.image_dir, args.limit, args.repeats, args.samples, args.margin, args.alpha)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru detectarea fețelor cu YuNet: detectorul reconstruit la fiecare apel
+(load_yunet_detector, calea veche din detect_faces) vs. pool-ul de detectoare al procesului
+vs. detect_faces_batch pe toată lista. Măsoară latența per imagine și verifică faptul că
+toate variantele găsesc aceleași fețe.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import faceDetector
+
+def collect_images(image_dir, limit):
+    images = []
+    for root, _, files in os.walk(image_dir):
+        for file in sorted(files):
+            if file.lower().endswith(('.png', '.jpg', '.jpeg')):
+                images.append(os.path.join(root, file))
+                if len(images) >= limit:
+                    return images
+    return images
+
+def load_inputs(input_path, limit):
+    """Imaginile dintr-un director sau primele cadre dintr-un video"""
+    if os.path.isdir(input_path):
+        images = [cv2.imread(path) for path in collect_images(input_path, limit)]
+        return [image for image in images if image is not None]
+
+    frames = []
+    cap = cv2.VideoCapture(input_path)
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def face_counts(results):
+    return [result.get("faces_detected", 0) for result in results]
+
+def latency_summary(values):
+    values_ms = np.array(values) * 1000
+    return {
+        "mean_ms": round(float(np.mean(values_ms)), 2),
+        "p50_ms": round(float(np.percentile(values_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(values_ms, 95)), 2)
+    }
+
+def benchmark(input_path, limit=50, repeats=3):
+    images = load_inputs(input_path, limit)
+    if not images:
+        return {"error": f"No images or frames found in {input_path}"}
+
+    pool = faceDetector.get_detector_pool()
+    if pool is None:
+        return {"error": "YuNet model not available"}
+
+    timings = {"reload": [], "pool": [], "batch": []}
+    results = {}
+    for _ in range(repeats):
+        reload_results = []
+        for image in images:
+            start = time.perf_counter()
+            # Calea veche: detectorul construit din nou pentru fiecare imagine
+            detector = faceDetector.load_yunet_detector()
+            reload_results.append(faceDetector.detect_faces(image, detector))
+            timings["reload"].append(time.perf_counter() - start)
+        results["reload"] = reload_results
+
+        pool_results = []
+        for image in images:
+            start = time.perf_counter()
+            pool_results.append(faceDetector.detect_faces(image, pool))
+            timings["pool"].append(time.perf_counter() - start)
+        results["pool"] = pool_results
+
+        start = time.perf_counter()
+        results["batch"] = faceDetector.detect_faces_batch(images, pool)
+        timings["batch"].append((time.perf_counter() - start) / len(images))
+
+    reference = face_counts(results["reload"])
+    return {
+        "inputs": len(images),
+        "repeats": repeats,
+        "sizes": len({image.shape[:2] for image in images}),
+        "latencyPerImage": {mode: latency_summary(values) for mode, values in timings.items()},
+        "speedup": {
+            "pool": round(float(np.mean(timings["reload"]) / np.mean(timings["pool"])), 2),
+            "batch": round(float(np.mean(timings["reload"]) / np.mean(timings["batch"])), 2)
+        },
+        "sameFaces": {
+            "pool": face_counts(results["pool"]) == reference,
+            "batch": face_counts(results["batch"]) == reference
+        },
+        "facesDetected": int(sum(reference)),
+        "pool": pool.stats()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark YuNet: detector reîncărcat vs. pool vs. batch')
+    parser.add_argument('input_path', help='Director cu imagini sau fișier video')
+    parser.add_argument('--limit', type=int, default=50, help='Numărul maxim de imagini / cadre')
+    parser.add_argument('--repeats', type=int, default=3, help='Repetiții pe toată lista')
+
+    args = parser.parse_args()
+    result = benchmark(args.input_path, args.limit, args.repeats)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
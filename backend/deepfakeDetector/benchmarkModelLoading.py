@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru încărcarea modelelor: fișierul .keras original (load_model cu compilare)
+vs. artefactul doar pentru inferență exportat de exportInferenceModels.py.
+Fiecare încărcare rulează într-un proces nou, deci timpul și memoria (RSS maxim) sunt cele
+de la pornire la rece; importul TensorFlow este măsurat separat și nu intră în timpul de încărcare.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from modelLoader import discover_models, current_artifact, inference_artifact_path
+
+def _max_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux raportează în KB, macOS în bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def worker(mode, model_path):
+    """O singură încărcare, în procesul curent; afișează măsurătorile ca JSON"""
+    start = time.perf_counter()
+    import tensorflow as tf
+    import_time = time.perf_counter() - start
+    rss_before = _max_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "artifact":
+        model = tf.keras.models.load_model(inference_artifact_path(model_path), compile=False)
+    else:
+        model = tf.keras.models.load_model(model_path)
+    load_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "importTime": import_time,
+        "loadTime": load_time,
+        "rssMb": _max_rss_mb(),
+        "loadRssMb": _max_rss_mb() - rss_before,
+        "params": int(model.count_params())
+    }))
+
+def measure(mode, model_path, repeats):
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode, "--model", model_path],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "worker failed"}
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    return {
+        "loadTime": {
+            "median": round(statistics.median(r["loadTime"] for r in runs), 3),
+            "min": round(min(r["loadTime"] for r in runs), 3)
+        },
+        "importTime": round(statistics.median(r["importTime"] for r in runs), 3),
+        "rssMb": round(statistics.median(r["rssMb"] for r in runs), 1),
+        "loadRssMb": round(statistics.median(r["loadRssMb"] for r in runs), 1),
+        "params": runs[0]["params"]
+    }
+
+def benchmark(models, repeats=3):
+    report = []
+    for model_path in models:
+        entry = {"model": model_path}
+        if current_artifact(model_path) is None:
+            entry["error"] = "No up-to-date inference artifact; run exportInferenceModels.py first"
+            report.append(entry)
+            continue
+
+        print(f"Măsor {os.path.basename(model_path)} ({repeats} rulări per variantă)...", file=sys.stderr)
+        entry["original"] = measure("original", model_path, repeats)
+        entry["artifact"] = measure("artifact", model_path, repeats)
+        entry["bytes"] = {
+            "original": os.path.getsize(model_path),
+            "artifact": os.path.getsize(inference_artifact_path(model_path))
+        }
+
+        if "error" not in entry["original"] and "error" not in entry["artifact"]:
+            original, artifact = entry["original"], entry["artifact"]
+            entry["speedup"] = round(original["loadTime"]["median"] / max(artifact["loadTime"]["median"], 1e-6), 2)
+            entry["rssSavedMb"] = round(original["rssMb"] - artifact["rssMb"], 1)
+        report.append(entry)
+    return {"models": report, "repeats": repeats}
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare model load time and RSS: original .keras vs inference-only artifact')
+    parser.add_argument('--model', action='append', default=None, help='Model to measure (repeatable); default: every model in savedModel/ and modelAntrenat/')
+    parser.add_argument('--repeats', type=int, default=3, help='Cold-start loads per variant')
+    parser.add_argument('--worker', choices=['original', 'artifact'], help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.model[0])
+        return
+
+    models = args.model or discover_models()
+    if not models:
+        print(json.dumps({"error": "No .keras models found in savedModel/ or modelAntrenat/"}))
+        sys.exit(1)
+
+    print(json.dumps(benchmark(models, args.repeats), indent=2))
+
+if __name__ == "__main__":
+    main()
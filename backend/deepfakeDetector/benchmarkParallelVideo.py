@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru analiza video paralelă (parallelVideo.py) față de pipeline-ul secvențial
+Fiecare măsurătoare rulează într-un proces nou care încarcă modelele și apoi analizează video-ul,
+ca în CLI. Timpul raportat este cel al analizei (processingTime), fără încărcarea modelelor în
+procesul părinte; include însă încărcarea modelelor în worker-ii spawn, raportată separat
+(workerLoadSeconds), deoarece este un cost real al modului paralel.
+Scalarea este raportată pentru 1, 2, 4, ... procese, până la numărul de nuclee.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+def worker(video_path, workers, skip_frames, batch_size):
+    """O singură analiză, în procesul curent; afișează sumarul ca JSON"""
+    from deepfakeDetector import create_detector, resolve_model_path
+    from parallelVideo import analyze_parallel
+
+    detector = create_detector(resolve_model_path())
+    if workers > 1:
+        result = analyze_parallel(detector, video_path, workers, skip_frames=skip_frames, batch_size=batch_size)
+    else:
+        result = detector.predictVideo(video_path, skipFrames=skip_frames, batchSize=batch_size)
+
+    if "error" in result:
+        print(json.dumps({"error": result["error"]}))
+        return
+    segments = result.get("debugInfo", {}).get("parallel", {}).get("segments", [])
+    print(json.dumps({
+        "workerLoadSeconds": max((segment.get("loadSeconds") or 0 for segment in segments), default=0),
+        "processingTime": result["processingTime"],
+        "framesPerSecond": result["framesPerSecond"],
+        "analysedFrames": result["analysedFrames"],
+        "averageFakeScore": result["averageFakeScore"],
+        "percentDeepfake": result["percentDeepfake"]
+    }))
+
+def measure(video_path, workers, skip_frames, batch_size):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), video_path, "--worker", str(workers),
+         "--skipFrames", str(skip_frames), "--batchSize", str(batch_size)],
+        capture_output=True, text=True
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        stderr = completed.stderr.strip().splitlines()
+        return {"error": stderr[-1] if stderr else "worker failed"}
+    return json.loads(lines[-1])
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+def benchmark(video_path, max_workers=None, skip_frames=5, batch_size=16):
+    max_workers = max_workers or os.cpu_count() or 1
+    runs = {}
+    for workers in worker_counts(max_workers):
+        print(f"Analiză cu {workers} proces(e)...", file=sys.stderr)
+        runs[workers] = measure(video_path, workers, skip_frames, batch_size)
+
+    baseline = runs.get(1, {})
+    scaling = []
+    for workers, run in runs.items():
+        if "error" in run or "error" in baseline:
+            scaling.append({"workers": workers, "error": run.get("error") or baseline.get("error")})
+            continue
+        speedup = baseline["processingTime"] / run["processingTime"] if run["processingTime"] else None
+        scaling.append({
+            "workers": workers,
+            "processingTime": run["processingTime"],
+            "framesPerSecond": run["framesPerSecond"],
+            "workerLoadSeconds": run["workerLoadSeconds"],
+            "speedup": round(speedup, 2) if speedup else None,
+            "efficiency": round(speedup / workers, 2) if speedup else None,
+            # Aceleași cadre și același verdict ca analiza secvențială
+            "sameFrames": run["analysedFrames"] == baseline["analysedFrames"],
+            "averageFakeScoreDelta": round(run["averageFakeScore"] - baseline["averageFakeScore"], 2)
+        })
+
+    return {
+        "video": os.path.abspath(video_path),
+        "cpuCount": os.cpu_count(),
+        "skipFrames": skip_frames,
+        "batchSize": batch_size,
+        "scaling": scaling
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: parallel segment analysis vs. the sequential video pipeline')
+    parser.add_argument('video_path', help='Video to analyze')
+    parser.add_argument('--maxWorkers', type=int, default=None, help='Largest process count measured (default: CPU count)')
+    parser.add_argument('--skipFrames', type=int, default=5, help='Process every Nth frame')
+    parser.add_argument('--batchSize', type=int, default=16, help='Sampled frames per inference batch')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args.video_path, args.worker, args.skipFrames, args.batchSize)
+        return
+
+    print(json.dumps(benchmark(args.video_path, args.maxWorkers, args.skipFrames, args.batchSize), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cascadă cu prag de încredere: modelul ușor (MobileNetV2, 224px, din
+advancedDeepfakeDetector.create_lightweight_model) evaluează fiecare intrare, iar doar cele din
+banda de incertitudine [low, high] ajung la ensemble-ul complet și la calculateAdvancedConfidence.
+
+Banda este aleasă offline de tuneCascade.py pe un director de validare și salvată în
+savedModel/cascade_config.json, împreună cu acuratețea și accelerarea măsurate.
+"""
+
+import os
+import json
+import threading
+import numpy as np
+
+from lazyImports import lazy_import
+
+tf = lazy_import("tensorflow")
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CASCADE_CONFIG_PATH = os.path.join(current_dir, "savedModel", "cascade_config.json")
+
+# Unde salvează advancedDeepfakeDetector.py modelul ușor (rulat din directorul curent sau mutat în savedModel)
+LIGHT_MODEL_CANDIDATES = [
+    os.path.join(current_dir, "savedModel", "robust_deepfake_model.h5"),
+    os.path.join(current_dir, "robust_deepfake_model.h5")
+]
+
+DEFAULT_BAND = (0.2, 0.8)
+
+def find_light_model():
+    for path in LIGHT_MODEL_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    return None
+
+def load_cascade_config(config_path=None):
+    """Configurația cascadei (banda și modelul ușor); valori implicite dacă nu a fost rulat tuneCascade.py"""
+    config_path = config_path or CASCADE_CONFIG_PATH
+    config = {"low": DEFAULT_BAND[0], "high": DEFAULT_BAND[1], "lightModel": None, "tuned": False}
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+        config["tuned"] = True
+    except (OSError, ValueError):
+        pass
+    return config
+
+class CascadeStage:
+    def __init__(self, light_model_path, low=DEFAULT_BAND[0], high=DEFAULT_BAND[1]):
+        """
+        Args:
+            light_model_path: modelul ușor (.h5 / .keras)
+            low, high: scorurile ușoare în [low, high] sunt escaladate la ensemble
+        """
+        if not low <= high:
+            raise ValueError(f"Invalid cascade band: [{low}, {high}]")
+
+        from modelLoader import load_inference_model
+
+        self.light_model_path = light_model_path
+        self.low = float(low)
+        self.high = float(high)
+        self.model = load_inference_model(light_model_path, compile=False)
+        self.input_size = (int(self.model.input_shape[1]), int(self.model.input_shape[2]))
+        self._lock = threading.Lock()
+        self._total = 0
+        self._escalated = 0
+
+    def score(self, batch):
+        """Scorurile modelului ușor pentru un batch în formatul detectorului (redimensionat în TF)"""
+        batch = tf.convert_to_tensor(np.asarray(batch, dtype=np.float32))
+        if tuple(batch.shape[1:3]) != self.input_size:
+            batch = tf.image.resize(batch, self.input_size)
+        return self.model(batch, training=False).numpy().reshape(-1)
+
+    def should_escalate(self, light_score):
+        return self.low <= light_score <= self.high
+
+    def record(self, total, escalated):
+        with self._lock:
+            self._total += total
+            self._escalated += escalated
+
+    def debug_info(self, light_score, escalated):
+        return {
+            "stage": "ensemble" if escalated else "light",
+            "lightScore": round(float(light_score), 4),
+            "band": [self.low, self.high]
+        }
+
+    def stats(self):
+        """Fracția de intrări escaladate la ensemble în procesul curent"""
+        with self._lock:
+            total, escalated = self._total, self._escalated
+        return {
+            "lightModel": os.path.basename(self.light_model_path),
+            "band": [self.low, self.high],
+            "inputs": total,
+            "escalated": escalated,
+            "escalatedFraction": round(escalated / total, 4) if total else 0.0
+        }
+
+def cascade_files(config_path=None):
+    """Configurația și modelul ușor, pentru cheile din cache: o nouă calibrare schimbă rezultatele"""
+    config_path = config_path or CASCADE_CONFIG_PATH
+    config = load_cascade_config(config_path)
+    return [path for path in (config_path, config.get("lightModel") or find_light_model()) if path and os.path.exists(path)]
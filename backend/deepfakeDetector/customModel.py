@@ -1,24 +1,44 @@
 import os
 import numpy as np
-import tensorflow as tf
 import cv2
 import json
 import time
 import sys
+import threading
 
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    matplotlib = None
+from lazyImports import lazy_import
+from modelLoader import load_inference_model, ensure_compiled
+from tfliteBackend import TFLiteModel, current_quantized_model
+
+# TensorFlow este executat abia la încărcarea modelelor
+tf = lazy_import("tensorflow")
 
 class DeepfakeDetector:
-    def __init__(self, modelPath=None, inputShape=(299, 299, 3), useTrainModelArchitecture=False):
+    def __init__(self, modelPath=None, inputShape=(299, 299, 3), useTrainModelArchitecture=False, backend="keras"):
         self.inputShape = inputShape
+        self.backend = backend     # keras, float16 sau int8 (variantele TFLite din quantizeModel.py)
         self.model_loaded = False
         self.confidence_temperature = 1.0
         self.use_mock_predictions = False
         self.ensemble_models = []  # Lista de modele pentru ensemble
         self.model_paths = []      # Căile modelelor încărcate
+        self.vectorized_mc = True  # Eșantioanele MC dropout într-un singur apel de model
+        self.perceptual_index = None  # PerceptualIndex opțional pentru aproape-duplicate
+        self.fused_ensemble = True    # Membrii ensemble-ului într-un singur graf (fusedEnsemble.py)
+        self._fused = None
+        self.cascade = None           # CascadeStage opțional: modelul ușor înaintea ensemble-ului
+        self.cascade_args = None      # (configPath, lightModelPath) cu care a fost activată cascada
+        self._heatmap_generator = None  # EnhancedRedHeatmapGenerator pentru predictWithHeatmap
+        # Modelele Keras nu sunt sigure pentru apeluri concurente: fiecare apel de model ia acest lock,
+        # astfel încât analizele din thread-uri diferite (serverul) se intercalează între apeluri
+        self.model_lock = threading.RLock()
+        # Argumentele constructorului, pentru a reîncărca același detector în alt proces (parallelVideo)
+        self.load_args = {
+            "modelPath": modelPath,
+            "inputShape": inputShape,
+            "useTrainModelArchitecture": useTrainModelArchitecture,
+            "backend": backend
+        }
         
         # Căutare modele disponibile
         model_dir = os.path.join(os.path.dirname(__file__), "savedModel")
@@ -50,7 +70,7 @@ class DeepfakeDetector:
     def _load_single_model(self, model_path):
         """Încarcă un singur model specificat"""
         try:
-            self.model = tf.keras.models.load_model(model_path)
+            self.model = self._load_model_file(model_path)
             self.model_loaded = True
             print(f"Model încărcat: {model_path}", file=sys.stderr)
             
@@ -72,7 +92,7 @@ class DeepfakeDetector:
         for model_path in model_paths:
             if os.path.exists(model_path):
                 try:
-                    model = tf.keras.models.load_model(model_path)
+                    model = self._load_model_file(model_path)
                     self.ensemble_models.append(model)
                     self.model_paths.append(model_path)
                     print(f"Model încărcat în ensemble: {os.path.basename(model_path)}", file=sys.stderr)
@@ -93,6 +113,20 @@ class DeepfakeDetector:
             self.model_loaded = True
             print(f"Ensemble de {len(self.ensemble_models)} modele încărcat cu succes", file=sys.stderr)
     
+    def _load_model_file(self, model_path):
+        """Modelul Keras sau, cu backend-ul float16 / int8, varianta TFLite generată din el"""
+        if self.backend != "keras":
+            quantized_path = current_quantized_model(model_path, self.backend)
+            if quantized_path is not None:
+                print(f"Backend {self.backend}: {os.path.basename(quantized_path)}", file=sys.stderr)
+                return TFLiteModel(quantized_path)
+            print(f"Varianta {self.backend} lipsește pentru {os.path.basename(model_path)}, folosesc modelul Keras", file=sys.stderr)
+        return load_inference_model(model_path)
+    
+    def supportsGradients(self):
+        """MC dropout, încrederea pe gradient și Grad-CAM au nevoie de modelul Keras principal"""
+        return not isinstance(self.model, TFLiteModel)
+    
     def buildModel(self):
         try:
             # Use 299x299 for Xception (standard size)
@@ -207,6 +241,8 @@ class DeepfakeDetector:
                 )
             ]
             
+            # Un artefact de inferență nu are optimizer; aceeași configurație ca buildModel
+            ensure_compiled(self.model, tf.keras.optimizers.Adam(learning_rate=0.0001))
             history = self.model.fit(
                 trainGenerator,
                 steps_per_epoch=trainGenerator.samples // batchSize,
@@ -306,281 +342,491 @@ class DeepfakeDetector:
         try:
             startTime = time.time()
             
-            # Read image
-            img = cv2.imread(imagePath)
+            img = self.loadImageForModel(imagePath)
             if img is None:
                 return {"error": f"Could not load image from {imagePath}"}
             
-            # Convert BGR to RGB (cv2 reads in BGR, but most models expect RGB)
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            # Aproape-duplicat al unei imagini deja analizate: refolosește rezultatul
+            reused, hash_value = self.findNearDuplicate(img, imagePath, startTime)
+            if reused is not None:
+                return reused
             
-            # Resize to model input shape
-            img = cv2.resize(img, (self.inputShape[0], self.inputShape[1]))
-            img = img.astype('float32') / 255.0
             img_tensor = np.expand_dims(img, axis=0)
-            img_tensor = tf.convert_to_tensor(img_tensor)
             
-            # Folosește ensemble de modele pentru predicții mai precise
-            if self.ensemble_models and len(self.ensemble_models) > 1:
-                predictions = []
-                model_names = []
-                
-                for i, model in enumerate(self.ensemble_models):
-                    try:
-                        pred = model.predict(img_tensor, verbose=0)
-                        predictions.append(float(pred[0][0]))
-                        model_names.append(os.path.basename(self.model_paths[i]))
-                    except Exception as e:
-                        print(f"Eroare la modelul {i}: {e}", file=sys.stderr)
-                        continue
-                
-                if predictions:
-                    # Calculează media ponderată a predicțiilor
-                    # Modelul avansat are ponderea mai mare
-                    weights = []
-                    for name in model_names:
-                        if "avansat" in name.lower() or "advanced" in name.lower():
-                            weights.append(0.7)  # 70% pondere pentru modelul avansat
-                        else:
-                            weights.append(0.3)  # 30% pondere pentru modelul de bază
-                    
-                    # Normalizează ponderile
-                    total_weight = sum(weights)
-                    weights = [w/total_weight for w in weights]
-                    
-                    # Calculează predicția finală
-                    final_prediction = sum(p * w for p, w in zip(predictions, weights))
-                    
-                    print(f"Ensemble predicții: {predictions} cu ponderi {weights} = {final_prediction}", file=sys.stderr)
-                else:
-                    return {"error": "Toate modelele au eșuat în predicție"}
-            else:
-                # Fallback la modelul singular
+            # Cascadă: dacă modelul ușor este sigur, ensemble-ul și MC dropout nu mai rulează
+            cascade_info = None
+            if self.cascade is not None:
                 try:
-                    prediction = self.model.predict(img_tensor, verbose=0)
-                    final_prediction = float(prediction[0][0])
-                except Exception as pred_error:
-                    return {"error": f"Prediction failed: {str(pred_error)}"}
-            
-            # Aplică post-procesare inteligentă pentru îmbunătățirea scorurilor
-            final_prediction = self._apply_smart_postprocessing(final_prediction, img_tensor)
-            
-            # Centralized scoring method
-            result = self.getConsistentScoring(final_prediction, img_tensor)
-            
-            result["processingTime"] = round(time.time() - startTime, 3)
-            result["analysisTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
-            result["fileName"] = os.path.basename(imagePath)
-            
-            # Debug info îmbunătățit
-            debug_info = {
-                "model_loaded": self.model_loaded,
-                "input_shape": self.inputShape,
-                "ensemble_used": len(self.ensemble_models) > 1,
-                "models_count": len(self.ensemble_models) if self.ensemble_models else 1,
-                "prediction_raw": float(final_prediction),
-                "confidence_methods": result["debugInfo"]
-            }
-            
-            if self.ensemble_models and len(self.ensemble_models) > 1:
-                debug_info["ensemble_predictions"] = predictions if 'predictions' in locals() else []
-                debug_info["model_names"] = model_names if 'model_names' in locals() else []
-                debug_info["ensemble_weights"] = weights if 'weights' in locals() else []
-            
-            result["debugInfo"] = debug_info
+                    with self.model_lock:
+                        light_score = float(self.cascade.score(img_tensor)[0])
+                    escalate = self.cascade.should_escalate(light_score)
+                    self.cascade.record(1, int(escalate))
+                    cascade_info = self.cascade.debug_info(light_score, escalate)
+                    if not escalate:
+                        result = self.buildLightResult(light_score, imagePath, startTime, cascade_info)
+                        if self.perceptual_index is not None:
+                            self.perceptual_index.add(img, result, source=imagePath, hash_value=hash_value)
+                        return result
+                except Exception as cascade_error:
+                    print(f"Modelul ușor al cascadei a eșuat, folosesc ensemble-ul: {cascade_error}", file=sys.stderr)
             
+            # Folosește ensemble de modele pentru predicții mai precise
+            try:
+                batch_output = self.predictBatch(img_tensor)[0]
+            except Exception as pred_error:
+                if self.ensemble_models and len(self.ensemble_models) > 1:
+                    return {"error": str(pred_error)}
+                return {"error": f"Prediction failed: {str(pred_error)}"}
+            
+            result = self.buildPredictionResult(batch_output, img, imagePath, startTime)
+            if cascade_info is not None:
+                result["debugInfo"]["cascade"] = cascade_info
+            if self.perceptual_index is not None:
+                self.perceptual_index.add(img, result, source=imagePath, hash_value=hash_value)
             return result
             
         except Exception as e:
             return {"error": f"Prediction error: {str(e)}"}
     
-    def predictVideo(self, videoPath, skipFrames=5, outputPath=None):
+    def enableCascade(self, configPath=None, lightModelPath=None):
+        """
+        Activează cascada cu banda calibrată de tuneCascade.py.
+        Returnează False (și rămâne doar ensemble-ul) dacă modelul ușor lipsește.
+        """
+        from cascade import CascadeStage, load_cascade_config, find_light_model
+        
+        config = load_cascade_config(configPath)
+        light_model_path = lightModelPath or config.get("lightModel") or find_light_model()
+        if not light_model_path or not os.path.exists(light_model_path):
+            print("Modelul ușor pentru cascadă lipsește, rulez doar ensemble-ul", file=sys.stderr)
+            return False
+        if not config["tuned"]:
+            print(f"Cascadă necalibrată, folosesc banda implicită [{config['low']}, {config['high']}] (rulați tuneCascade.py)", file=sys.stderr)
+        
+        self.cascade = CascadeStage(light_model_path, config["low"], config["high"])
+        self.cascade_args = (configPath, lightModelPath)
+        return True
+    
+    def buildLightResult(self, light_score, imagePath, startTime, cascade_info):
+        """Rezultatul din modelul ușor al cascadei, cu același scoring dar fără ensemble și MC dropout"""
+        final_prediction = self._apply_smart_postprocessing(light_score)
+        result = self.getConsistentScoring(final_prediction)
+        
+        result["processingTime"] = round(time.time() - startTime, 3)
+        result["analysisTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        result["fileName"] = os.path.basename(imagePath)
+        result["debugInfo"] = {
+            "model_loaded": self.model_loaded,
+            "input_shape": self.inputShape,
+            "ensemble_used": False,
+            "models_count": 1,
+            "backend": self.backend,
+            "prediction_raw": float(final_prediction),
+            "confidence_methods": result["debugInfo"],
+            "cascade": cascade_info
+        }
+        return result
+    
+    def predictFaces(self, imagePath, image=None, faceDetector=None, expandFactor=0.2, minFaceSize=24):
+        """
+        Analiza pe fețe: YuNet rulează o singură dată, fețele decupate sunt evaluate împreună
+        într-un singur apel al ensemble-ului, iar scorul imaginii este cel al feței celei mai suspecte.
+        Fără fețe detectate (sau fără YuNet), revine la analiza întregii imagini.
+        """
         try:
             startTime = time.time()
             
-            cap = cv2.VideoCapture(videoPath)
-            if not cap.isOpened():
-                return {"error": f"Could not open video file: {videoPath}"}
-            
-            frameCount = 0
-            results = []
-            totalFrames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            
-            if outputPath:
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                fourcc = cv2.VideoWriter_fourcc(*'XVID')
-                out = cv2.VideoWriter(outputPath, fourcc, fps, (width, height))
-            
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                frameCount += 1
-                if frameCount % skipFrames != 0:
-                    if outputPath:
-                        out.write(frame)
-                    continue
-                
-                # Convert BGR to RGB and resize
-                rgbFrame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                resizedFrame = cv2.resize(rgbFrame, (self.inputShape[0], self.inputShape[1]))
-                preprocessedFrame = resizedFrame.astype('float32') / 255.0
-                preprocessedFrame = np.expand_dims(preprocessedFrame, axis=0)
-                
-                try:
-                    prediction = self.model.predict(preprocessedFrame, verbose=0)
-                    fakeProb = float(prediction[0][0])
-                    
-                    # Centralized scoring method
-                    result = self.getConsistentScoring(fakeProb, tf.convert_to_tensor(preprocessedFrame))
-                    
-                    fakeScore = result["fakeScore"]
-                    isDeepfake = result["isDeepfake"]
-                    
-                    if outputPath:
-                        status = "FAKE" if isDeepfake else "REAL"
-                        color = (0, 0, 255) if isDeepfake else (0, 255, 0)
-                        cv2.putText(frame, f"{status}: {fakeScore:.1f}%", (10, 30),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-                        cv2.putText(frame, f"Confidence: {result['confidenceScore']:.1f}%", (10, 70),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-                        out.write(frame)
-                    
-                    frameResult = {
-                        "frame": frameCount,
-                        "fakeScore": round(fakeScore, 2),
-                        "confidenceScore": round(result["confidenceScore"], 2),
-                        "isDeepfake": isDeepfake
-                    }
-                    results.append(frameResult)
-                except Exception as frame_error:
-                    import sys
-                    print(f"Error processing frame {frameCount}: {frame_error}", file=sys.stderr)
-            
-            cap.release()
-            if outputPath:
-                out.release()
-            
-            if not results:
-                return {"error": "No frames could be processed"}
-            
-            averageFakeScore = np.mean([r["fakeScore"] for r in results])
-            averageConfidence = np.mean([r["confidenceScore"] for r in results])
-            percentDeepfake = sum(1 for r in results if r["isDeepfake"]) / len(results) * 100
-            
-            endTime = time.time()
-            processingTime = endTime - startTime
+            if image is None:
+                image = cv2.imread(imagePath)
+                if image is None:
+                    return {"error": f"Could not load image from {imagePath}"}
+            
+            face_module, detector = self._get_face_detector(faceDetector)
+            if detector is None:
+                return self._predictFullImage(image, imagePath, startTime, "Face detector not loaded")
+            
+            face_results = face_module.detect_faces(image, detector)
+            if "error" in face_results:
+                return self._predictFullImage(image, imagePath, startTime, face_results["error"])
+            
+            # Fețele de câțiva pixeli, mărite la intrarea modelului, dau scoruri nesigure
+            regions = face_module.extract_face_regions(image, face_results, expand_factor=expandFactor)
+            scored = [r for r in regions if min(r["region"].shape[:2]) >= minFaceSize]
+            if not scored:
+                return self._predictFullImage(
+                    image, imagePath, startTime,
+                    "No faces detected" if not regions else f"All faces smaller than {minFaceSize}px",
+                    faces_skipped=len(regions)
+                )
             
+            # Toate fețele într-un singur batch: un apel al ensemble-ului și MC dropout pe bucăți
+            batch = np.stack([self.preprocessArray(r["region"]) for r in scored])
+            try:
+                outputs = self.predictBatch(batch)
+            except Exception as pred_error:
+                return {"error": f"Prediction failed: {str(pred_error)}"}
+            confidence_stats = self.batchConfidenceStats(batch, 7)
+            
+            faces = []
+            for i, (region, output) in enumerate(zip(scored, outputs)):
+                final_prediction = self._apply_smart_postprocessing(output["prediction"])
+                scoring = self.getConsistentScoring(
+                    final_prediction, batch[i:i + 1],
+                    confidence_stats=confidence_stats[i] if confidence_stats else None
+                )
+                faces.append({
+                    "bbox": region["original_bbox"],
+                    "cropBox": region["bbox"],
+                    "detectionConfidence": round(float(region["confidence"]), 4),
+                    "fakeScore": scoring["fakeScore"],
+                    "confidenceScore": scoring["confidenceScore"],
+                    "isDeepfake": scoring["isDeepfake"],
+                    "ensemblePredictions": output.get("ensemble_predictions", [output["prediction"]])
+                })
+            
+            # O singură față manipulată este suficientă pentru ca imaginea să fie falsă
+            top = max(range(len(faces)), key=lambda i: faces[i]["fakeScore"])
             result = {
-                "totalFrames": frameCount,
-                "analysedFrames": len(results),
-                "averageFakeScore": round(averageFakeScore, 2),
-                "averageConfidence": round(averageConfidence, 2),
-                "percentDeepfake": round(percentDeepfake, 2),
-                "isDeepfake": percentDeepfake > 50,
-                "processingTime": round(processingTime, 3),
-                "framesPerSecond": round(frameCount / processingTime, 2) if processingTime > 0 else 0,
+                "fakeScore": faces[top]["fakeScore"],
+                "confidenceScore": faces[top]["confidenceScore"],
+                "isDeepfake": any(face["isDeepfake"] for face in faces),
+                "processingTime": round(time.time() - startTime, 3),
                 "analysisTime": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "fileName": os.path.basename(videoPath),
+                "fileName": os.path.basename(imagePath),
+                "faces": faces,
+                "faceAggregate": {
+                    "method": "max",
+                    "facesDetected": face_results["faces_detected"],
+                    "facesScored": len(faces),
+                    "facesSkipped": len(regions) - len(faces),
+                    "mostSuspiciousFace": top,
+                    "maxFakeScore": faces[top]["fakeScore"],
+                    "meanFakeScore": round(float(np.mean([face["fakeScore"] for face in faces])), 2)
+                },
                 "debugInfo": {
                     "model_loaded": self.model_loaded,
                     "input_shape": self.inputShape,
-                    "total_video_frames": totalFrames,
-                    "video_fps": fps
-                },
-                "frameResults": results[:10]  # Limit frame results to first 10 for JSON size
+                    "analysis_mode": "faces",
+                    "ensemble_used": len(self.ensemble_models) > 1,
+                    "models_count": len(self.ensemble_models) if self.ensemble_models else 1,
+                    "backend": self.backend,
+                    "ensemble_fused": outputs[0].get("fused_graph", False),
+                    "image_size": [int(image.shape[1]), int(image.shape[0])]
+                }
             }
-            
             return result
             
         except Exception as e:
-            return {"error": f"Video processing error: {str(e)}"}
+            return {"error": f"Face prediction error: {str(e)}"}
+    
+    def _get_face_detector(self, faceDetector=None):
+        """(modulul faceDetector, detectorul dat sau pool-ul YuNet al procesului)"""
+        try:
+            import faceDetector as face_module
+        except Exception as e:
+            print(f"faceDetector indisponibil: {e}", file=sys.stderr)
+            return None, None
         
-    def predictRealtime(self, cameraId=0, displayOutput=True, maxFrames=100):
+        return face_module, faceDetector or face_module.get_detector_pool()
+    
+    def _predictFullImage(self, image, imagePath, startTime, reason, faces_skipped=0):
+        """Analiza întregii imagini pentru predictFaces, când nu există fețe de evaluat"""
+        img = self.preprocessArray(image)
         try:
-            cap = cv2.VideoCapture(cameraId)
-            if not cap.isOpened():
-                return {"error": f"Could not open camera {cameraId}"}
+            batch_output = self.predictBatch(np.expand_dims(img, axis=0))[0]
+        except Exception as pred_error:
+            return {"error": f"Prediction failed: {str(pred_error)}"}
+        
+        result = self.buildPredictionResult(batch_output, img, imagePath, startTime)
+        result["faces"] = []
+        result["faceAggregate"] = {
+            "method": "fullImage",
+            "facesScored": 0,
+            "facesSkipped": faces_skipped,
+            "reason": reason
+        }
+        result["debugInfo"]["analysis_mode"] = "full_image"
+        return result
+    
+    def findNearDuplicate(self, img, imagePath, startTime):
+        """
+        Caută imaginea preprocesată în indexul perceptual.
+        Returnează (rezultatul refolosit sau None, hash-ul calculat pentru adăugarea ulterioară).
+        """
+        if self.perceptual_index is None:
+            return None, None
+        
+        from perceptualIndex import mark_reused
+        hash_value = self.perceptual_index.hash(img)
+        reused, distance = self.perceptual_index.lookup(img, hash_value=hash_value)
+        if reused is not None:
+            return mark_reused(reused, distance, imagePath, startTime, self.perceptual_index), hash_value
+        return None, hash_value
+    
+    def loadImageForModel(self, imagePath):
+        """Citește imaginea și o aduce la formatul de intrare al modelului (RGB, float32, [0, 1])"""
+        # Read image
+        img = cv2.imread(imagePath)
+        if img is None:
+            return None
+        
+        return self.preprocessArray(img)
+    
+    def preprocessArray(self, img):
+        """Aduce o imagine BGR deja decodată la formatul de intrare al modelului"""
+        # Convert BGR to RGB (cv2 reads in BGR, but most models expect RGB)
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        
+        # Resize to model input shape
+        img = cv2.resize(img, (self.inputShape[0], self.inputShape[1]))
+        return img.astype('float32') / 255.0
+    
+    def _ensemble_weights(self, model_names):
+        """Ponderile normalizate ale modelelor din ensemble"""
+        # Modelul avansat are ponderea mai mare
+        weights = []
+        for name in model_names:
+            if "avansat" in name.lower() or "advanced" in name.lower():
+                weights.append(0.7)  # 70% pondere pentru modelul avansat
+            else:
+                weights.append(0.3)  # 30% pondere pentru modelul de bază
+        
+        # Normalizează ponderile
+        total_weight = sum(weights)
+        return [w/total_weight for w in weights]
+    
+    def predictBatch(self, batch, precomputed=None):
+        """
+        Rulează fiecare model o singură dată pe un batch (N, H, W, C).
+        Returnează câte un dicționar cu predicția brută pentru fiecare imagine.
+        precomputed: {index_model: predicții} pentru membrii deja rulați pe acest batch
+        """
+        with self.model_lock:
+            return self._predict_batch(batch, precomputed)
+    
+    def _predict_batch(self, batch, precomputed=None):
+        precomputed = precomputed or {}
+        
+        if self.ensemble_models and len(self.ensemble_models) > 1:
+            fused = None if precomputed else self._get_fused_ensemble()
+            if fused is not None:
+                try:
+                    return self._fused_outputs(fused, batch)
+                except Exception as e:
+                    print(f"Ensemble-ul fuzionat a eșuat, revin la predicția per membru: {e}", file=sys.stderr)
+                    self.fused_ensemble = False
             
-            frameCount = 0
-            results = []
+            member_predictions = []
+            model_names = []
             
-            while frameCount < maxFrames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                frameCount += 1
-                
-                # Convert BGR to RGB and resize
-                rgbFrame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                resizedFrame = cv2.resize(rgbFrame, (self.inputShape[0], self.inputShape[1]))
-                preprocessedFrame = resizedFrame.astype('float32') / 255.0
-                preprocessedFrame = np.expand_dims(preprocessedFrame, axis=0)
-                
+            for i, model in enumerate(self.ensemble_models):
                 try:
-                    prediction = self.model.predict(preprocessedFrame, verbose=0)
-                    fakeProb = float(prediction[0][0])
-                    
-                    # Centralized scoring method
-                    result = self.getConsistentScoring(fakeProb, tf.convert_to_tensor(preprocessedFrame))
-                    
-                    fakeScore = result["fakeScore"]
-                    isDeepfake = result["isDeepfake"]
-                    
-                    frameResult = {
-                        "frame": frameCount,
-                        "fakeScore": round(fakeScore, 2),
-                        "confidenceScore": round(result["confidenceScore"], 2),
-                        "isDeepfake": isDeepfake
-                    }
-                    results.append(frameResult)
-                    
-                    if displayOutput:
-                        status = "FAKE" if isDeepfake else "REAL"
-                        color = (0, 0, 255) if isDeepfake else (0, 255, 0)
-                        cv2.putText(frame, f"{status}: {fakeScore:.1f}%", (10, 30),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-                        cv2.putText(frame, f"Confidence: {result['confidenceScore']:.1f}%", (10, 70),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-                        cv2.imshow('Deepfake Detection', frame)
-                        
-                        if cv2.waitKey(1) & 0xFF == ord('q'):
-                            break
-                except Exception as frame_error:
-                    import sys
-                    print(f"Error processing frame {frameCount}: {frame_error}", file=sys.stderr)
-            
-            cap.release()
-            if displayOutput:
-                cv2.destroyAllWindows()
-            
-            if not results:
-                return {"error": "No frames could be processed"}
-            
-            averageFakeScore = np.mean([r["fakeScore"] for r in results])
-            averageConfidence = np.mean([r["confidenceScore"] for r in results])
-            percentDeepfake = sum(1 for r in results if r["isDeepfake"]) / len(results) * 100
+                    pred = precomputed[i] if i in precomputed else model.predict(batch, verbose=0)
+                    member_predictions.append([float(p[0]) for p in pred])
+                    model_names.append(os.path.basename(self.model_paths[i]))
+                except Exception as e:
+                    print(f"Eroare la modelul {i}: {e}", file=sys.stderr)
+                    continue
             
-            result = {
-                "totalFrames": frameCount,
-                "averageFakeScore": round(averageFakeScore, 2),
-                "averageConfidence": round(averageConfidence, 2),
-                "percentDeepfake": round(percentDeepfake, 2),
-                "isDeepfake": percentDeepfake > 50,
-                "analysisTime": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "debugInfo": {
-                    "model_loaded": self.model_loaded,
-                    "input_shape": self.inputShape,
-                    "camera_id": cameraId
-                },
-                "frameResults": results
-            }
+            if not member_predictions:
+                raise RuntimeError("Toate modelele au eșuat în predicție")
             
-            return result
+            weights = self._ensemble_weights(model_names)
+            outputs = []
+            for idx in range(len(batch)):
+                predictions = [member[idx] for member in member_predictions]
+                
+                # Calculează predicția finală ca medie ponderată
+                final_prediction = sum(p * w for p, w in zip(predictions, weights))
+                print(f"Ensemble predicții: {predictions} cu ponderi {weights} = {final_prediction}", file=sys.stderr)
+                
+                outputs.append({
+                    "prediction": final_prediction,
+                    "ensemble_predictions": predictions,
+                    "model_names": model_names,
+                    "ensemble_weights": weights
+                })
+            return outputs
+        
+        # Fallback la modelul singular
+        prediction = precomputed[0] if 0 in precomputed else self.model.predict(batch, verbose=0)
+        return [{"prediction": float(p[0])} for p in prediction]
+    
+    def _get_fused_ensemble(self):
+        """Graful fuzionat al ensemble-ului, construit la prima utilizare; None dacă nu se poate folosi"""
+        if not self.fused_ensemble:
+            return None
+        if self._fused is None:
+            from fusedEnsemble import FusedEnsemble, can_fuse
+            if not can_fuse(self.ensemble_models):
+                self.fused_ensemble = False
+                return None
+            model_names = [os.path.basename(path) for path in self.model_paths]
+            self._fused = FusedEnsemble(self.ensemble_models, self._ensemble_weights(model_names), self.inputShape)
+        return self._fused
+    
+    def _fused_outputs(self, fused, batch):
+        """Același format ca bucla per membru din predictBatch, dintr-un singur apel al grafului"""
+        fused_scores, member_scores = fused(batch)
+        model_names = [os.path.basename(path) for path in self.model_paths]
+        weights = self._ensemble_weights(model_names)
+        
+        outputs = []
+        for idx in range(len(batch)):
+            predictions = [float(p) for p in member_scores[idx]]
+            final_prediction = float(fused_scores[idx])
+            print(f"Ensemble predicții: {predictions} cu ponderi {weights} = {final_prediction}", file=sys.stderr)
+            outputs.append({
+                "prediction": final_prediction,
+                "ensemble_predictions": predictions,
+                "model_names": model_names,
+                "ensemble_weights": weights,
+                "fused_graph": True
+            })
+        return outputs
+    
+    def buildPredictionResult(self, batch_output, img, imagePath, startTime, confidence_stats=None):
+        """
+        Construiește rezultatul JSON pentru o imagine pe baza predicției brute din predictBatch.
+        confidence_stats: statisticile MC dropout deja calculate pe batch (vezi batchConfidenceStats)
+        """
+        img_tensor = tf.convert_to_tensor(np.expand_dims(img, axis=0))
+        
+        # Aplică post-procesare inteligentă pentru îmbunătățirea scorurilor
+        final_prediction = self._apply_smart_postprocessing(batch_output["prediction"], img_tensor)
+        
+        # Centralized scoring method
+        result = self.getConsistentScoring(final_prediction, img_tensor, confidence_stats=confidence_stats)
+        
+        result["processingTime"] = round(time.time() - startTime, 3)
+        result["analysisTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        result["fileName"] = os.path.basename(imagePath)
+        
+        # Debug info îmbunătățit
+        debug_info = {
+            "model_loaded": self.model_loaded,
+            "input_shape": self.inputShape,
+            "ensemble_used": len(self.ensemble_models) > 1,
+            "models_count": len(self.ensemble_models) if self.ensemble_models else 1,
+            "backend": self.backend,
+            "prediction_raw": float(final_prediction),
+            "confidence_methods": result["debugInfo"]
+        }
+        
+        if self.ensemble_models and len(self.ensemble_models) > 1:
+            debug_info["ensemble_predictions"] = batch_output.get("ensemble_predictions", [])
+            debug_info["model_names"] = batch_output.get("model_names", [])
+            debug_info["ensemble_weights"] = batch_output.get("ensemble_weights", [])
+            debug_info["ensemble_fused"] = batch_output.get("fused_graph", False)
+        
+        result["debugInfo"] = debug_info
+        
+        return result
+    
+    def predictVideo(self, videoPath, skipFrames=5, outputPath=None, batchSize=16,
+                     sampling="stride", numFrames=None, timeBudget=None, progressCallback=None,
+                     faces=False, detectEvery=10, earlyStop=False, earlyStopError=0.01,
+                     gateThreshold=None, gateForceEvery=30, frameCallback=None):
+        try:
+            # Decodare într-un thread separat, inferență în batch-uri prin tot ensemble-ul
+            # (cu faces, fețele urmărite de faceTracker în locul cadrelor întregi)
+            from videoPipeline import VideoPipeline
+            return VideoPipeline(
+                self, batch_size=batchSize, faces=faces, detect_every=detectEvery,
+                gate_threshold=gateThreshold, gate_force_every=gateForceEvery
+            ).run(
+                videoPath, skipFrames, outputPath,
+                sampling=sampling, numFrames=numFrames, timeBudget=timeBudget,
+                progressCallback=progressCallback,
+                earlyStop=earlyStop, earlyStopError=earlyStopError,
+                frameCallback=frameCallback
+            )
+            
+        except Exception as e:
+            return {"error": f"Video processing error: {str(e)}"}
+    
+    def scoreBatch(self, batch, n_samples=7):
+        """
+        Scorurile pentru un batch de cadre (N, H, W, C): predicția ensemble-ului și încrederea,
+        cu MC dropout rulat pe bucăți de batch în loc de câte un apel per cadru.
+        Cu cascada activă, doar cadrele din banda de incertitudine ajung la ensemble.
+        """
+        if self.cascade is None:
+            return self._score_full_batch(batch, n_samples)
+        
+        try:
+            with self.model_lock:
+                light_scores = self.cascade.score(batch)
+        except Exception as cascade_error:
+            print(f"Modelul ușor al cascadei a eșuat, folosesc ensemble-ul: {cascade_error}", file=sys.stderr)
+            return self._score_full_batch(batch, n_samples)
+        
+        escalated = [i for i, score in enumerate(light_scores) if self.cascade.should_escalate(score)]
+        self.cascade.record(len(batch), len(escalated))
+        
+        results = [None] * len(batch)
+        if escalated:
+            for i, result in zip(escalated, self._score_full_batch(batch[escalated], n_samples)):
+                results[i] = result
+        for i, score in enumerate(light_scores):
+            if results[i] is None:
+                results[i] = self.getConsistentScoring(float(score))
+        return results
+    
+    def _score_full_batch(self, batch, n_samples):
+        """Ensemble-ul și încrederea MC dropout pentru toate cadrele din batch"""
+        outputs = self.predictBatch(batch)
+        confidence_stats = self.batchConfidenceStats(batch, n_samples)
+        
+        results = []
+        for i, output in enumerate(outputs):
+            results.append(self.getConsistentScoring(
+                output["prediction"], batch[i:i + 1],
+                confidence_stats=confidence_stats[i] if confidence_stats else None
+            ))
+        return results
+    
+    def batchConfidenceStats(self, batch, n_samples):
+        """
+        Statisticile MC dropout (std, gradient) pentru fiecare imagine din batch.
+        Fiecare apel MC conține doar eșantioanele unei singure imagini: cu training=True, BatchNorm
+        folosește statisticile batch-ului, iar cadre diferite în același apel și-ar influența scorurile.
+        None dacă nu pot fi calculate pe batch; atunci încrederea este calculată per imagine.
+        """
+        if not (self.model_loaded and n_samples > 1 and self.supportsGradients()):
+            return None
+        try:
+            stds, grads = [], []
+            for i in range(len(batch)):
+                with self.model_lock:
+                    chunk_stds, chunk_grads = self._mc_dropout_statistics(batch[i:i + 1], n_samples)
+                stds.append(chunk_stds)
+                grads.append(chunk_grads)
+            mc_stds = np.concatenate(stds)
+            grad_magnitudes = np.concatenate(grads) if all(g is not None for g in grads) else None
+        except Exception as e:
+            print(f"MC dropout pe batch a eșuat, revin la calculul per cadru: {e}", file=sys.stderr)
+            return None
+        return [
+            (mc_stds[i], grad_magnitudes[i] if grad_magnitudes is not None else None)
+            for i in range(len(batch))
+        ]
+        
+    def predictRealtime(self, cameraId=0, displayOutput=True, maxFrames=100, gateThreshold=None, gateForceEvery=30,
+                        source=None, pace=None):
+        """
+        Analiză realtime cu captura și inferența în thread-uri separate: se evaluează mereu cel mai
+        nou cadru, iar cele rămase în urmă sunt aruncate (vezi realtimePipeline).
+        source: cameră (index) sau fișier video în locul lui cameraId; fișierele sunt redate în ritmul FPS-ului
+        """
+        try:
+            from realtimePipeline import RealtimePipeline
+            return RealtimePipeline(self, gateThreshold, gateForceEvery).run(
+                cameraId if source is None else source,
+                maxFrames=maxFrames,
+                displayOutput=displayOutput,
+                pace=pace
+            )
             
         except Exception as e:
             return {"error": f"Real-time processing error: {str(e)}"}
@@ -646,26 +892,102 @@ class DeepfakeDetector:
         except Exception as e:
             return {"status": "failed", "message": f"Heatmap error: {str(e)}"}
     
-    def calculateAdvancedConfidence(self, img_tensor, prediction_prob, n_samples=10):
+    def predictWithHeatmap(self, imagePath, outputPath=None, minFakeScore=30, image=None):
+        """
+        Predicție și Grad-CAM în același proces, fără subprocesul din generateHeatmap.
+        Grad-CAM folosește modelul și preprocesarea (BGR / 255) ale EnhancedRedHeatmapGenerator,
+        ca heatmap-ul să fie același cu cel din generateHeatmap.
+        Returnează (rezultatul predict, rezultatul heatmap în formatul generateHeatmap sau None).
+        image: imaginea BGR deja decodată, pentru a nu citi fișierul încă o dată
+        """
+        startTime = time.time()
+        
+        original_img = image if image is not None else cv2.imread(imagePath)
+        if original_img is None:
+            return {"error": f"Could not load image from {imagePath}"}, None
+        
+        img = self.preprocessArray(original_img)
+        
+        try:
+            batch_output = self.predictBatch(np.expand_dims(img, axis=0))[0]
+        except Exception as pred_error:
+            return {"error": f"Prediction failed: {str(pred_error)}"}, None
+        
+        result = self.buildPredictionResult(batch_output, img, imagePath, startTime)
+        if result.get("fakeScore", 0) <= minFakeScore:
+            return result, None
+        
+        try:
+            # Doar imaginile peste prag plătesc pasul backward
+            generator = self.getHeatmapGenerator()
+            img_batch, _ = generator.preprocess_array(original_img)
+            with self.model_lock:
+                heatmap, deepfake_score = generator.generate_gradcam_enhanced(img_batch, original_img)
+            output_data = generator.render_heatmap(
+                heatmap, original_img, outputPath or "temp_heatmap.jpg", float(deepfake_score)
+            )
+        except Exception as e:
+            return result, {"status": "failed", "message": f"Heatmap error: {str(e)}"}
+        
+        if output_data.get("status") != "success":
+            return result, {"status": "failed", "message": output_data.get("message", "Unknown error from generator")}
+        
+        return result, {
+            "status": "success",
+            "path": output_data["output_path"],
+            "fakeScore": output_data.get("deepfake_score", 0) * 100,  # Convert to percentage
+            "metadata": {
+                "artifact_coverage": output_data.get("artifact_coverage_percent", 0),
+                "high_intensity_pixels": output_data.get("high_intensity_pixels", 0),
+                "total_pixels": output_data.get("total_pixels", 0),
+                "heatmap_type": output_data.get("heatmap_type", "enhanced_red"),
+                "version": output_data.get("version", "3.0.0")
+            }
+        }
+    
+    def getHeatmapGenerator(self):
+        """
+        Generatorul de heatmap al lui generateHeatmap, încărcat o singură dată per detector.
+        Dacă modelul lui este deja în ensemble, refolosește instanța încărcată.
+        """
+        with self.model_lock:
+            if self._heatmap_generator is None:
+                from enhancedRedHeatmapGenerator import EnhancedRedHeatmapGenerator
+                
+                model_path = EnhancedRedHeatmapGenerator._find_best_model()
+                loaded = dict(zip(self.model_paths, self.ensemble_models))
+                if self.model_loaded and self.load_args["modelPath"]:
+                    loaded.setdefault(self.load_args["modelPath"], self.model)
+                model = next(
+                    (model for path, model in loaded.items() if os.path.abspath(path) == os.path.abspath(model_path)),
+                    None
+                )
+                self._heatmap_generator = EnhancedRedHeatmapGenerator(model_path, model=model)
+            return self._heatmap_generator
+    
+    def calculateAdvancedConfidence(self, img_tensor, prediction_prob, n_samples=10, mc_stats=None):
         """
         Calculate realistic confidence score using multiple methods:
         1. Monte Carlo Dropout for uncertainty estimation
         2. Entropy-based uncertainty
         3. Gradient magnitude analysis
         4. Prediction stability
+        
+        mc_stats: (mc_std, grad_magnitude) deja calculate pe un batch, ca să nu se repete pasul MC
         """
         try:
             confidence_scores = []
-            
-            # Method 1: Monte Carlo Dropout
-            if n_samples > 1:
-                mc_predictions = []
-                for _ in range(n_samples):
-                    # Enable dropout during inference for MC sampling
-                    mc_pred = self.model(img_tensor, training=True)
-                    mc_predictions.append(float(mc_pred[0][0]))
-                
-                mc_std = np.std(mc_predictions)
+            grad_magnitude = None
+            
+            # Method 1: Monte Carlo Dropout (nu și pentru modelele TFLite, fără dropout la inferență)
+            if n_samples > 1 and self.supportsGradients():
+                if mc_stats is None:
+                    with self.model_lock:
+                        mc_stds, grad_magnitudes = self._mc_dropout_statistics(img_tensor, n_samples)
+                    mc_stats = (mc_stds[0], grad_magnitudes[0] if grad_magnitudes is not None else None)
+                mc_std = float(mc_stats[0])
+                if mc_stats[1] is not None:
+                    grad_magnitude = float(mc_stats[1])
                 mc_confidence = max(0, 100 * (1 - min(mc_std * 4, 1)))  # Higher std = lower confidence
                 confidence_scores.append(mc_confidence)
             
@@ -693,14 +1015,11 @@ class DeepfakeDetector:
             
             # Method 4: Gradient magnitude analysis
             try:
-                with tf.GradientTape() as tape:
-                    tape.watch(img_tensor)
-                    pred = self.model(img_tensor)
-                    loss = tf.reduce_mean(pred)
-                
-                gradients = tape.gradient(loss, img_tensor)
-                if gradients is not None:
-                    grad_magnitude = tf.reduce_mean(tf.abs(gradients)).numpy()
+                # Refolosește gradientul calculat în pasul MC dacă există
+                if grad_magnitude is None and self.supportsGradients():
+                    with self.model_lock:
+                        grad_magnitude = self._gradient_magnitude(img_tensor)
+                if grad_magnitude is not None:
                     # Higher gradient magnitude often indicates more confident predictions
                     grad_confidence = min(100, grad_magnitude * 1000)  # Scale appropriately
                     confidence_scores.append(grad_confidence)
@@ -717,10 +1036,10 @@ class DeepfakeDetector:
                 final_confidence = max(15, min(95, distance_from_boundary * 200))
             
             return final_confidence, {
-                "mc_confidence": float(confidence_scores[0]) if len(confidence_scores) > 0 and confidence_scores[0] is not None else None,
-                "entropy_confidence": float(confidence_scores[1]) if len(confidence_scores) > 1 and confidence_scores[1] is not None else None,
-                "distance_confidence": float(confidence_scores[2]) if len(confidence_scores) > 2 and confidence_scores[2] is not None else None,
-                "gradient_confidence": float(confidence_scores[3]) if len(confidence_scores) > 3 and confidence_scores[3] is not None else None,
+                "mc_confidence": float(mc_confidence) if 'mc_confidence' in locals() else None,
+                "entropy_confidence": float(entropy_confidence),
+                "distance_confidence": float(distance_confidence),
+                "gradient_confidence": float(grad_confidence) if 'grad_confidence' in locals() else None,
                 "entropy_value": float(entropy) if 'entropy' in locals() else None,
                 "mc_std": float(mc_std) if 'mc_std' in locals() else None
             }
@@ -731,6 +1050,58 @@ class DeepfakeDetector:
             distance = abs(prediction_prob - 0.5)
             return max(15, min(95, distance * 200)), {}
     
+    def _mc_dropout_statistics(self, img_tensor, n_samples):
+        """
+        Monte Carlo Dropout pentru un batch (N, H, W, C).
+        Returnează deviația standard a eșantioanelor și magnitudinea medie a gradientului pentru fiecare imagine.
+        """
+        img_tensor = tf.convert_to_tensor(img_tensor, dtype=tf.float32)
+        
+        if not self.vectorized_mc:
+            # Varianta originală: câte un apel de model pentru fiecare eșantion
+            mc_values = []
+            for _ in range(n_samples):
+                # Enable dropout during inference for MC sampling
+                mc_values.append(self.model(img_tensor, training=True)[:, 0].numpy())
+            mc_values = np.stack(mc_values, axis=1)
+            return np.std(mc_values, axis=1), None
+        
+        batch_size = int(img_tensor.shape[0])
+        # Fiecare imagine repetată de n_samples ori, eșantioanele unei imagini fiind consecutive
+        tiled = tf.repeat(img_tensor, repeats=n_samples, axis=0)
+        grad_magnitude = None
+        
+        try:
+            with tf.GradientTape() as tape:
+                tape.watch(tiled)
+                mc_preds = self.model(tiled, training=True)
+                # Suma păstrează gradientul fiecărui eșantion la scara unui apel individual
+                loss = tf.reduce_sum(mc_preds)
+            
+            gradients = tape.gradient(loss, tiled)
+            if gradients is not None:
+                per_sample = tf.reduce_mean(tf.abs(gradients), axis=[1, 2, 3])
+                grad_magnitude = tf.reduce_mean(tf.reshape(per_sample, (batch_size, n_samples)), axis=1).numpy()
+        except Exception as e:
+            print(f"Gradientul din pasul MC a eșuat, continui fără: {e}", file=sys.stderr)
+            mc_preds = self.model(tiled, training=True)
+        
+        mc_values = tf.reshape(mc_preds[:, 0], (batch_size, n_samples)).numpy()
+        return np.std(mc_values, axis=1), grad_magnitude
+    
+    def _gradient_magnitude(self, img_tensor):
+        """Magnitudinea medie a gradientului față de intrare, dintr-un pas separat"""
+        img_tensor = tf.convert_to_tensor(img_tensor, dtype=tf.float32)
+        with tf.GradientTape() as tape:
+            tape.watch(img_tensor)
+            pred = self.model(img_tensor)
+            loss = tf.reduce_mean(pred)
+        
+        gradients = tape.gradient(loss, img_tensor)
+        if gradients is None:
+            return None
+        return float(tf.reduce_mean(tf.abs(gradients)).numpy())
+    
     def evaluateModelPerformance(self, test_data_dir=None):
         """
         Evaluate model performance using metrics similar to trainModel.py
@@ -761,6 +1132,8 @@ class DeepfakeDetector:
             
             # Evaluate model
             print("Evaluating model performance...", file=sys.stderr)
+            # Artefactele de inferență nu au configurație de compilare
+            ensure_compiled(self.model)
             loss, accuracy, auc = self.model.evaluate(test_generator, verbose=0)
             
             # Get predictions for detailed analysis
@@ -856,10 +1229,11 @@ class DeepfakeDetector:
             self.confidence_temperature = 1.0  # Default to no scaling
             return False
     
-    def getConsistentScoring(self, prediction_prob, img_tensor=None, enable_advanced=True):
+    def getConsistentScoring(self, prediction_prob, img_tensor=None, enable_advanced=True, confidence_stats=None):
         """
         Metodă centralizată și îmbunătățită pentru scoring-ul consistent
         Această metodă folosește tehnici avansate pentru calcularea scorurilor mai precise
+        confidence_stats: statisticile MC dropout precalculate (vezi scoreBatch)
         """
         try:
             # Calculări de bază îmbunătățite
@@ -872,7 +1246,7 @@ class DeepfakeDetector:
             # Calculează încrederea folosind metode avansate dacă este posibil
             if enable_advanced and img_tensor is not None and self.model_loaded:
                 confidence_score, confidence_debug = self.calculateAdvancedConfidence(
-                    img_tensor, prediction_prob, n_samples=7
+                    img_tensor, prediction_prob, n_samples=7, mc_stats=confidence_stats
                 )
                 
                 # Îmbunătățiri suplimentare pentru încredere
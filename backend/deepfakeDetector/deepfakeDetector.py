@@ -1,31 +1,42 @@
 import os
+import sys
+
+# Profilarea (--profileStartup) trebuie pornită înaintea celorlalte importuri
+from lazyImports import start_profiler, get_profiler
+start_profiler()
+
 import argparse
 import json
-import sys
 import time
-import cv2
-import numpy as np
 
 # Add current directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
 
-try:
-    from customModel import DeepfakeDetector
-except ImportError:
-    parent_dir = os.path.dirname(current_dir)
-    if parent_dir not in sys.path:
-        sys.path.append(parent_dir)
+from resultCache import open_cache
+
+def load_detector_class():
+    """
+    Importă DeepfakeDetector (și TensorFlow) doar când este nevoie de modele,
+    astfel încât răspunsurile din cache să nu plătească importul.
+    """
     try:
         from customModel import DeepfakeDetector
     except ImportError:
-        print(json.dumps({
-            "error": "Could not import DeepfakeDetector class. Please ensure the customModel.py file is available.",
-            "model_missing": True,
-            "mock_data": True
-        }))
-        sys.exit(1)
+        parent_dir = os.path.dirname(current_dir)
+        if parent_dir not in sys.path:
+            sys.path.append(parent_dir)
+        try:
+            from customModel import DeepfakeDetector
+        except ImportError:
+            print(json.dumps({
+                "error": "Could not import DeepfakeDetector class. Please ensure the customModel.py file is available.",
+                "model_missing": True,
+                "mock_data": True
+            }))
+            sys.exit(1)
+    return DeepfakeDetector
 
 def generate_mock_result(image_path, error_msg=None):
     """Generate realistic mock data when model fails"""
@@ -66,6 +77,254 @@ def generate_mock_result(image_path, error_msg=None):
         "status": "success"
     }
 
+def resolve_model_path(model_path=None):
+    """
+    Rezolvă modelul de folosit. Returnează None când trebuie încărcat ensemble-ul.
+    """
+    if model_path is not None:
+        return model_path
+    
+    # Prima dată caută modelele disponibile pentru ensemble
+    model_dir = os.path.join(current_dir, 'savedModel')
+    ensemble_models = [
+        os.path.join(model_dir, 'modelAvansat.keras'),
+        os.path.join(model_dir, 'model_xception.keras')
+    ]
+    
+    # Verifică dacă avem modele pentru ensemble
+    available_models = [path for path in ensemble_models if os.path.exists(path)]
+    
+    if len(available_models) >= 2:
+        print(f"Folosesc ensemble de {len(available_models)} modele pentru precizie îmbunătățită", file=sys.stderr)
+        # Nu setez model_path pentru a activa ensemble-ul
+        return None
+    elif len(available_models) == 1:
+        print(f"Folosesc model singular: {os.path.basename(available_models[0])}", file=sys.stderr)
+        return available_models[0]
+    
+    # Fallback la căutarea obișnuită
+    potential_model_paths = [
+        os.path.join(current_dir, 'savedModel', 'model_xception.keras'),
+        os.path.join(current_dir, 'savedModel', 'modelXception.keras'),
+        os.path.join(current_dir, 'savedModel', 'advanced_deepfake_model.keras'),
+        os.path.join(current_dir, 'models', 'model_xception.keras'),
+        os.path.join(current_dir, 'models', 'modelXception.keras'),
+        os.path.join(os.path.dirname(current_dir), 'deepfakeDetector', 'savedModel', 'model_xception.keras'),
+        os.path.join(os.path.dirname(current_dir), 'deepfakeDetector', 'savedModel', 'modelXception.keras'),
+        './savedModel/model_xception.keras',
+        './savedModel/modelXception.keras',
+        './models/model_xception.keras'
+    ]
+    
+    for candidate in potential_model_paths:
+        if os.path.exists(candidate):
+            print(f"Model găsit: {os.path.basename(candidate)}", file=sys.stderr)
+            return candidate
+    
+    return None
+
+def expected_model_paths(model_path=None, backend="keras"):
+    """
+    Fișierele de model pe care DeepfakeDetector le va încărca, fără a le încărca.
+    Cu un backend cuantizat sunt variantele TFLite, deci rezultatele lor au alte chei în cache.
+    """
+    if model_path and os.path.exists(model_path):
+        paths = [model_path]
+    else:
+        model_dir = os.path.join(current_dir, 'savedModel')
+        ensemble_models = [
+            os.path.join(model_dir, 'modelAvansat.keras'),
+            os.path.join(model_dir, 'model_xception.keras')
+        ]
+        paths = [path for path in ensemble_models if os.path.exists(path)]
+    
+    if backend == "keras":
+        return paths
+    from tfliteBackend import backend_model_paths
+    return backend_model_paths(paths, backend)
+
+def create_detector(model_path=None, input_shape=(299, 299, 3), use_train_model_architecture=False, backend="keras"):
+    """
+    Creează detectorul, cu model specific sau cu ensemble-ul de modele disponibile
+    """
+    profiler = get_profiler()
+    with profiler.stage("detector_import"):
+        DeepfakeDetector = load_detector_class()
+
+    # TensorFlow este importat (lazy) la prima utilizare, deci intră în model_load
+    with profiler.stage("model_load"):
+        if model_path and os.path.exists(model_path):
+            print(f"Inițializez cu model specific: {os.path.basename(model_path)}", file=sys.stderr)
+            return DeepfakeDetector(
+                modelPath=model_path, 
+                inputShape=input_shape, 
+                useTrainModelArchitecture=use_train_model_architecture,
+                backend=backend
+            )
+        
+        # Încearcă să creeze ensemble sau model nou
+        print("Inițializez detector cu ensemble de modele...", file=sys.stderr)
+        return DeepfakeDetector(
+            modelPath=None,  # Permite încărcarea ensemble-ului
+            inputShape=input_shape, 
+            useTrainModelArchitecture=use_train_model_architecture,
+            backend=backend
+        )
+
+def apply_heatmap_result(result, heatmap_result):
+    """Atașează rezultatul generării heatmap-ului la răspuns"""
+    if heatmap_result.get("status") == "success":
+        result["heatmapPath"] = heatmap_result["path"]
+        result["heatmapGenerated"] = True
+    else:
+        result["heatmapGenerated"] = False
+        result["heatmapError"] = heatmap_result.get("message", "Unknown error")
+    return result
+
+def attach_heatmap(detector, input_path, result):
+    """Generează heatmap-ul pentru imagine și atașează rezultatul la răspuns"""
+    # Generate heatmap if score is high enough
+    if result.get("fakeScore", 0) > 30:
+        try:
+            apply_heatmap_result(result, detector.generateHeatmap(input_path))
+        except Exception as heatmap_error:
+            result["heatmapGenerated"] = False
+            result["heatmapError"] = str(heatmap_error)
+    return result
+
+def finalize_result(result, detector, input_path, input_shape, image_size, model_path, start_time):
+    """Adaugă câmpurile standard pe care le așteaptă backend-ul Node"""
+    # Add processing time if not already present
+    if not result.get("processingTime"):
+        result["processingTime"] = round(time.time() - start_time, 3)
+    
+    # Add standard fields
+    if not result.get("analysisTime"):
+        result["analysisTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Enhanced model type detection
+    if hasattr(detector, 'ensemble_models') and len(detector.ensemble_models) > 1:
+        result["modelType"] = "ensemble_advanced"
+        result["modelsUsed"] = len(detector.ensemble_models)
+    elif detector.model_loaded:
+        result["modelType"] = "advanced"
+    else:
+        result["modelType"] = "basic"
+        
+    result["inputShape"] = input_shape
+    result["confidenceCalibrated"] = hasattr(detector, 'confidence_temperature') and detector.confidence_temperature != 1.0
+    result["ensembleUsed"] = hasattr(detector, 'ensemble_models') and len(detector.ensemble_models) > 1
+    
+    # Ensure clean JSON output - print only the JSON, nothing else
+    if "error" not in result:
+        result.setdefault("fileName", os.path.basename(input_path))
+        if "debugInfo" not in result:
+            result["debugInfo"] = {
+                "model_loaded": detector.model_loaded,
+                "input_shape": input_shape,
+                "model_path": model_path,
+                "script_version": "v2.0",
+                "image_size_used": image_size
+            }
+    
+    return result
+
+def analyze_input(detector, input_path, video=False, skip_frames=5, output_path=None,
+                  generate_heatmap=False, input_shape=(299, 299, 3), image_size=299, model_path=None,
+                  start_time=None, predictor=None, fused_heatmap=False, batch_size=16,
+                  sampling="stride", num_frames=None, time_budget=None, progress_callback=None, faces=False,
+                  detect_every=10, early_stop=False, early_stop_error=0.01, gate_threshold=None, gate_force_every=30,
+                  workers=None, frame_callback=None):
+    """
+    Rulează analiza pentru o imagine sau un video cu un detector deja încărcat.
+    Returnează exact rezultatul JSON pe care îl afișează CLI-ul.
+    predictor poate înlocui detector.predict (ex. MicroBatchScheduler).
+    fused_heatmap calculează predicția și Grad-CAM dintr-un singur pas, fără subprocess.
+    batch_size este numărul de cadre video evaluate într-un singur batch.
+    sampling / num_frames / time_budget aleg cadrele video analizate (vezi videoSampling).
+    progress_callback primește progresul video după fiecare batch (vezi jobQueue).
+    faces evaluează fețele decupate de YuNet într-un singur batch în locul întregii imagini;
+    pentru video, fețele sunt urmărite între cadre și YuNet rulează la fiecare al detect_every-lea cadru.
+    early_stop oprește analiza video când testul secvențial a stabilit verdictul (vezi earlyStopping).
+    gate_threshold refolosește rezultatul ultimului cadru evaluat pentru cadrele aproape identice (vezi frameGate).
+    workers > 1 împarte video-ul în segmente analizate de procese separate (vezi parallelVideo).
+    frame_callback primește fiecare rezultat per cadru video imediat ce este calculat (--stream).
+    """
+    start_time = start_time or time.time()
+    
+    parallel = video and workers and workers > 1
+    if parallel and (output_path or faces or early_stop or gate_threshold or time_budget or sampling != "stride"
+                     or frame_callback):
+        # Modurile care depind de ordinea cadrelor sau de întregul video rămân secvențiale
+        print("--workers se aplică doar analizei stride simple, rulez pipeline-ul secvențial", file=sys.stderr)
+        parallel = False
+    
+    if parallel:
+        from parallelVideo import analyze_parallel
+        result = analyze_parallel(detector, input_path, workers, skip_frames=skip_frames, batch_size=batch_size)
+    elif video:
+        result = detector.predictVideo(
+            input_path, 
+            skipFrames=skip_frames,
+            outputPath=output_path,
+            batchSize=batch_size,
+            sampling=sampling,
+            numFrames=num_frames,
+            timeBudget=time_budget,
+            progressCallback=progress_callback,
+            faces=faces,
+            detectEvery=detect_every,
+            earlyStop=early_stop,
+            earlyStopError=early_stop_error,
+            gateThreshold=gate_threshold,
+            gateForceEvery=gate_force_every,
+            frameCallback=frame_callback
+        )
+    elif generate_heatmap and fused_heatmap:
+        try:
+            result, heatmap_result = detector.predictWithHeatmap(input_path)
+            if heatmap_result is not None:
+                apply_heatmap_result(result, heatmap_result)
+        except Exception as heatmap_error:
+            # Revine la calea clasică: predicție + generator separat
+            print(f"Heatmap in-process eșuat, revin la generatorul separat: {heatmap_error}", file=sys.stderr)
+            result = detector.predict(input_path)
+            attach_heatmap(detector, input_path, result)
+    elif faces:
+        result = detector.predictFaces(input_path)
+        
+        if generate_heatmap:
+            attach_heatmap(detector, input_path, result)
+    else:
+        # Image processing
+        result = (predictor or detector).predict(input_path)
+        
+        if generate_heatmap:
+            attach_heatmap(detector, input_path, result)
+    
+    return finalize_result(result, detector, input_path, input_shape, image_size, model_path, start_time)
+
+def analysis_model_files(args):
+    """Fișierele care determină rezultatul CLI-ului: modelele și, cu --cascade, configurația și modelul ușor"""
+    paths = expected_model_paths(args.modelPath, args.backend)
+    if args.cascade:
+        from cascade import cascade_files
+        paths = paths + cascade_files(args.cascadeConfig)
+    return paths
+
+def write_frame_line(frame_result):
+    """--stream: o linie NDJSON per cadru video evaluat, trimisă imediat"""
+    sys.stdout.write(json.dumps({"type": "frame", **frame_result}, separators=(',', ':')) + "\n")
+    sys.stdout.flush()
+
+def write_result(result, stream=False):
+    """Rezultatul final pe stdout; cu --stream, ultima linie NDJSON (type: summary)"""
+    if stream:
+        sys.stdout.write(json.dumps({"type": "summary", **result}, separators=(',', ':')) + "\n")
+    else:
+        sys.stdout.write(json.dumps(result, separators=(',', ':')))
+    sys.stdout.flush()
+
 def main():
     parser = argparse.ArgumentParser(description='Detect deepfakes in images or videos')
     parser.add_argument('inputPath', help='Path to the image or video to analyze')
@@ -78,95 +337,157 @@ def main():
     parser.add_argument('--video', action='store_true', help='Process input as video')
     parser.add_argument('--skipFrames', type=int, default=5, help='Process every Nth frame (video only)')
     parser.add_argument('--output', help='Path to save the output video (video only)')
+    parser.add_argument('--batchSize', type=int, default=16, help='Sampled frames per inference batch (video only)')
+    parser.add_argument('--workers', type=int, default=None,
+                      help='Analyze video segments in this many worker processes, each loading its own models (stride sampling only)')
+    parser.add_argument('--sampling', choices=['stride', 'uniform', 'budget'], default='stride',
+                      help='Frame sampling: every Nth frame, N evenly spaced frames via seek, or progressive until --timeBudget (video only)')
+    parser.add_argument('--numFrames', type=int, default=32, help='Frames to analyze with --sampling uniform')
+    parser.add_argument('--timeBudget', type=float, default=None, help='Stop video analysis after this many seconds of processing')
+    parser.add_argument('--earlyStop', action='store_true',
+                      help='Stop the video once a sequential test (SPRT) has settled the verdict; best with --sampling budget')
+    parser.add_argument('--earlyStopError', type=float, default=0.01, help='Error rate allowed for each wrong verdict with --earlyStop')
+    parser.add_argument('--frameGate', action='store_true',
+                      help='Reuse the last scored frame result for nearly identical frames (video and realtime)')
+    parser.add_argument('--gateThreshold', type=float, default=0.015, help='Mean absolute difference (0-1, 64x36 thumbnail) below which a frame is reused')
+    parser.add_argument('--gateForceEvery', type=int, default=30, help='Force a re-score after this many consecutive reused frames (0 = never)')
     parser.add_argument('--realtime', action='store_true', help='Process realtime camera input')
     parser.add_argument('--cameraId', type=int, default=0, help='Camera ID for realtime processing')
     parser.add_argument('--maxFrames', type=int, default=100, help='Maximum frames to process in realtime mode')
+    parser.add_argument('--source', default=None,
+                      help='Realtime source: camera index or a video file played at its own FPS (default: --cameraId)')
+    parser.add_argument('--noDisplay', action='store_true', help='Do not open a preview window in realtime mode')
     parser.add_argument('--generateHeatmap', action='store_true', help='Generate heatmap visualization')
+    parser.add_argument('--inProcessHeatmap', action='store_true', help='Compute prediction and Grad-CAM in one pass, without a heatmap subprocess')
     parser.add_argument('--useTrainModelArchitecture', action='store_true', help='Use EfficientNet architecture from trainModel.py')
     parser.add_argument('--calibrateConfidence', help='Path to validation data for confidence calibration')
+    parser.add_argument('--noCache', action='store_true', help='Always run the models, ignoring cached results')
+    parser.add_argument('--cacheDir', default=None, help='Directory of the result cache database')
+    parser.add_argument('--perceptualIndex', action='store_true',
+                      help='Reuse results of near-duplicate images / video frames found by perceptual hash')
+    parser.add_argument('--maxHammingDistance', type=int, default=4, help='Maximum perceptual hash distance (of 64 bits) for a near-duplicate')
+    parser.add_argument('--hashMethod', choices=['phash', 'dhash'], default='phash', help='Perceptual hash used by --perceptualIndex')
+    parser.add_argument('--backend', choices=['keras', 'float16', 'int8'], default='keras',
+                      help='Inference backend: the Keras models or their TFLite variants from quantizeModel.py (no MC dropout / in-process Grad-CAM)')
+    parser.add_argument('--cascade', action='store_true',
+                      help='Score with the light model first; only uncertain inputs go to the full ensemble (band from tuneCascade.py)')
+    parser.add_argument('--cascadeConfig', default=None, help='Cascade config written by tuneCascade.py (default: savedModel/cascade_config.json)')
+    parser.add_argument('--faces', action='store_true',
+                      help='Score each YuNet face crop (one batched ensemble call) and aggregate, instead of the whole frame; videos get per-face tracks')
+    parser.add_argument('--detectEvery', type=int, default=10, help='Run YuNet every Nth sampled frame and track faces in between (video with --faces)')
+    parser.add_argument('--stream', action='store_true',
+                      help='Write one NDJSON line per analyzed video frame as it is scored, then a final summary line (video only, bypasses the cache)')
+    parser.add_argument('--profileStartup', action='store_true',
+                      help='Report per-module import time and model load time as JSON on stderr')
     
     args = parser.parse_args()
+    # Rezultatele per cadru nu sunt păstrate în memorie: sunt scrise pe măsură ce sunt calculate
+    stream = args.stream and args.video and not args.realtime
     
     # Check if input file exists
     if not args.realtime and not os.path.exists(args.inputPath):
         result = {"error": f"Input file not found: {args.inputPath}"}
-        print(json.dumps(result))
+        if stream:
+            write_result(result, stream)
+        else:
+            print(json.dumps(result))
         sys.exit(1)
     
     # Determine image size
     image_size = args.imageSize or args.input_size or 299
     input_shape = (image_size, image_size, 3)
     
+    start_time = time.time()
+    
     # Find model path if not provided - prioritize ensemble approach
-    if args.modelPath is None:
-        # Prima dată caută modelele disponibile pentru ensemble
-        model_dir = os.path.join(current_dir, 'savedModel')
-        ensemble_models = [
-            os.path.join(model_dir, 'modelAvansat.keras'),
-            os.path.join(model_dir, 'model_xception.keras')
-        ]
-        
-        # Verifică dacă avem modele pentru ensemble
-        available_models = [path for path in ensemble_models if os.path.exists(path)]
-        
-        if len(available_models) >= 2:
-            print(f"Folosesc ensemble de {len(available_models)} modele pentru precizie îmbunătățită", file=sys.stderr)
-            # Nu setez args.modelPath pentru a activa ensemble-ul
-        elif len(available_models) == 1:
-            args.modelPath = available_models[0]
-            print(f"Folosesc model singular: {os.path.basename(args.modelPath)}", file=sys.stderr)
-        else:
-            # Fallback la căutarea obișnuită
-            potential_model_paths = [
-                os.path.join(current_dir, 'savedModel', 'model_xception.keras'),
-                os.path.join(current_dir, 'savedModel', 'modelXception.keras'),
-                os.path.join(current_dir, 'savedModel', 'advanced_deepfake_model.keras'),
-                os.path.join(current_dir, 'models', 'model_xception.keras'),
-                os.path.join(current_dir, 'models', 'modelXception.keras'),
-                os.path.join(os.path.dirname(current_dir), 'deepfakeDetector', 'savedModel', 'model_xception.keras'),
-                os.path.join(os.path.dirname(current_dir), 'deepfakeDetector', 'savedModel', 'modelXception.keras'),
-                './savedModel/model_xception.keras',
-                './savedModel/modelXception.keras',
-                './models/model_xception.keras'
-            ]
-            
-            for model_path in potential_model_paths:
-                if os.path.exists(model_path):
-                    args.modelPath = model_path
-                    print(f"Model găsit: {os.path.basename(args.modelPath)}", file=sys.stderr)
-                    break
+    args.modelPath = resolve_model_path(args.modelPath)
+    
+    # Același fișier analizat cu aceleași modele și parametri: răspunde din cache, fără a încărca modelele
+    # (calibrarea modifică încrederea, iar --stream are nevoie de cadrele calculate, deci ocolesc cache-ul)
+    cache, cache_context = None, None
+    if not args.realtime and not args.calibrateConfidence and not stream:
+        cache = open_cache(args.cacheDir, enabled=not args.noCache)
+    if cache is not None:
+        try:
+            cache_params = {
+                "video": args.video,
+                "imageSize": image_size,
+                "useTrainModelArchitecture": args.useTrainModelArchitecture,
+                "generateHeatmap": args.generateHeatmap,
+                "inProcessHeatmap": args.inProcessHeatmap,
+                "cascade": args.cascade,
+                "faces": args.faces
+            }
+            if args.video:
+                cache_params.update({
+                    "skipFrames": args.skipFrames,
+                    "output": os.path.abspath(args.output) if args.output else None,
+                    "batchSize": args.batchSize,
+                    "sampling": args.sampling,
+                    "numFrames": args.numFrames,
+                    "timeBudget": args.timeBudget,
+                    "detectEvery": args.detectEvery if args.faces else None,
+                    "earlyStopError": args.earlyStopError if args.earlyStop else None,
+                    "frameGate": [args.gateThreshold, args.gateForceEvery] if args.frameGate else None,
+                    "workers": args.workers,
+                    # Cadrele pot refolosi scoruri din index, deci rezultatul depinde de setările lui
+                    "perceptualIndex": [args.hashMethod, args.maxHammingDistance] if args.perceptualIndex else None
+                })
+            cached, cache_context = cache.lookup(
+                args.inputPath, "deepfakeDetector", analysis_model_files(args), params=cache_params
+            )
+            if cached is not None:
+                cached["processingTime"] = round(time.time() - start_time, 3)
+                sys.stdout.write(json.dumps(cached, separators=(',', ':')))
+                sys.stdout.flush()
+                return
+        except Exception as cache_error:
+            print(f"Cache indisponibil pentru această analiză: {cache_error}", file=sys.stderr)
+            cache_context = None
+    
+    # Aproape-duplicat (redimensionat, recomprimat) al unei imagini deja analizate
+    perceptual_index, model_view = None, None
+    if args.perceptualIndex and not args.realtime and not args.calibrateConfidence:
+        # Indexul aduce cv2 și numpy; fără --perceptualIndex nu sunt importate până la model
+        from perceptualIndex import open_index, load_model_view, mark_reused
+        perceptual_index = open_index(
+            analysis_model_files(args), index_dir=args.cacheDir,
+            max_distance=args.maxHammingDistance, method=args.hashMethod
+        )
+    if perceptual_index is not None and not args.video and not args.generateHeatmap and not args.faces:
+        try:
+            model_view = load_model_view(args.inputPath, image_size)
+            if model_view is not None:
+                reused, distance = perceptual_index.lookup(model_view)
+                if reused is not None:
+                    # Rezultatul împrumutat nu intră în cache-ul exact: cheia lui nu conține setările indexului
+                    result = mark_reused(reused, distance, args.inputPath, start_time, perceptual_index)
+                    sys.stdout.write(json.dumps(result, separators=(',', ':')))
+                    sys.stdout.flush()
+                    return
+        except Exception as index_error:
+            print(f"Căutarea în indexul perceptual a eșuat: {index_error}", file=sys.stderr)
+            model_view = None
     
     # Initialize detector with enhanced ensemble support
     try:
-        start_time = time.time()
-        
-        # Folosește ensemble dacă nu e specificat un model anume
-        if args.modelPath and os.path.exists(args.modelPath):
-            print(f"Inițializez cu model specific: {os.path.basename(args.modelPath)}", file=sys.stderr)
-            detector = DeepfakeDetector(
-                modelPath=args.modelPath, 
-                inputShape=input_shape, 
-                useTrainModelArchitecture=args.useTrainModelArchitecture
-            )
-        else:
-            # Încearcă să creeze ensemble sau model nou
-            print("Inițializez detector cu ensemble de modele...", file=sys.stderr)
-            detector = DeepfakeDetector(
-                modelPath=None,  # Permite încărcarea ensemble-ului
-                inputShape=input_shape, 
-                useTrainModelArchitecture=args.useTrainModelArchitecture
-            )
-            try:
-                detector = DeepfakeDetector(
-                    modelPath=None, 
-                    inputShape=input_shape, 
-                    useTrainModelArchitecture=args.useTrainModelArchitecture
-                )
-            except Exception as model_error:
-                # If model creation fails, return mock data
-                result = generate_mock_result(args.inputPath, f"Model creation failed: {str(model_error)}")
+        try:
+            detector = create_detector(args.modelPath, input_shape, args.useTrainModelArchitecture, args.backend)
+        except Exception as model_error:
+            # If model creation fails, return mock data
+            result = generate_mock_result(args.inputPath, f"Model creation failed: {str(model_error)}")
+            if stream:
+                write_result(result, stream)
+            else:
                 print(json.dumps(result))
-                sys.exit(0)
+            sys.exit(0)
+        
+        if args.cascade:
+            detector.enableCascade(args.cascadeConfig)
+        
+        # Cadrele video eșantionate sunt căutate și adăugate în index de pipeline
+        if perceptual_index is not None and args.video:
+            detector.perceptual_index = perceptual_index
         
         # Calibrate confidence if validation data provided
         if args.calibrateConfidence and os.path.exists(args.calibrateConfidence):
@@ -176,76 +497,59 @@ def main():
         if args.realtime:
             result = detector.predictRealtime(
                 cameraId=args.cameraId,
-                displayOutput=True,
-                maxFrames=args.maxFrames
-            )
-        elif args.video:
-            result = detector.predictVideo(
-                args.inputPath, 
-                skipFrames=args.skipFrames,
-                outputPath=args.output
+                displayOutput=not args.noDisplay,
+                maxFrames=args.maxFrames,
+                source=args.source,
+                gateThreshold=args.gateThreshold if args.frameGate else None,
+                gateForceEvery=args.gateForceEvery
             )
+            result = finalize_result(result, detector, args.inputPath, input_shape, image_size, args.modelPath, start_time)
         else:
-            # Image processing
-            result = detector.predict(args.inputPath)
-            
-            # Generate heatmap if requested and score is high enough
-            if args.generateHeatmap and result.get("fakeScore", 0) > 30:
-                try:
-                    heatmap_result = detector.generateHeatmap(args.inputPath)
-                    if heatmap_result.get("status") == "success":
-                        result["heatmapPath"] = heatmap_result["path"]
-                        result["heatmapGenerated"] = True
-                    else:
-                        result["heatmapGenerated"] = False
-                        result["heatmapError"] = heatmap_result.get("message", "Unknown error")
-                except Exception as heatmap_error:
-                    result["heatmapGenerated"] = False
-                    result["heatmapError"] = str(heatmap_error)
-        
-        # Add processing time if not already present
-        if not result.get("processingTime"):
-            result["processingTime"] = round(time.time() - start_time, 3)
-        
-        # Add standard fields
-        if not result.get("analysisTime"):
-            result["analysisTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            with get_profiler().stage("analysis"):
+                result = analyze_input(
+                    detector,
+                    args.inputPath,
+                    video=args.video,
+                    skip_frames=args.skipFrames,
+                    output_path=args.output,
+                    batch_size=args.batchSize,
+                    sampling=args.sampling,
+                    num_frames=args.numFrames,
+                    time_budget=args.timeBudget,
+                    generate_heatmap=args.generateHeatmap,
+                    fused_heatmap=args.inProcessHeatmap,
+                    input_shape=input_shape,
+                    image_size=image_size,
+                    model_path=args.modelPath,
+                    start_time=start_time,
+                    faces=args.faces,
+                    detect_every=args.detectEvery,
+                    early_stop=args.earlyStop,
+                    early_stop_error=args.earlyStopError,
+                    gate_threshold=args.gateThreshold if args.frameGate else None,
+                    gate_force_every=args.gateForceEvery,
+                    workers=args.workers,
+                    frame_callback=write_frame_line if stream else None
+                )
         
-        # Enhanced model type detection
-        if hasattr(detector, 'ensemble_models') and len(detector.ensemble_models) > 1:
-            result["modelType"] = "ensemble_advanced"
-            result["modelsUsed"] = len(detector.ensemble_models)
-        elif detector.model_loaded:
-            result["modelType"] = "advanced"
-        else:
-            result["modelType"] = "basic"
-            
-        result["inputShape"] = input_shape
-        result["confidenceCalibrated"] = hasattr(detector, 'confidence_temperature') and detector.confidence_temperature != 1.0
-        result["ensembleUsed"] = hasattr(detector, 'ensemble_models') and len(detector.ensemble_models) > 1
+        if perceptual_index is not None and model_view is not None:
+            perceptual_index.add(model_view, result, source=args.inputPath)
+            result.setdefault("debugInfo", {})["perceptualIndex"] = perceptual_index.stats()
         
-        # Ensure clean JSON output - print only the JSON, nothing else
-        if "error" not in result:
-            result.setdefault("fileName", os.path.basename(args.inputPath))
-            if "debugInfo" not in result:
-                result["debugInfo"] = {
-                    "model_loaded": detector.model_loaded,
-                    "input_shape": input_shape,
-                    "model_path": args.modelPath,
-                    "script_version": "v2.0",
-                    "image_size_used": image_size
-                }
+        if cache is not None and cache_context is not None:
+            try:
+                cache.store(cache_context, result)
+            except Exception as cache_error:
+                print(f"Nu am putut salva rezultatul în cache: {cache_error}", file=sys.stderr)
         
-        # Output only JSON, no extra text or newlines
-        sys.stdout.write(json.dumps(result, separators=(',', ':')))
-        sys.stdout.flush()
+        # Output only JSON, no extra text or newlines (cu --stream, linia de sumar)
+        write_result(result, stream)
         
     except Exception as e:
         # Fallback to mock data on any error
         try:
             result = generate_mock_result(args.inputPath, f"Processing error: {str(e)}")
-            sys.stdout.write(json.dumps(result, separators=(',', ':')))
-            sys.stdout.flush()
+            write_result(result, stream)
         except Exception as mock_error:
             # Last resort error response
             error_result = {
@@ -258,9 +562,8 @@ def main():
                     "mock_fallback_failed": str(mock_error)
                 }
             }
-            sys.stdout.write(json.dumps(error_result, separators=(',', ':')))
-            sys.stdout.flush()
+            write_result(error_result, stream)
             sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
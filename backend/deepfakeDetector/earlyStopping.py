@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Oprire timpurie a analizei video cu un test secvențial (SPRT Wald)
+Verdictul video este "fals" când peste jumătate din cadrele evaluate sunt marcate ca deepfake.
+Testul compară două ipoteze despre fracția p de cadre marcate:
+    H_real: p = 0.5 - margin      H_fake: p = 0.5 + margin
+și se oprește când raportul de verosimilitate cumulat trece de una din limitele Wald, date de
+ratele de eroare alpha (fals pozitiv) și beta (fals negativ).
+
+Cadrele consecutive sunt corelate, deci testul cere un număr minim de cadre înainte de a decide;
+cu eșantionarea "budget" (ordine progresivă) primele cadre acoperă deja tot video-ul.
+"""
+
+import math
+
+class SequentialVerdict:
+    def __init__(self, alpha=0.01, beta=0.01, margin=0.2, min_frames=16):
+        """
+        Args:
+            alpha: probabilitatea acceptată de a declara fals un video real
+            beta: probabilitatea acceptată de a declara real un video fals
+            margin: distanța ipotezelor față de pragul de 50% al verdictului
+            min_frames: cadre evaluate înainte ca testul să poată opri analiza
+        """
+        if not 0 < margin < 0.5:
+            raise ValueError(f"Invalid SPRT margin: {margin}")
+
+        p_fake, p_real = 0.5 + margin, 0.5 - margin
+        self.alpha = alpha
+        self.beta = beta
+        self.margin = margin
+        self.min_frames = max(1, int(min_frames))
+        self._fake_step = math.log(p_fake / p_real)
+        self._real_step = math.log((1 - p_fake) / (1 - p_real))
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.llr = 0.0
+        self.frames = 0
+        self.decision = None
+
+    def update(self, flags):
+        """
+        Adaugă verdictele isDeepfake ale cadrelor noi.
+        Returnează "fake" sau "real" când verdictul este stabilit statistic, altfel None.
+        """
+        for flag in flags:
+            self.llr += self._fake_step if flag else self._real_step
+            self.frames += 1
+
+        if self.decision is None and self.frames >= self.min_frames:
+            if self.llr >= self.upper:
+                self.decision = "fake"
+            elif self.llr <= self.lower:
+                self.decision = "real"
+        return self.decision
+
+    def state(self):
+        return {
+            "test": "sprt",
+            "alpha": self.alpha,
+            "beta": self.beta,
+            "margin": self.margin,
+            "minFrames": self.min_frames,
+            "logLikelihoodRatio": round(self.llr, 3),
+            "bounds": [round(self.lower, 3), round(self.upper, 3)],
+            "decision": self.decision
+        }
@@ -7,36 +7,45 @@ Specifically highlights artifacts in red with improved visualization
 
 import os
 import sys
+
+from lazyImports import start_profiler, get_profiler, lazy_import
+start_profiler()
+
 import json
 import numpy as np
 import cv2
-import tensorflow as tf
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
 from datetime import datetime
 import logging
 from pathlib import Path
 
+from gradcamEngine import get_gradcam_engine
+from modelLoader import load_inference_model
+
+tf = lazy_import("tensorflow")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class EnhancedRedHeatmapGenerator:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, model=None):
         """
         Initialize Enhanced Red Heatmap Generator
         
         Args:
             model_path (str): Path to the trained model
+            model: Already loaded Keras model (skips loading from disk)
         """
-        self.model = None
-        self.model_path = model_path or self._find_best_model()
+        self.model = model
+        self.model_path = model_path if model is not None else (model_path or self._find_best_model())
         self.version = "3.0.0-enhanced-red"
-        self.load_model()
+        if self.model is None:
+            self.load_model()
         
         logger.info(f"Enhanced Red Heatmap Generator v{self.version} initialized")
     
-    def _find_best_model(self):
+    @staticmethod
+    def _find_best_model():
         """Find the best available model"""
         current_dir = os.path.dirname(os.path.abspath(__file__))
         possible_paths = [
@@ -61,7 +70,7 @@ class EnhancedRedHeatmapGenerator:
                 raise FileNotFoundError(f"Model not found at {self.model_path}")
             
             logger.info(f"Loading model from {self.model_path}")
-            self.model = tf.keras.models.load_model(self.model_path)
+            self.model = load_inference_model(self.model_path)
             logger.info("Model loaded successfully")
             
         except Exception as e:
@@ -94,11 +103,7 @@ class EnhancedRedHeatmapGenerator:
                 raise ValueError(f"Could not load image from {image_path}")
             
             original_img = img.copy()
-            
-            # Resize to model input size (assuming 299x299 for Xception)
-            img_resized = cv2.resize(img, (299, 299))
-            img_normalized = img_resized.astype(np.float32) / 255.0
-            img_batch = np.expand_dims(img_normalized, axis=0)
+            img_batch, img_resized = self.preprocess_array(img)
             
             return img_batch, original_img, img_resized
             
@@ -106,138 +111,50 @@ class EnhancedRedHeatmapGenerator:
             logger.error(f"Error preprocessing image: {str(e)}")
             raise e
     
+    @staticmethod
+    def preprocess_array(img):
+        """Preprocess an already decoded BGR image (same input as preprocess_image)"""
+        # Resize to model input size (assuming 299x299 for Xception)
+        img_resized = cv2.resize(img, (299, 299))
+        img_normalized = img_resized.astype(np.float32) / 255.0
+        img_batch = np.expand_dims(img_normalized, axis=0)
+        
+        return img_batch, img_resized
+    
     def generate_gradcam_enhanced(self, img_batch, original_img):
         """Generate enhanced GradCAM heatmap with red emphasis"""
         try:
-            # Strategii multiple pentru găsirea straturilor convoluționale
-            last_conv_layer = None
-            
-            # Strategi 1: Caută ultimul strat convoluțional
-            for layer in reversed(self.model.layers):
-                if isinstance(layer, tf.keras.layers.Conv2D):
-                    last_conv_layer = layer.name
-                    break
-            
-            # Strategia 2: Caută după nume care conțin 'conv'
-            if not last_conv_layer:
-                for layer in reversed(self.model.layers):
-                    if 'conv' in layer.name.lower():
-                        last_conv_layer = layer.name
-                        break
-            
-            # Strategia 3: Caută straturile cu 4D output (probabil convoluționale)
-            if not last_conv_layer:
-                for layer in reversed(self.model.layers):
-                    try:
-                        if hasattr(layer, 'output_shape') and layer.output_shape:
-                            if len(layer.output_shape) == 4:  # Batch, Height, Width, Channels
-                                last_conv_layer = layer.name
-                                logger.info(f"Found 4D layer (likely conv): {layer.name} with shape {layer.output_shape}")
-                                break
-                    except:
-                        continue
-            
-            # Strategia 4: Încearcă cu penultimul strat dacă ultimul nu merge
-            if not last_conv_layer:
-                try:
-                    # Încearcă cu al doilea strat de la sfârșit
-                    if len(self.model.layers) >= 2:
-                        candidate_layer = self.model.layers[-2]
-                        if hasattr(candidate_layer, 'output_shape'):
-                            last_conv_layer = candidate_layer.name
-                            logger.info(f"Using second-to-last layer: {last_conv_layer}")
-                except:
-                    pass
-            
-            # Strategia 5: Listează toate straturile și găsește cel mai potrivit
-            if not last_conv_layer:
-                logger.info("Listing all model layers:")
-                for i, layer in enumerate(self.model.layers):
-                    logger.info(f"Layer {i}: {layer.name} - {type(layer).__name__} - {getattr(layer, 'output_shape', 'No shape')}")
-                
-                # Încearcă cu orice strat care nu este Dense sau Dropout
-                for layer in reversed(self.model.layers):
-                    if not isinstance(layer, (tf.keras.layers.Dense, tf.keras.layers.Dropout, 
-                                            tf.keras.layers.Flatten, tf.keras.layers.GlobalAveragePooling2D)):
-                        last_conv_layer = layer.name
-                        logger.info(f"Using non-dense layer: {last_conv_layer}")
-                        break
-            
-            if not last_conv_layer:
-                # Ultima încercare - folosește orice strat care nu este ultimul
-                if len(self.model.layers) > 1:
-                    last_conv_layer = self.model.layers[-2].name
-                    logger.warning(f"Using fallback layer: {last_conv_layer}")
-                else:
-                    raise ValueError("No suitable layer found for GradCAM")
-            
-            logger.info(f"Using layer for GradCAM: {last_conv_layer}")
-            
-            # Creează GradCAM model
-            try:
-                grad_model = tf.keras.models.Model(
-                    inputs=[self.model.inputs],
-                    outputs=[self.model.get_layer(last_conv_layer).output, self.model.output]
-                )
-            except Exception as model_error:
-                logger.error(f"Error creating grad model with layer {last_conv_layer}: {model_error}")
-                # Încearcă cu un alt strat
-                for layer in reversed(self.model.layers[:-1]):  # Exclude ultimul strat
-                    try:
-                        grad_model = tf.keras.models.Model(
-                            inputs=[self.model.inputs],
-                            outputs=[layer.output, self.model.output]
-                        )
-                        last_conv_layer = layer.name
-                        logger.info(f"Successfully created model with layer: {last_conv_layer}")
-                        break
-                    except:
-                        continue
-                else:
-                    raise ValueError("Could not create gradient model with any layer")
-            
-            # Calculează gradienții
-            with tf.GradientTape() as tape:
-                conv_outputs, predictions = grad_model(img_batch)
-                # Focus pe predicția deepfake
-                if len(predictions.shape) == 2 and predictions.shape[-1] == 1:
-                    deepfake_score = predictions[:, 0]
-                elif len(predictions.shape) == 2 and predictions.shape[-1] > 1:
-                    deepfake_score = predictions[:, -1]  # Ultimul output
-                else:
-                    deepfake_score = tf.reduce_mean(predictions)
+            # Stratul țintă și modelul de gradient sunt rezolvate o singură dată per model
+            engine = get_gradcam_engine(self.model)
+            logger.info(f"Using layer for GradCAM: {engine.layer_name}")
             
-            # Obține gradienții
-            grads = tape.gradient(deepfake_score, conv_outputs)
+            # Focus pe predicția deepfake (ultimul output pentru modele cu mai multe clase)
+            output_shape = self.model.output_shape
+            class_index = output_shape[-1] - 1 if isinstance(output_shape, tuple) and output_shape[-1] else 0
+            outputs = engine.run(img_batch, class_index)
+            deepfake_score = outputs["target"]
             
-            if grads is None:
+            if "grads" not in outputs:
                 logger.warning("Gradients are None, using alternative approach")
                 # Abordare alternativă fără gradienți
-                conv_outputs_np = conv_outputs.numpy()[0]
+                conv_outputs_np = outputs["conv_outputs"].numpy()[0]
                 if len(conv_outputs_np.shape) == 3:  # H, W, C
                     heatmap = np.mean(conv_outputs_np, axis=-1)
                 else:
                     heatmap = np.random.random((50, 50))  # Fallback
                 return heatmap, deepfake_score.numpy()[0]
             
-            # Procesează gradienții
-            if len(grads.shape) == 4:  # Batch, H, W, C
-                pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-                conv_outputs = conv_outputs[0]
-                heatmap = conv_outputs @ pooled_grads[..., tf.newaxis]
-                heatmap = tf.squeeze(heatmap)
+            if "heatmap" in outputs:
+                heatmap_np = outputs["heatmap"].numpy()[0]
             else:
-                # Abordare simplificată
-                pooled_grads = tf.reduce_mean(grads, axis=0)
-                heatmap = tf.reduce_mean(conv_outputs[0], axis=-1)
-            
-            # Normalizează heatmap
-            heatmap = tf.maximum(heatmap, 0)
-            if tf.reduce_max(heatmap) > 0:
-                heatmap = heatmap / tf.reduce_max(heatmap)
+                # Abordare simplificată pentru straturi care nu sunt 4D
+                heatmap = tf.reduce_mean(outputs["conv_outputs"][0], axis=-1)
+                heatmap = tf.maximum(heatmap, 0)
+                if tf.reduce_max(heatmap) > 0:
+                    heatmap = heatmap / tf.reduce_max(heatmap)
+                heatmap_np = heatmap.numpy()
             
             # Ensure heatmap is 2D
-            heatmap_np = heatmap.numpy()
             if heatmap_np.ndim == 0:  # Scalar
                 logger.warning("Heatmap is scalar, creating synthetic heatmap")
                 h, w = original_img.shape[:2]
@@ -400,6 +317,44 @@ class EnhancedRedHeatmapGenerator:
             logger.warning(f"Could not add legend: {str(e)}")
             return img
     
+    def render_heatmap(self, heatmap, original_img, output_path, deepfake_score, add_legend=True):
+        """Create the red overlay for an already computed heatmap, save it and return the statistics"""
+        # Create enhanced red overlay
+        result_img, heatmap_norm = self.create_enhanced_red_overlay(heatmap, original_img)
+        
+        # Check if overlay creation failed
+        if result_img is None or heatmap_norm is None:
+            logger.error("Failed to create enhanced red overlay")
+            return {
+                "status": "error", 
+                "message": "Failed to create enhanced red overlay",
+                "heatmap_type": "enhanced_red"
+            }
+        
+        # Add legend if requested
+        if add_legend:
+            result_img = self.add_intensity_legend(result_img)
+        
+        # Save result
+        cv2.imwrite(output_path, result_img)
+        logger.info(f"Enhanced heatmap saved to: {output_path}")
+        
+        # Calculate statistics
+        high_intensity_pixels = np.sum(heatmap_norm > 0.7)
+        total_pixels = heatmap_norm.size
+        artifact_coverage = (high_intensity_pixels / total_pixels) * 100
+        
+        return {
+            "status": "success",
+            "output_path": output_path,
+            "deepfake_score": float(deepfake_score),
+            "artifact_coverage_percent": round(artifact_coverage, 2),
+            "high_intensity_pixels": int(high_intensity_pixels),
+            "total_pixels": int(total_pixels),
+            "heatmap_type": "enhanced_red",
+            "version": self.version
+        }
+    
     def generate_enhanced_heatmap(self, image_path, output_path=None, add_legend=True):
         """Generate enhanced red heatmap for deepfake detection"""
         try:
@@ -411,22 +366,6 @@ class EnhancedRedHeatmapGenerator:
             # Generate GradCAM
             heatmap, deepfake_score = self.generate_gradcam_enhanced(img_batch, original_img)
             
-            # Create enhanced red overlay
-            result_img, heatmap_norm = self.create_enhanced_red_overlay(heatmap, original_img)
-            
-            # Check if overlay creation failed
-            if result_img is None or heatmap_norm is None:
-                logger.error("Failed to create enhanced red overlay")
-                return {
-                    "status": "error", 
-                    "message": "Failed to create enhanced red overlay",
-                    "heatmap_type": "enhanced_red"
-                }
-            
-            # Add legend if requested
-            if add_legend:
-                result_img = self.add_intensity_legend(result_img)
-            
             # Generate output path if not provided
             if output_path is None:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -434,25 +373,7 @@ class EnhancedRedHeatmapGenerator:
                 output_dir = os.path.dirname(image_path)
                 output_path = os.path.join(output_dir, f"{base_name}_enhanced_red_heatmap_{timestamp}.jpg")
             
-            # Save result
-            cv2.imwrite(output_path, result_img)
-            logger.info(f"Enhanced heatmap saved to: {output_path}")
-            
-            # Calculate statistics
-            high_intensity_pixels = np.sum(heatmap_norm > 0.7)
-            total_pixels = heatmap_norm.size
-            artifact_coverage = (high_intensity_pixels / total_pixels) * 100
-            
-            return {
-                "status": "success",
-                "output_path": output_path,
-                "deepfake_score": float(deepfake_score),
-                "artifact_coverage_percent": round(artifact_coverage, 2),
-                "high_intensity_pixels": int(high_intensity_pixels),
-                "total_pixels": int(total_pixels),
-                "heatmap_type": "enhanced_red",
-                "version": self.version
-            }
+            return self.render_heatmap(heatmap, original_img, output_path, deepfake_score, add_legend)
             
         except Exception as e:
             logger.error(f"Error generating enhanced heatmap: {str(e)}")
@@ -471,16 +392,19 @@ def main():
     parser.add_argument('--output', help='Output path for heatmap')
     parser.add_argument('--model', help='Path to model file')
     parser.add_argument('--no-legend', action='store_true', help='Disable legend')
+    parser.add_argument('--profileStartup', action='store_true', help='Report per-module import time and model load time as JSON on stderr')
     
     args = parser.parse_args()
     
     try:
-        generator = EnhancedRedHeatmapGenerator(args.model)
-        result = generator.generate_enhanced_heatmap(
-            args.image_path, 
-            args.output, 
-            add_legend=not args.no_legend
-        )
+        with get_profiler().stage("model_load"):
+            generator = EnhancedRedHeatmapGenerator(args.model)
+        with get_profiler().stage("heatmap"):
+            result = generator.generate_enhanced_heatmap(
+                args.image_path, 
+                args.output, 
+                add_legend=not args.no_legend
+            )
         
         print(json.dumps(result, indent=2))
         
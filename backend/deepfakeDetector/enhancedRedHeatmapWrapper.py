@@ -7,22 +7,31 @@ Integrează noul generator în sistemul existent
 
 import os
 import sys
-import json
-import argparse
-from pathlib import Path
 
 # Adaugă directorul curent în path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-try:
-    from enhancedRedHeatmapGenerator import EnhancedRedHeatmapGenerator
-except ImportError as e:
-    print(json.dumps({
-        "status": "error",
-        "message": f"Could not import EnhancedRedHeatmapGenerator: {str(e)}"
-    }))
-    sys.exit(1)
+from lazyImports import start_profiler, get_profiler
+start_profiler()
+
+import json
+import argparse
+from pathlib import Path
+
+from resultCache import open_cache, copy_cached_heatmap
+
+def load_generator_class():
+    """Importă generatorul (și TensorFlow) doar când rezultatul nu este în cache"""
+    try:
+        from enhancedRedHeatmapGenerator import EnhancedRedHeatmapGenerator
+    except ImportError as e:
+        print(json.dumps({
+            "status": "error",
+            "message": f"Could not import EnhancedRedHeatmapGenerator: {str(e)}"
+        }))
+        sys.exit(1)
+    return EnhancedRedHeatmapGenerator
 
 def main():
     parser = argparse.ArgumentParser(description='Enhanced Red Heatmap Generator Wrapper')
@@ -35,6 +44,9 @@ def main():
     parser.add_argument('--no-legend', action='store_true', help='Disable legend')
     parser.add_argument('--format', default='json', choices=['json', 'simple'], 
                        help='Output format')
+    parser.add_argument('--no-cache', action='store_true', help='Always regenerate, ignoring cached heatmaps')
+    parser.add_argument('--cache-dir', help='Directory of the result cache database')
+    parser.add_argument('--profileStartup', action='store_true', help='Report per-module import time and model load time as JSON on stderr')
     
     args = parser.parse_args()
     
@@ -48,15 +60,37 @@ def main():
         if Path(args.image_path).suffix.lower() not in valid_extensions:
             raise ValueError(f"Unsupported image format. Supported: {', '.join(valid_extensions)}")
         
-        # Inițializează generatorul
-        generator = EnhancedRedHeatmapGenerator(args.model)
+        profiler = get_profiler()
+        with profiler.stage("generator_import"):
+            EnhancedRedHeatmapGenerator = load_generator_class()
+        
+        # Aceeași imagine cu același model: heatmap-ul din cache, fără încărcarea modelului
+        result, cache_context = None, None
+        cache = open_cache(args.cache_dir, enabled=not args.no_cache)
+        if cache is not None:
+            model_path = args.model or EnhancedRedHeatmapGenerator._find_best_model()
+            result, cache_context = cache.lookup(
+                args.image_path, "enhancedRedHeatmap", [model_path],
+                params={"legend": not args.no_legend}
+            )
+            if result is not None:
+                copy_cached_heatmap(result, args.output, "output_path")
         
-        # Generează heatmap-ul îmbunătățit
-        result = generator.generate_enhanced_heatmap(
-            args.image_path,
-            args.output,
-            add_legend=not args.no_legend
-        )
+        if result is None:
+            # Inițializează generatorul
+            with profiler.stage("model_load"):
+                generator = EnhancedRedHeatmapGenerator(args.model)
+            
+            # Generează heatmap-ul îmbunătățit
+            with profiler.stage("heatmap"):
+                result = generator.generate_enhanced_heatmap(
+                    args.image_path,
+                    args.output,
+                    add_legend=not args.no_legend
+                )
+            
+            if cache is not None:
+                cache.store(cache_context, result)
         
         # Adaugă informații suplimentare pentru integrare
         if result.get("status") == "success":
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportă modelele din savedModel/ și modelAntrenat/ ca artefacte doar pentru inferență
+(fără optimizer și fără compilare), preferate apoi de DeepfakeDetector, generatoarele de
+heatmap și GradCAMService. Rulează din nou după reantrenarea unui model; artefactele la zi
+sunt sărite.
+
+Utilizare:
+    python exportInferenceModels.py [--force] [--model cale.keras ...]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from modelLoader import discover_models, export_inference_model
+
+def main():
+    parser = argparse.ArgumentParser(description='Export inference-only model artifacts (no optimizer state, no compile step)')
+    parser.add_argument('--model', action='append', default=None, help='Model to export (repeatable); default: every .keras in savedModel/ and modelAntrenat/')
+    parser.add_argument('--force', action='store_true', help='Export even if the artifact is up to date')
+
+    args = parser.parse_args()
+
+    models = args.model or discover_models()
+    if not models:
+        print(json.dumps({"error": "No .keras models found in savedModel/ or modelAntrenat/"}))
+        sys.exit(1)
+
+    results = []
+    for model_path in models:
+        if not os.path.exists(model_path):
+            results.append({"model": model_path, "error": "Model not found"})
+            continue
+        print(f"Export: {model_path}", file=sys.stderr)
+        results.append(export_inference_model(model_path, force=args.force))
+
+    print(json.dumps({"models": results}, indent=2))
+    if any("error" in result for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ import os
 import sys
 import logging
 import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 
 logging.basicConfig(
     level=logging.INFO,
@@ -46,59 +49,183 @@ def download_yunet_model():
         logger.info(f"Modelul YuNet există deja la {model_path}")
         return model_path
 
+def find_yunet_model():
+    """Calea modelului YuNet dacă există deja pe disc (fără descărcare)"""
+    for path in YUNET_MODEL_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+def create_yunet_detector(model_path, input_size=(320, 320)):
+    return cv2.FaceDetectorYN.create(
+        model_path,
+        "",
+        input_size,
+        0.9, 
+        0.3,  
+        5000  
+    )
+
 def load_yunet_detector():
     """
     Încarcă detectorul YuNet
     """
-    download_yunet_model()
-    
-    model_path = None
-    for path in YUNET_MODEL_PATHS:
-        if os.path.exists(path):
-            model_path = path
-            break
+    model_path = find_yunet_model()
+    if model_path is None:
+        download_yunet_model()
+        model_path = find_yunet_model()
     
     if model_path is None:
         logger.error("Nu s-a găsit modelul YuNet în nicio cale disponibilă!")
         return None
     
     try:
-        detector = cv2.FaceDetectorYN.create(
-            model_path,
-            "",
-            (320, 320),
-            0.9, 
-            0.3,  
-            5000  
-        )
+        detector = create_yunet_detector(model_path)
         logger.info(f"Modelul YuNet a fost încărcat cu succes din {model_path}")
         return detector
     except Exception as e:
         logger.error(f"Eroare la încărcarea modelului YuNet: {e}")
         return None
 
+class YuNetDetectorPool:
+    """
+    Detectoare YuNet construite o singură dată și refolosite între apeluri și thread-uri.
+    Detectoarele sunt grupate după dimensiunea intrării, astfel încât setInputSize nu este apelat
+    la fiecare imagine; un detector este folosit de un singur thread la un moment dat.
+    """
+
+    def __init__(self, model_path, max_per_size=4, max_sizes=8):
+        self.model_path = model_path
+        self.max_per_size = max_per_size
+        self.max_sizes = max_sizes
+        self._free = OrderedDict()  # (lățime, înălțime) -> detectoare libere, cele recente la final
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def acquire(self, input_size):
+        """Un detector configurat pentru input_size = (lățime, înălțime)"""
+        input_size = (int(input_size[0]), int(input_size[1]))
+        detector = None
+        with self._lock:
+            free = self._free.get(input_size)
+            if free:
+                detector = free.pop()
+                self._free.move_to_end(input_size)
+                self.reused += 1
+        if detector is None:
+            detector = create_yunet_detector(self.model_path, input_size)
+            with self._lock:
+                self.created += 1
+
+        try:
+            yield detector
+        finally:
+            with self._lock:
+                free = self._free.setdefault(input_size, [])
+                self._free.move_to_end(input_size)
+                if len(free) < self.max_per_size:
+                    free.append(detector)
+                # Dimensiunile folosite cel mai rar sunt eliberate (imagini de dimensiuni foarte variate)
+                while len(self._free) > self.max_sizes:
+                    self._free.popitem(last=False)
+
+    def detect(self, image):
+        height, width = image.shape[:2]
+        with self.acquire((width, height)) as detector:
+            return _run_detection(detector, image)
+
+    def detect_batch(self, images):
+        """Fețele din fiecare imagine, în ordine; imaginile de aceeași dimensiune folosesc același detector"""
+        results = [None] * len(images)
+        by_size = OrderedDict()
+        for index, image in enumerate(images):
+            height, width = image.shape[:2]
+            by_size.setdefault((width, height), []).append(index)
+
+        for input_size, indices in by_size.items():
+            with self.acquire(input_size) as detector:
+                for index in indices:
+                    results[index] = _run_detection(detector, images[index])
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "sizes": [list(size) for size in self._free],
+                "idle": sum(len(free) for free in self._free.values())
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_failed = False
+
+def get_detector_pool():
+    """
+    Pool-ul YuNet al procesului, creat la primul apel.
+    Doar acest apel poate descărca modelul; detectarea nu mai atinge rețeaua sau discul.
+    Returnează None dacă modelul nu este disponibil (eșecul nu este reîncercat).
+    """
+    global _pool, _pool_failed
+    if _pool is not None or _pool_failed:
+        return _pool
+    with _pool_lock:
+        if _pool is None and not _pool_failed:
+            model_path = find_yunet_model()
+            if model_path is None:
+                download_yunet_model()
+                model_path = find_yunet_model()
+            if model_path is None:
+                logger.error("Nu s-a găsit modelul YuNet în nicio cale disponibilă!")
+                _pool_failed = True
+            else:
+                _pool = YuNetDetectorPool(model_path)
+                logger.info(f"Pool YuNet creat pentru {model_path}")
+    return _pool
+
 def detect_faces(image, detector=None):
     """
     Detectează fețe în imagine folosind YuNet
     
     Args:
         image: Imaginea în format OpenCV (np.ndarray)
-        detector: Detectorul YuNet preîncărcat (opțional)
+        detector: Detectorul YuNet preîncărcat sau un YuNetDetectorPool (implicit pool-ul procesului)
         
     Returns:
         Dict cu informații despre fețele detectate
     """
     if detector is None:
-        detector = load_yunet_detector()
+        detector = get_detector_pool()
         
     if detector is None:
         logger.error("Nu s-a putut încărca detectorul YuNet")
         return {"error": "Nu s-a putut încărca detectorul YuNet"}
     
+    if isinstance(detector, YuNetDetectorPool):
+        return detector.detect(image)
+    
+    height, width = image.shape[:2]
+    detector.setInputSize((width, height))
+    return _run_detection(detector, image)
+
+def detect_faces_batch(images, pool=None):
+    """
+    Detectează fețe într-o listă de imagini sau cadre video cu detectoarele din pool
+    
+    Returns:
+        Listă de dict-uri în formatul detect_faces, în ordinea imaginilor
+    """
+    pool = pool or get_detector_pool()
+    if pool is None:
+        return [{"error": "Nu s-a putut încărca detectorul YuNet"} for _ in images]
+    return pool.detect_batch(images)
+
+def _run_detection(detector, image):
+    """Rulează un detector deja configurat pentru dimensiunea imaginii"""
     try:
-        height, width, _ = image.shape
-        detector.setInputSize((width, height))
-        
         _, faces = detector.detect(image)
         
         result = {"faces_detected": 0, "faces": []}
@@ -108,7 +235,8 @@ def detect_faces(image, detector=None):
             
             for face in faces:
                 confidence = face[-1]
-                bbox = face[:-1].astype(np.int32)
+                # Rândul YuNet: x, y, w, h, 5 repere faciale (x, y), scor
+                bbox = face[:4].astype(np.int32)
                 x, y, w, h = bbox
                 
                 face_info = {
@@ -181,11 +309,9 @@ def analyze_image_with_yunet(image_path):
         if image is None:
             return {"error": f"Nu s-a putut citi imaginea: {image_path}"}
         
-        detector = load_yunet_detector()
-        if detector is None:
-            return {"error": "Nu s-a putut încărca detectorul YuNet"}
-        
-        face_results = detect_faces(image, detector)
+        face_results = detect_faces(image)
+        if "error" in face_results:
+            return face_results
         
         face_regions = extract_face_regions(image, face_results)
         
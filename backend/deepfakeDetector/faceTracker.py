@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Urmărirea fețelor între cadrele video eșantionate
+YuNet rulează doar la fiecare al K-lea cadru eșantionat, la o schimbare de scenă sau când nu
+există nicio față urmărită. Între detectări, casetele sunt propagate cu flux optic Lucas-Kanade
+(deplasarea mediană a punctelor din casetă), iar la fiecare detectare fețele noi sunt asociate
+track-urilor existente după IoU. Fiecare track primește un identificator stabil, deci scorurile
+fețelor decupate formează o cronologie per persoană.
+
+Folosit de VideoPipeline în modul cu fețe (predictVideo faces=True).
+"""
+
+import numpy as np
+import cv2
+
+import faceDetector
+
+def iou(a, b):
+    """Intersecția peste reuniune pentru două casete [x, y, w, h]"""
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    inter_h = max(0, min(ay2, by2) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+class Track:
+    def __init__(self, track_id, bbox, confidence, frame_index):
+        self.id = track_id
+        self.bbox = list(bbox)
+        self.confidence = confidence
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.missed = 0  # Detectări consecutive la care fața nu a mai fost găsită
+
+class FaceTracker:
+    def __init__(self, detect_every=10, iou_threshold=0.3, max_missed=1, scene_cut_threshold=0.5,
+                 max_frame_gap=None, detector=None):
+        """
+        Args:
+            detect_every: YuNet rulează la fiecare al K-lea cadru primit (1 = la fiecare cadru)
+            iou_threshold: IoU minim pentru a asocia o detectare unui track existent
+            max_missed: detectări ratate după care un track este închis
+            scene_cut_threshold: distanța Bhattacharyya între histograme peste care cadrul este o tăietură
+            max_frame_gap: salt maxim între numerele cadrelor pentru propagare (seek în video)
+            detector: detectorul sau pool-ul YuNet (implicit pool-ul procesului)
+        """
+        self.detect_every = max(1, int(detect_every))
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.scene_cut_threshold = scene_cut_threshold
+        self.max_frame_gap = max_frame_gap
+        self.detector = detector
+
+        self.tracks = []
+        self._next_id = 0
+        self._prev_gray = None
+        self._prev_hist = None
+        self._prev_index = None
+        self._since_detection = 0
+        self.stats = {"frames": 0, "detections": 0, "propagated": 0, "sceneCuts": 0, "tracksCreated": 0}
+
+    def update(self, frame_index, frame):
+        """
+        Actualizează track-urile pentru un cadru BGR (cadrele în ordinea din video).
+        Returnează track-urile active în acest cadru.
+        """
+        self.stats["frames"] += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        hist = cv2.calcHist([cv2.resize(gray, (64, 36))], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist)
+
+        scene_cut = self._is_scene_cut(frame_index, hist)
+        if scene_cut:
+            # Identitățile nu se păstrează peste o tăietură: casetele vechi nu mai au sens
+            self.stats["sceneCuts"] += 1
+            self.tracks = []
+
+        if scene_cut or not self.tracks or self._since_detection >= self.detect_every - 1:
+            self._detect(frame_index, frame)
+        else:
+            self._propagate(gray, frame.shape)
+            self._since_detection += 1
+            for track in self.tracks:
+                track.last_frame = frame_index
+
+        self._prev_gray = gray
+        self._prev_hist = hist
+        self._prev_index = frame_index
+        return list(self.tracks)
+
+    def _is_scene_cut(self, frame_index, hist):
+        if self._prev_hist is None:
+            return False
+        if frame_index <= self._prev_index:
+            return True
+        if self.max_frame_gap and frame_index - self._prev_index > self.max_frame_gap:
+            return True
+        return cv2.compareHist(self._prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA) > self.scene_cut_threshold
+
+    def _detect(self, frame_index, frame):
+        self.stats["detections"] += 1
+        self._since_detection = 0
+
+        face_results = faceDetector.detect_faces(frame, self.detector)
+        detections = [] if "error" in face_results else face_results["faces"]
+
+        # Asociere greedy după IoU descrescător
+        pairs = sorted(
+            ((iou(track.bbox, det["bbox"]), t, d) for t, track in enumerate(self.tracks) for d, det in enumerate(detections)),
+            reverse=True
+        )
+        matched_tracks, matched_dets = set(), set()
+        for overlap, t, d in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_dets:
+                continue
+            matched_tracks.add(t)
+            matched_dets.add(d)
+            track = self.tracks[t]
+            track.bbox = list(detections[d]["bbox"])
+            track.confidence = detections[d]["confidence"]
+            track.last_frame = frame_index
+            track.missed = 0
+
+        active = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            active.append(track)
+
+        for d, det in enumerate(detections):
+            if d not in matched_dets:
+                active.append(Track(self._next_id, det["bbox"], det["confidence"], frame_index))
+                self._next_id += 1
+                self.stats["tracksCreated"] += 1
+        self.tracks = active
+
+    def _propagate(self, gray, shape):
+        """Deplasează fiecare casetă cu mișcarea mediană a punctelor urmărite în interiorul ei"""
+        height, width = shape[:2]
+        for track in self.tracks:
+            x, y, w, h = [int(v) for v in track.bbox]
+            x1, y1 = max(0, x), max(0, y)
+            x2, y2 = min(width, x + w), min(height, y + h)
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                continue
+
+            mask = np.zeros_like(self._prev_gray)
+            mask[y1:y2, x1:x2] = 255
+            points = cv2.goodFeaturesToTrack(self._prev_gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask)
+            if points is None:
+                continue
+
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None)
+            good = status.reshape(-1) == 1
+            if good.sum() < 3:
+                continue
+
+            dx, dy = np.median((moved[good] - points[good]).reshape(-1, 2), axis=0)
+            track.bbox = [
+                int(np.clip(x + dx, -w // 2, width - w // 2)),
+                int(np.clip(y + dy, -h // 2, height - h // 2)),
+                w,
+                h
+            ]
+            self.stats["propagated"] += 1
+
+    def crops(self, frame, tracks, expand_factor=0.2, min_face_size=24):
+        """Decupajele fețelor urmărite, extinse ca în predictFaces: (track, casetă decupaj, regiune BGR)"""
+        face_results = {
+            "faces_detected": len(tracks),
+            "faces": [{"bbox": track.bbox, "confidence": track.confidence} for track in tracks]
+        }
+        regions = faceDetector.extract_face_regions(frame, face_results, expand_factor=expand_factor)
+        return [
+            (track, region["bbox"], region["region"])
+            for track, region in zip(tracks, regions)
+            if min(region["region"].shape[:2]) >= min_face_size
+        ]
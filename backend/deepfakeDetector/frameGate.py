@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Filtru de diferență între cadre pentru segmentele video statice
+Fiecare cadru deja decodat este redus la o miniatură (64x36) și comparat, prin diferența
+absolută medie, cu ultimul cadru evaluat de model. Sub prag, cadrul refolosește rezultatul
+acelui cadru, fără ensemble și fără MC dropout. Comparația se face mereu față de ultimul cadru
+evaluat, nu față de cel anterior, deci schimbările lente nu se acumulează nevăzute.
+
+Folosit de VideoPipeline și predictRealtime cu --frameGate.
+"""
+
+import numpy as np
+import cv2
+
+class FrameGate:
+    def __init__(self, threshold=0.015, force_every=30, size=(64, 36)):
+        """
+        Args:
+            threshold: diferența absolută medie (intensități în [0, 1]) sub care cadrul este refolosit
+            force_every: după atâtea cadre refolosite consecutiv, următorul este evaluat oricum (0 = niciodată)
+            size: dimensiunea miniaturii comparate
+        """
+        self.threshold = threshold
+        self.force_every = max(0, int(force_every))
+        self.size = size
+        self._reference = None
+        self._reused_run = 0
+        self.checked = 0
+        self.reused = 0
+        self.forced = 0
+
+    def signature(self, frame):
+        """Miniatura în tonuri de gri, în [0, 1], pentru un cadru BGR uint8 sau unul preprocesat float"""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.float32)
+        if frame.dtype == np.uint8:
+            small /= 255.0
+        return small.mean(axis=2) if small.ndim == 3 else small
+
+    def should_reuse(self, frame):
+        """True dacă cadrul poate refolosi rezultatul ultimului cadru evaluat"""
+        self.checked += 1
+        signature = self.signature(frame)
+
+        if self._reference is not None:
+            distance = float(np.mean(np.abs(signature - self._reference)))
+            if distance < self.threshold:
+                if not self.force_every or self._reused_run < self.force_every:
+                    self._reused_run += 1
+                    self.reused += 1
+                    return True
+                self.forced += 1
+
+        self._reference = signature
+        self._reused_run = 0
+        return False
+
+    def stats(self):
+        return {
+            "threshold": self.threshold,
+            "forceEvery": self.force_every,
+            "checkedFrames": self.checked,
+            "skippedInferences": self.reused,
+            "forcedRescores": self.forced
+        }
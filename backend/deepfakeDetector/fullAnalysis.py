@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analiză completă dintr-o singură decodare
+Imaginea este citită o singură dată, iar din aceeași matrice se obțin predicția ensemble-ului,
+defalcarea încrederii, fețele detectate cu YuNet și, opțional, heatmap-ul Grad-CAM.
+Înlocuiește apelurile repetate ale lui deepfakeDetector.py pentru același fișier.
+
+Utilizare:
+    python fullAnalysis.py <cale_fișier> [--generateHeatmap] [--noFaces] [--video]
+"""
+
+import os
+import sys
+
+from lazyImports import start_profiler, get_profiler
+start_profiler()
+
+import json
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from deepfakeDetector import (
+    resolve_model_path,
+    expected_model_paths,
+    create_detector,
+    apply_heatmap_result,
+    finalize_result,
+    generate_mock_result
+)
+from resultCache import open_cache
+
+def load_face_detector():
+    """
+    Încarcă modulul faceDetector și pool-ul de detectoare YuNet al procesului.
+    Returnează (modul, pool, eroare); analiza continuă și fără fețe.
+    """
+    try:
+        import faceDetector
+    except Exception as e:
+        return None, None, f"faceDetector indisponibil: {str(e)}"
+
+    yunet = faceDetector.get_detector_pool()
+    if yunet is None:
+        return faceDetector, None, "Nu s-a putut încărca detectorul YuNet"
+    return faceDetector, yunet, None
+
+def analyze_faces(face_module, face_detector, image, load_error=None):
+    """Fețele din imaginea deja decodată, în formatul așteptat de backend-ul Node"""
+    if face_module is None or face_detector is None:
+        return {
+            "facesDetected": 0,
+            "faces": [],
+            "analysisMethod": "unavailable",
+            "error": load_error or "Face detector not loaded"
+        }
+
+    face_results = face_module.detect_faces(image, face_detector)
+    if "error" in face_results:
+        return {"facesDetected": 0, "faces": [], "analysisMethod": "yunet", "error": face_results["error"]}
+
+    height, width = image.shape[:2]
+    return {
+        "facesDetected": face_results["faces_detected"],
+        "faces": face_results["faces"],
+        "analysisMethod": "yunet",
+        "imageSize": [width, height],
+        "confidence": round(max((f["confidence"] for f in face_results["faces"]), default=0) * 100, 2)
+    }
+
+def run_full_analysis(detector, input_path, faces=True, face_module=None, face_detector=None,
+                      face_load_error=None, generate_heatmap=False, heatmap_output=None, min_heatmap_score=30,
+                      video=False, skip_frames=5, batch_size=16, video_output=None,
+                      input_shape=(299, 299, 3), image_size=299, model_path=None, start_time=None):
+    """
+    Rulează toate etapele pe un fișier cu un detector deja încărcat.
+    Returnează un singur JSON: rezultatul predict standard plus confidenceBreakdown, faceAnalysis
+    și, când este cerut, câmpurile heatmap.
+    """
+    import numpy as np
+    import cv2
+
+    start_time = start_time or time.time()
+    timings = {}
+
+    if video:
+        # Pipeline-ul video decodează o singură dată și evaluează cadrele în batch-uri
+        result = detector.predictVideo(input_path, skipFrames=skip_frames, outputPath=video_output, batchSize=batch_size)
+        result["faceAnalysis"] = None
+        return finalize_result(result, detector, input_path, input_shape, image_size, model_path, start_time)
+
+    stage_start = time.time()
+    image = cv2.imread(input_path)
+    if image is None:
+        return {"error": f"Could not load image from {input_path}"}
+    timings["decode"] = time.time() - stage_start
+
+    stage_start = time.time()
+    result = None
+    if generate_heatmap:
+        try:
+            # Predicția și Grad-CAM în același proces, pe imaginea deja decodată
+            result, heatmap_result = detector.predictWithHeatmap(
+                input_path, heatmap_output, minFakeScore=min_heatmap_score, image=image
+            )
+            if heatmap_result is not None:
+                apply_heatmap_result(result, heatmap_result)
+        except Exception as heatmap_error:
+            print(f"Heatmap in-process eșuat, continui doar cu predicția: {heatmap_error}", file=sys.stderr)
+            result = None
+
+    if result is None:
+        img = detector.preprocessArray(image)
+        try:
+            batch_output = detector.predictBatch(np.expand_dims(img, axis=0))[0]
+            result = detector.buildPredictionResult(batch_output, img, input_path, stage_start)
+        except Exception as pred_error:
+            result = {"error": f"Prediction failed: {str(pred_error)}"}
+    timings["prediction"] = time.time() - stage_start
+
+    if "error" in result:
+        return result
+
+    debug_info = result.get("debugInfo", {})
+    result["confidenceBreakdown"] = debug_info.get("confidence_methods", {})
+
+    if faces:
+        stage_start = time.time()
+        result["faceAnalysis"] = analyze_faces(face_module, face_detector, image, face_load_error)
+        timings["faces"] = time.time() - stage_start
+
+    result = finalize_result(result, detector, input_path, input_shape, image_size, model_path, start_time)
+    result["processingTime"] = round(time.time() - start_time, 3)
+    result["stageTimings"] = {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Full deepfake analysis (prediction, confidence, faces, heatmap) from a single decode')
+    parser.add_argument('inputPath', help='Path to the image or video to analyze')
+    parser.add_argument('--modelPath', default=None, help='Path to the trained model')
+    parser.add_argument('--imageSize', type=int, default=299, help='Input image size (width and height)')
+    parser.add_argument('--useTrainModelArchitecture', action='store_true', help='Use EfficientNet architecture from trainModel.py')
+    parser.add_argument('--generateHeatmap', action='store_true', help='Generate the Grad-CAM heatmap in the same pass')
+    parser.add_argument('--minHeatmapScore', type=float, default=30, help='Generate the heatmap only above this fake score')
+    parser.add_argument('--noFaces', action='store_true', help='Skip YuNet face detection')
+    parser.add_argument('--video', action='store_true', help='Process input as video')
+    parser.add_argument('--skipFrames', type=int, default=5, help='Process every Nth frame (video only)')
+    parser.add_argument('--batchSize', type=int, default=16, help='Sampled frames per inference batch (video only)')
+    parser.add_argument('--output', help='Output path for the heatmap (image) or annotated video (video)')
+    parser.add_argument('--noCache', action='store_true', help='Always run the models, ignoring cached results')
+    parser.add_argument('--cacheDir', default=None, help='Directory of the result cache database')
+    parser.add_argument('--profileStartup', action='store_true', help='Report per-module import time and model load time as JSON on stderr')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.inputPath):
+        print(json.dumps({"error": f"Input file not found: {args.inputPath}"}))
+        sys.exit(1)
+
+    start_time = time.time()
+    image_size = args.imageSize or 299
+    input_shape = (image_size, image_size, 3)
+    args.modelPath = resolve_model_path(args.modelPath)
+
+    cache, cache_context = open_cache(args.cacheDir, enabled=not args.noCache), None
+    if cache is not None:
+        try:
+            cached, cache_context = cache.lookup(
+                args.inputPath, "fullAnalysis", expected_model_paths(args.modelPath),
+                params={
+                    "imageSize": image_size,
+                    "useTrainModelArchitecture": args.useTrainModelArchitecture,
+                    "generateHeatmap": args.generateHeatmap,
+                    "minHeatmapScore": args.minHeatmapScore,
+                    "faces": not args.noFaces,
+                    "video": args.video,
+                    "skipFrames": args.skipFrames if args.video else None,
+                    "output": os.path.abspath(args.output) if args.output and args.video else None
+                }
+            )
+            if cached is not None:
+                cached["processingTime"] = round(time.time() - start_time, 3)
+                sys.stdout.write(json.dumps(cached, separators=(',', ':')))
+                sys.stdout.flush()
+                return
+        except Exception as cache_error:
+            print(f"Cache indisponibil pentru această analiză: {cache_error}", file=sys.stderr)
+            cache_context = None
+
+    try:
+        try:
+            detector = create_detector(args.modelPath, input_shape, args.useTrainModelArchitecture)
+        except Exception as model_error:
+            result = generate_mock_result(args.inputPath, f"Model creation failed: {str(model_error)}")
+            print(json.dumps(result))
+            sys.exit(0)
+
+        face_module, face_detector, face_load_error = None, None, None
+        if not args.noFaces and not args.video:
+            with get_profiler().stage("face_detector_load"):
+                face_module, face_detector, face_load_error = load_face_detector()
+
+        with get_profiler().stage("analysis"):
+            result = run_full_analysis(
+                detector,
+                args.inputPath,
+                faces=not args.noFaces,
+                face_module=face_module,
+                face_detector=face_detector,
+                face_load_error=face_load_error,
+                generate_heatmap=args.generateHeatmap,
+                heatmap_output=None if args.video else args.output,
+                min_heatmap_score=args.minHeatmapScore,
+                video=args.video,
+                skip_frames=args.skipFrames,
+                batch_size=args.batchSize,
+                video_output=args.output if args.video else None,
+                input_shape=input_shape,
+                image_size=image_size,
+                model_path=args.modelPath,
+                start_time=start_time
+            )
+
+        if cache is not None and cache_context is not None:
+            try:
+                cache.store(cache_context, result)
+            except Exception as cache_error:
+                print(f"Nu am putut salva rezultatul în cache: {cache_error}", file=sys.stderr)
+
+        sys.stdout.write(json.dumps(result, separators=(',', ':')))
+        sys.stdout.flush()
+
+    except Exception as e:
+        result = generate_mock_result(args.inputPath, f"Processing error: {str(e)}")
+        sys.stdout.write(json.dumps(result, separators=(',', ':')))
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
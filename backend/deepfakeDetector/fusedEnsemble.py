@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ensemble-ul fuzionat într-un singur graf
+Modelele încărcate sunt apelate din același tf.function: imaginea intră o singură dată, este
+redimensionată în graf pentru membrii cu altă dimensiune de intrare, iar ponderile sunt aplicate
+tot în graf. Un apel returnează scorul fuzionat și scorurile fiecărui membru, fără overhead-ul
+câte unui model.predict per membru; ramurile independente pot rula în paralel pe nuclee diferite.
+
+Folosit de DeepfakeDetector.predictBatch; la orice eroare detectorul revine la bucla per membru.
+"""
+
+import numpy as np
+
+from lazyImports import lazy_import
+
+tf = lazy_import("tensorflow")
+
+class FusedEnsemble:
+    def __init__(self, models, weights, input_shape):
+        """
+        Args:
+            models: modelele Keras din ensemble
+            weights: ponderile normalizate, în ordinea modelelor
+            input_shape: (H, W, C) al imaginilor primite (formatul detectorului)
+        """
+        if len(models) != len(weights):
+            raise ValueError("Each ensemble member needs a weight")
+
+        self.models = list(models)
+        self.input_shape = tuple(int(d) for d in input_shape)
+        self._weights = tf.constant(weights, dtype=tf.float32)
+        self._fn = tf.function(
+            self._forward,
+            input_signature=[tf.TensorSpec([None, *self.input_shape], tf.float32)]
+        )
+
+    def _forward(self, batch):
+        member_scores = []
+        for model in self.models:
+            member_input = batch
+            height, width = int(model.input_shape[1]), int(model.input_shape[2])
+            if (height, width) != self.input_shape[:2]:
+                member_input = tf.image.resize(batch, (height, width))
+            member_scores.append(tf.reshape(model(member_input, training=False), (-1,)))
+
+        members = tf.stack(member_scores, axis=1)
+        fused = tf.reduce_sum(members * self._weights, axis=1)
+        return fused, members
+
+    def __call__(self, batch):
+        """Returnează (scoruri fuzionate (N,), scoruri per membru (N, M)) ca numpy"""
+        fused, members = self._fn(tf.convert_to_tensor(np.asarray(batch, dtype=np.float32)))
+        return fused.numpy(), members.numpy()
+
+def can_fuse(models):
+    """Doar modelele Keras pot fi compuse într-un graf (nu și interpretoarele TFLite)"""
+    return len(models) > 1 and all(isinstance(model, tf.keras.Model) for model in models)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor Grad-CAM partajat
+Rezolvă o singură dată stratul țintă pentru fiecare model, construiește modelul de gradient
+și îl împachetează într-un tf.function cu semnătură fixă, astfel încât construcția grafului
+și retrasarea să nu mai aibă loc pentru fiecare imagine.
+
+Pentru mai multe straturi, un singur model de gradient returnează toate activările plus
+predicția, iar un singur tape calculează gradienții pentru toate straturile deodată.
+
+Folosit de EnhancedRedHeatmapGenerator, HeatmapGeneratorAvansat, GradCAMService
+și, prin EnhancedRedHeatmapGenerator, de DeepfakeDetector.predictWithHeatmap.
+"""
+
+import threading
+import logging
+
+from lazyImports import lazy_import
+
+tf = lazy_import("tensorflow")
+
+logger = logging.getLogger(__name__)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def resolve_gradcam_layer(model):
+    """Găsește stratul potrivit pentru Grad-CAM, folosind strategiile succesive de fallback"""
+    # Strategia 1: Caută ultimul strat convoluțional
+    for layer in reversed(model.layers):
+        if isinstance(layer, tf.keras.layers.Conv2D):
+            return layer.name
+
+    # Strategia 2: Caută după nume care conțin 'conv'
+    for layer in reversed(model.layers):
+        if 'conv' in layer.name.lower():
+            return layer.name
+
+    # Strategia 3: Caută straturile cu 4D output (probabil convoluționale)
+    for layer in reversed(model.layers):
+        try:
+            if hasattr(layer, 'output_shape') and layer.output_shape:
+                if len(layer.output_shape) == 4:  # Batch, Height, Width, Channels
+                    logger.info(f"Found 4D layer (likely conv): {layer.name} with shape {layer.output_shape}")
+                    return layer.name
+        except:
+            continue
+
+    # Strategia 4: Încearcă cu penultimul strat
+    if len(model.layers) >= 2 and hasattr(model.layers[-2], 'output_shape'):
+        logger.info(f"Using second-to-last layer: {model.layers[-2].name}")
+        return model.layers[-2].name
+
+    # Strategia 5: Orice strat care nu este Dense sau Dropout
+    for layer in reversed(model.layers):
+        if not isinstance(layer, (tf.keras.layers.Dense, tf.keras.layers.Dropout,
+                                  tf.keras.layers.Flatten, tf.keras.layers.GlobalAveragePooling2D)):
+            logger.info(f"Using non-dense layer: {layer.name}")
+            return layer.name
+
+    if len(model.layers) > 1:
+        logger.warning(f"Using fallback layer: {model.layers[-2].name}")
+        return model.layers[-2].name
+
+    raise ValueError("No suitable layer found for GradCAM")
+
+class GradCAMEngine:
+    def __init__(self, model, layer_names=None):
+        """
+        Args:
+            model: modelul Keras analizat
+            layer_names: stratul țintă sau o listă de straturi; dacă lipsește, este rezolvat automat
+        """
+        self.model = model
+        if isinstance(layer_names, str):
+            layer_names = [layer_names]
+        self.explicit_layer = bool(layer_names)
+        self.layer_names = list(layer_names) if layer_names else [resolve_gradcam_layer(model)]
+        self.grad_model = self._build_grad_model()
+        self._compute = self._trace()
+        logger.info(f"Grad-CAM engine pregătit pentru straturile: {self.layer_names}")
+
+    @property
+    def layer_name(self):
+        """Primul strat țintă (singurul, pentru motoarele cu un strat)"""
+        return self.layer_names[0]
+
+    def _build_grad_model(self):
+        try:
+            return tf.keras.models.Model(
+                inputs=[self.model.inputs],
+                outputs=[self.model.get_layer(name).output for name in self.layer_names] + [self.model.output]
+            )
+        except Exception as model_error:
+            logger.error(f"Error creating grad model with layers {self.layer_names}: {model_error}")
+            if self.explicit_layer:
+                # Straturile cerute explicit nu sunt înlocuite cu altele
+                raise
+            # Încearcă cu un alt strat
+            for layer in reversed(self.model.layers[:-1]):  # Exclude ultimul strat
+                try:
+                    grad_model = tf.keras.models.Model(
+                        inputs=[self.model.inputs],
+                        outputs=[layer.output, self.model.output]
+                    )
+                    self.layer_names = [layer.name]
+                    logger.info(f"Successfully created model with layer: {layer.name}")
+                    return grad_model
+                except:
+                    continue
+            raise ValueError("Could not create gradient model with any layer")
+
+    def _trace(self):
+        """Împachetează calculul într-un tf.function cu semnătură fixă (batch variabil)"""
+        input_shape = self.model.input_shape
+        if isinstance(input_shape, list):
+            # Modele cu mai multe intrări: rulare eager
+            return self._compute_impl
+
+        return tf.function(
+            self._compute_impl,
+            input_signature=[
+                tf.TensorSpec(shape=(None,) + tuple(input_shape[1:]), dtype=tf.float32),
+                tf.TensorSpec(shape=(), dtype=tf.int32)
+            ]
+        )
+
+    def _compute_impl(self, images, class_index):
+        with tf.GradientTape() as tape:
+            model_outputs = self.grad_model(images, training=False)
+            conv_outputs, predictions = list(model_outputs[:-1]), model_outputs[-1]
+            # class_index < 0 înseamnă clasa cu scorul maxim, aleasă separat pentru fiecare imagine
+            indices = tf.where(
+                class_index < 0,
+                tf.argmax(predictions, axis=1, output_type=tf.int32),
+                tf.fill(tf.shape(predictions)[:1], class_index)
+            )
+            target = tf.gather(predictions, indices, axis=1, batch_dims=1)
+
+        # Un singur pas backward pentru toate straturile; fără training, scorul fiecărei
+        # imagini depinde doar de activările ei, deci gradienții rămân separați pe imagine
+        all_grads = tape.gradient(target, conv_outputs)
+
+        layers = {}
+        for name, layer_output, grads in zip(self.layer_names, conv_outputs, all_grads):
+            layer_result = {"conv_outputs": layer_output}
+            # Forma este cunoscută la trasare, deci ramura se decide o singură dată
+            if grads is not None:
+                layer_result["grads"] = grads
+                if len(layer_output.shape) == 4:
+                    layer_result["heatmap"] = self._heatmap(layer_output, grads)
+            layers[name] = layer_result
+
+        outputs = {
+            "predictions": predictions,
+            "target": target,
+            "layers": layers
+        }
+        # Câmpurile primului strat rămân la nivelul de sus pentru apelurile cu un singur strat
+        outputs.update(layers[self.layer_names[0]])
+        return outputs
+
+    @staticmethod
+    def _heatmap(layer_output, grads):
+        """Harta Grad-CAM (N, H, W) pentru fiecare imagine, normalizată separat"""
+        pooled_grads = tf.reduce_mean(grads, axis=(1, 2))
+        heatmap = tf.einsum("nhwc,nc->nhw", layer_output, pooled_grads)
+        heatmap = tf.maximum(heatmap, 0)
+        max_value = tf.reduce_max(heatmap, axis=(1, 2), keepdims=True)
+        return tf.where(max_value > 0, heatmap / tf.maximum(max_value, 1e-12), heatmap)
+
+    def run(self, images, class_index=None):
+        """
+        Rulează pasul forward + backward pe un batch.
+        Returnează un dicționar cu predictions, target, layers (per strat) și, pentru primul strat,
+        conv_outputs și, când există, grads și heatmap. Toate au prima dimensiune batch-ul
+        (heatmap are forma (N, H, W), o hartă pentru fiecare imagine).
+        """
+        images = tf.cast(tf.convert_to_tensor(images), tf.float32)
+        index = tf.constant(-1 if class_index is None else int(class_index), dtype=tf.int32)
+        return self._compute(images, index)
+
+def get_gradcam_engine(model, layer_names=None):
+    """Returnează motorul Grad-CAM din cache pentru model și straturi, construindu-l la prima cerere"""
+    if isinstance(layer_names, (list, tuple)):
+        layer_names = tuple(layer_names)
+    key = (id(model), layer_names)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None or engine.model is not model:
+            engine = GradCAMEngine(model, layer_names)
+            _engines[key] = engine
+        return engine
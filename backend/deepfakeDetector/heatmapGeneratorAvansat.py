@@ -11,16 +11,16 @@ Versiune: 2.1.0
 Data: 2025
 """
 
-import tensorflow as tf
-import numpy as np
-import cv2
 import os
 import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from lazyImports import start_profiler, get_profiler, lazy_import
+start_profiler()
+
+import numpy as np
+import cv2
 import json
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.colors import LinearSegmentedColormap
-import seaborn as sns
 from datetime import datetime
 from pathlib import Path
 import argparse
@@ -29,6 +29,12 @@ from typing import Dict, List, Tuple, Optional, Union
 import warnings
 warnings.filterwarnings('ignore')
 
+from gradcamEngine import get_gradcam_engine
+from modelLoader import load_inference_model
+
+# TensorFlow la încărcarea modelului, matplotlib doar la vizualizarea premium
+tf = lazy_import("tensorflow")
+
 # Configurare logging avansat
 logging.basicConfig(
     level=logging.INFO,
@@ -89,7 +95,8 @@ class HeatmapGeneratorAvansat:
         # Configurare GPU optimizată
         self._configure_gpu()
         
-    def _find_best_model(self) -> str:
+    @staticmethod
+    def _find_best_model() -> str:
         """Găsește cel mai bun model disponibil cu prioritate pentru utilizatori premium"""
         current_dir = Path(__file__).parent
         
@@ -134,19 +141,14 @@ class HeatmapGeneratorAvansat:
                 'Recall': tf.keras.metrics.Recall
             }
             
-            model = tf.keras.models.load_model(
+            # Artefactul de inferență dacă există; modelul este folosit doar pentru predict și Grad-CAM,
+            # deci nu mai este recompilat
+            model = load_inference_model(
                 self.model_path,
                 custom_objects=custom_objects,
                 compile=False
             )
             
-            # Recompilare cu optimizări pentru heatmap
-            model.compile(
-                optimizer=tf.keras.optimizers.AdamW(learning_rate=0.001),
-                loss='binary_crossentropy',
-                metrics=['accuracy', 'precision', 'recall']
-            )
-            
             logger.info(f"✅ Model încărcat cu succes! Parametri: {model.count_params():,}")
             return model
             
@@ -238,33 +240,14 @@ class HeatmapGeneratorAvansat:
             Heatmap-ul generat
         """
         try:
-            # Creează model pentru layer-ul specificat
-            grad_model = tf.keras.models.Model(
-                inputs=[self.model.inputs],
-                outputs=[self.model.get_layer(layer_name).output, self.model.output]
-            )
-            
-            # Calculează gradienții
-            with tf.GradientTape() as tape:
-                conv_outputs, predictions = grad_model(image)
-                class_idx = tf.argmax(predictions[0])
-                class_output = predictions[:, class_idx]
-            
-            # Extrage gradienții pentru layer-ul de convoluție
-            grads = tape.gradient(class_output, conv_outputs)
-            
-            # Calculează importanța fiecărui canal
-            pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-            
-            # Generează heatmap-ul
-            conv_outputs = conv_outputs[0]
-            heatmap = conv_outputs @ pooled_grads[..., tf.newaxis]
-            heatmap = tf.squeeze(heatmap)
+            # Modelul de gradient pentru layer este construit și trasat o singură dată
+            engine = get_gradcam_engine(self.model, layer_name)
             
-            # Normalizează între 0 și 1
-            heatmap = tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
+            # Calculează gradienții pentru clasa cu scorul maxim
+            outputs = engine.run(image)
             
-            return heatmap.numpy()
+            # Heatmap-ul normalizat între 0 și 1
+            return outputs["heatmap"].numpy()[0]
             
         except Exception as e:
             logger.error(f"❌ Eroare la generarea Grad-CAM: {e}")
@@ -281,21 +264,49 @@ class HeatmapGeneratorAvansat:
         Returns:
             Dicționar cu heatmap-uri pentru diferite layere
         """
-        heatmaps = {}
+        heatmaps, _ = self._multi_layer_pass(image)
+        return heatmaps
+    
+    def _multi_layer_pass(self, image: np.ndarray) -> Tuple[Dict[str, np.ndarray], Optional[np.ndarray]]:
+        """
+        Un singur pas forward + backward pentru toate layerele din grad_cam_layers
         
+        Returns:
+            (heatmap-uri per layer, predicția modelului sau None dacă pasul comun a eșuat)
+        """
+        model_layers = {layer.name for layer in self.model.layers}
+        layer_names = []
         for layer_name in self.grad_cam_layers:
-            try:
-                if any(layer.name == layer_name for layer in self.model.layers):
-                    heatmap = self.generate_grad_cam_heatmap(image, layer_name)
-                    heatmaps[layer_name] = heatmap
+            if layer_name in model_layers:
+                layer_names.append(layer_name)
+            else:
+                logger.warning(f"⚠️ Layer {layer_name} nu există în model")
+        
+        if not layer_names:
+            return {}, None
+        
+        heatmaps = {}
+        try:
+            # Un singur model de gradient cu toate activările, un singur tape pentru toți gradienții
+            engine = get_gradcam_engine(self.model, layer_names)
+            outputs = engine.run(image)
+            
+            for layer_name in layer_names:
+                layer_output = outputs["layers"][layer_name]
+                if "heatmap" in layer_output:
+                    heatmaps[layer_name] = layer_output["heatmap"].numpy()[0]
                     logger.debug(f"✅ Heatmap generat pentru layer: {layer_name}")
                 else:
-                    logger.warning(f"⚠️ Layer {layer_name} nu există în model")
-            except Exception as e:
-                logger.error(f"❌ Eroare la layer {layer_name}: {e}")
+                    logger.error(f"❌ Eroare la layer {layer_name}: fără gradient convoluțional")
+                    heatmaps[layer_name] = self._generate_synthetic_heatmap()
+            
+            return heatmaps, outputs["predictions"].numpy()
+            
+        except Exception as e:
+            logger.error(f"❌ Eroare la analiza multi-layer: {e}")
+            for layer_name in layer_names:
                 heatmaps[layer_name] = self._generate_synthetic_heatmap()
-        
-        return heatmaps
+            return heatmaps, None
     
     def _generate_synthetic_heatmap(self) -> np.ndarray:
         """Generează heatmap sintetic pentru fallback"""
@@ -333,6 +344,8 @@ class HeatmapGeneratorAvansat:
         Returns:
             Calea către fișierul salvat
         """
+        import matplotlib.pyplot as plt
+
         try:
             # Configurare stiluri premium
             plt.style.use('dark_background')
@@ -384,6 +397,8 @@ class HeatmapGeneratorAvansat:
     
     def _plot_original_with_overlay(self, ax, original_image, heatmaps, detection_result):
         """Plotează imaginea originală cu overlay-ul heatmap"""
+        import matplotlib.pyplot as plt
+
         ax.imshow(original_image)
         
         # Combină heatmap-urile pentru overlay
@@ -411,6 +426,8 @@ class HeatmapGeneratorAvansat:
     
     def _plot_individual_heatmaps(self, axes, heatmaps):
         """Plotează heatmap-uri individuale"""
+        import matplotlib.pyplot as plt
+
         heatmap_items = list(heatmaps.items())
         
         for i, ax in enumerate(axes):
@@ -520,14 +537,15 @@ class HeatmapGeneratorAvansat:
             # Preprocesare avansată
             processed_image, original_image = self.preprocess_image_advanced(image_path)
             
-            # Predicție cu modelul avansat
-            prediction = self.model.predict(processed_image, verbose=0)
+            # Heatmap-uri multi-layer și predicția din același pas prin model
+            heatmaps, prediction = self._multi_layer_pass(processed_image)
+            
+            # Predicție separată doar dacă pasul comun nu a furnizat-o
+            if prediction is None:
+                prediction = self.model.predict(processed_image, verbose=0)
             fake_score = float(prediction[0][0] * 100)
             confidence_score = float(abs(prediction[0][0] - 0.5) * 200)
             
-            # Generare heatmap-uri multi-layer
-            heatmaps = self.generate_multi_layer_analysis(processed_image)
-            
             # Creează numele fișierului de output
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             user_suffix = f"_user_{user_id}" if user_id else ""
@@ -604,18 +622,21 @@ def main():
     parser.add_argument("--user_id", default=None, help="ID-ul utilizatorului premium")
     parser.add_argument("--model_path", default=None, help="Calea către modelul custom")
     parser.add_argument("--output_dir", default="../../../heatmaps", help="Directorul de output")
+    parser.add_argument("--profileStartup", action="store_true", help="Raportează pe stderr, ca JSON, timpul fiecărui import și al încărcării modelului")
     
     args = parser.parse_args()
     
     try:
         # Inițializare generator
-        generator = HeatmapGeneratorAvansat(
-            model_path=args.model_path,
-            output_dir=args.output_dir
-        )
+        with get_profiler().stage("model_load"):
+            generator = HeatmapGeneratorAvansat(
+                model_path=args.model_path,
+                output_dir=args.output_dir
+            )
         
         # Procesare imagine
-        result = generator.process_image_for_premium_user(args.image_path, args.user_id)
+        with get_profiler().stage("heatmap"):
+            result = generator.process_image_for_premium_user(args.image_path, args.user_id)
         
         # Output JSON pentru integrare cu backend
         print(json.dumps(result, indent=2, ensure_ascii=False))
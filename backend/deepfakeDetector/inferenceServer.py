@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Server de inferență persistent pentru detectarea deepfake
+Încarcă DeepfakeDetector o singură dată și păstrează modelele în memorie,
+astfel încât fiecare upload să nu mai pornească un proces Python nou.
+
+Endpoint-uri (JSON):
+    GET  /health   - starea serverului și modelele încărcate
+    POST /predict  - {"inputPath": ..., "generateHeatmap": false, "inProcessHeatmap": true, "faces": false}
+                     (faces: fețele YuNet evaluate într-un singur batch, scor per față și agregat)
+    POST /video    - {"inputPath": ..., "skipFrames": 5, "batchSize": 16, "output": null,
+                      "sampling": "stride", "numFrames": 32, "timeBudget": null, "faces": false, "detectEvery": 10,
+                      "earlyStop": false, "earlyStopError": 0.01, "gateThreshold": null, "gateForceEvery": 30}
+                     (faces: fețele urmărite între cadre, cu scor și cronologie per persoană)
+    POST /heatmap  - {"inputPath": ..., "output": null, "inProcessHeatmap": true}
+    POST /analyze  - {"inputPath": ..., "generateHeatmap": false, "faces": true, "output": null}
+                     (predicție, încredere, fețe YuNet și heatmap dintr-o singură decodare)
+
+Job-uri asincrone (coada persistentă din jobQueue.py):
+    POST /jobs             - {"type": "video" | "premiumHeatmap", "inputPath": ..., ...} -> 202 {"jobId": ...}
+    GET  /jobs             - ultimele job-uri (?status=queued)
+    GET  /jobs/<id>        - stare, progres, rezultate parțiale per cadru și rezultatul final
+    POST /jobs/<id>/cancel - anulează un job care nu a început
+
+Răspunsurile pentru /predict și /video sunt identice cu JSON-ul afișat de deepfakeDetector.py.
+Toate endpoint-urile de analiză acceptă "modelPath" (ca --modelPath din CLI): modelul cerut
+este încărcat la prima cerere și păstrat; fără el se folosește detectorul pornit cu serverul.
+"""
+
+import os
+import sys
+
+from lazyImports import start_profiler, get_profiler
+start_profiler()
+
+import json
+import time
+import argparse
+import threading
+import logging
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from deepfakeDetector import (
+    resolve_model_path,
+    create_detector,
+    analyze_input,
+    generate_mock_result
+)
+from microBatcher import MicroBatchScheduler
+from fullAnalysis import load_face_detector, run_full_analysis
+from perceptualIndex import open_index
+from tfliteBackend import backend_model_paths
+from jobQueue import JobQueue
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+logger = logging.getLogger("inference_server")
+
+class InferenceService:
+    """Păstrează detectorul încărcat și serializează accesul la modele"""
+
+    def __init__(self, model_path=None, image_size=299, use_train_model_architecture=False,
+                 max_batch_size=1, max_wait_ms=10, perceptual_index=False, max_hamming_distance=4,
+                 job_workers=2, backend="keras", cascade=False, cascade_config=None):
+        self.image_size = image_size
+        self.input_shape = (image_size, image_size, 3)
+        self.model_path = resolve_model_path(model_path)
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.use_train_model_architecture = use_train_model_architecture
+        self.backend = backend
+
+        load_start = time.time()
+        self.detector = create_detector(self.model_path, self.input_shape, use_train_model_architecture, backend)
+        if cascade:
+            self.detector.enableCascade(cascade_config)
+        self.model_load_time = round(time.time() - load_start, 3)
+        
+        # Detectorul YuNet este încărcat la prima cerere /analyze care are nevoie de fețe
+        self._faces = None
+        
+        # Aproape-duplicatele sunt servite din index în detector.predict și în pipeline-ul video
+        if perceptual_index:
+            index_files = backend_model_paths(self.detector.model_paths or [self.model_path], backend)
+            if self.detector.cascade is not None:
+                from cascade import cascade_files
+                index_files += cascade_files(cascade_config)
+            self.detector.perceptual_index = open_index(
+                index_files,
+                self.detector.confidence_temperature,
+                max_distance=max_hamming_distance
+            )
+
+        # Fiecare apel de model ia detector.model_lock; decodarea și post-procesarea rulează în paralel
+        self._counter_lock = threading.Lock()
+        self._faces_lock = threading.Lock()
+        
+        # Detectoarele pentru alte modele cerute prin "modelPath", încărcate la prima cerere
+        self._detectors = {}
+        self._detectors_lock = threading.Lock()
+        
+        # Cu micro-batching, scheduler-ul rulează batch-urile sub același lock de model
+        self.batcher = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatchScheduler(self.detector, max_batch_size, max_wait_ms)
+            logger.info(f"Micro-batching activ: max {max_batch_size} imagini / {max_wait_ms} ms")
+        logger.info(f"Detector încărcat în {self.model_load_time}s")
+        
+        # Analizele lungi rulează ca job-uri; generatorul premium este încărcat la primul job
+        self._premium_generator = None
+        self._premium_lock = threading.Lock()
+        self.jobs = None
+        if job_workers > 0:
+            self.jobs = JobQueue(
+                {"video": self._video_job, "premiumHeatmap": self._premium_heatmap_job},
+                workers=job_workers
+            )
+            self.jobs.start()
+            logger.info(f"Coadă de job-uri activă cu {job_workers} worker-i: {self.jobs.db_path}")
+
+    def health(self):
+        detector = self.detector
+        return {
+            "status": "ok",
+            "modelLoaded": detector.model_loaded,
+            "modelsCount": len(detector.ensemble_models) if detector.ensemble_models else 1,
+            "modelPaths": detector.model_paths or ([self.model_path] if self.model_path else []),
+            "modelLoadTime": self.model_load_time,
+            "extraModels": sorted(key or "ensemble" for key in self._detectors),
+            "backend": detector.backend,
+            "cascade": detector.cascade.stats() if detector.cascade else None,
+            "uptime": round(time.time() - self.started_at, 1),
+            "requestsServed": self.requests_served,
+            "batching": self.batcher.stats() if self.batcher else None,
+            "perceptualIndex": detector.perceptual_index.stats() if detector.perceptual_index else None
+        }
+
+    def predict(self, payload):
+        input_path = self._require_input(payload)
+        detector, model_path = self._detector_for(payload)
+        faces = bool(payload.get("faces", False))
+        generate_heatmap = bool(payload.get("generateHeatmap", False))
+        # Fețele și heatmap-ul nu trec prin scheduler: apelurile lor de model iau direct lock-ul
+        batched = self.batcher is not None and detector is self.detector and not faces and not generate_heatmap
+        self._count_request()
+        return analyze_input(
+            detector,
+            input_path,
+            generate_heatmap=generate_heatmap,
+            fused_heatmap=bool(payload.get("inProcessHeatmap", True)),
+            input_shape=self.input_shape,
+            image_size=self.image_size,
+            model_path=model_path,
+            predictor=self.batcher if batched else None,
+            faces=faces
+        )
+
+    def video(self, payload):
+        input_path = self._require_input(payload)
+        detector, model_path = self._detector_for(payload)
+        self._count_request()
+        # Lock-ul de model este luat per batch în pipeline, nu pentru tot video-ul
+        return analyze_input(
+            detector,
+            input_path,
+            video=True,
+            skip_frames=int(payload.get("skipFrames", 5)),
+            output_path=payload.get("output"),
+            batch_size=int(payload.get("batchSize", 16)),
+            sampling=payload.get("sampling", "stride"),
+            num_frames=int(payload.get("numFrames", 32)),
+            time_budget=payload.get("timeBudget"),
+            faces=bool(payload.get("faces", False)),
+            detect_every=int(payload.get("detectEvery", 10)),
+            early_stop=bool(payload.get("earlyStop", False)),
+            early_stop_error=float(payload.get("earlyStopError", 0.01)),
+            gate_threshold=payload.get("gateThreshold"),
+            gate_force_every=int(payload.get("gateForceEvery", 30)),
+            input_shape=self.input_shape,
+            image_size=self.image_size,
+            model_path=model_path
+        )
+
+    def heatmap(self, payload):
+        input_path = self._require_input(payload)
+        detector, model_path = self._detector_for(payload)
+        self._count_request()
+        if payload.get("inProcessHeatmap", True):
+            # Modelele sunt deja încărcate: Grad-CAM fără un al doilea proces
+            _, heatmap_result = detector.predictWithHeatmap(input_path, payload.get("output"), minFakeScore=-1)
+            if heatmap_result is not None:
+                return heatmap_result
+        return detector.generateHeatmap(input_path, payload.get("output"))
+
+    def analyze(self, payload):
+        input_path = self._require_input(payload)
+        detector, model_path = self._detector_for(payload)
+        faces = bool(payload.get("faces", True))
+        self._count_request()
+        if faces:
+            with self._faces_lock:
+                if self._faces is None:
+                    self._faces = load_face_detector()
+        face_module, face_detector, face_load_error = self._faces or (None, None, None)
+        return run_full_analysis(
+            detector,
+            input_path,
+            faces=faces,
+            face_module=face_module,
+            face_detector=face_detector,
+            face_load_error=face_load_error,
+            generate_heatmap=bool(payload.get("generateHeatmap", False)),
+            heatmap_output=payload.get("output"),
+            min_heatmap_score=float(payload.get("minHeatmapScore", 30)),
+            input_shape=self.input_shape,
+            image_size=self.image_size,
+            model_path=model_path
+        )
+
+    def _detector_for(self, payload):
+        """
+        Detectorul cererii și calea modelului, ca --modelPath din CLI: fără "modelPath", detectorul
+        pornit cu serverul; altfel modelul cerut, încărcat o singură dată și păstrat în memorie.
+        O cale inexistentă înseamnă ensemble-ul, la fel ca în create_detector.
+        Cascada, indexul perceptual și micro-batching-ul se aplică doar detectorului implicit.
+        """
+        requested = payload.get("modelPath")
+        if not requested:
+            return self.detector, self.model_path
+        key = os.path.abspath(requested) if os.path.exists(requested) else None
+        default_key = os.path.abspath(self.model_path) if self.model_path else None
+        if key == default_key:
+            return self.detector, requested
+
+        with self._detectors_lock:
+            detector = self._detectors.get(key)
+            if detector is None:
+                logger.info(f"Încarc detectorul pentru {requested}")
+                detector = create_detector(key, self.input_shape, self.use_train_model_architecture, self.backend)
+                self._detectors[key] = detector
+        return detector, requested
+
+    def _count_request(self):
+        with self._counter_lock:
+            self.requests_served += 1
+    
+    def submit_job(self, payload):
+        if self.jobs is None:
+            raise RuntimeError("Job queue is disabled (--jobWorkers 0)")
+        job_type = payload.get("type")
+        if job_type not in self.jobs.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        self._require_input(payload)
+        return {"jobId": self.jobs.submit(job_type, payload), "status": "queued"}
+    
+    def job_status(self, job_id):
+        if self.jobs is None:
+            raise RuntimeError("Job queue is disabled (--jobWorkers 0)")
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise FileNotFoundError(f"Job not found: {job_id}")
+        return job
+    
+    def _video_job(self, payload, progress):
+        input_path = self._require_input(payload)
+        detector, model_path = self._detector_for(payload)
+        self._count_request()
+        # Ca /video: lock-ul de model este luat per apel în pipeline, deci worker-ii de job-uri
+        # și /predict se intercalează între batch-uri în loc să aștepte tot video-ul
+        return analyze_input(
+            detector,
+            input_path,
+            video=True,
+            skip_frames=int(payload.get("skipFrames", 5)),
+            output_path=payload.get("output"),
+            batch_size=int(payload.get("batchSize", 16)),
+            sampling=payload.get("sampling", "stride"),
+            num_frames=int(payload.get("numFrames", 32)),
+            time_budget=payload.get("timeBudget"),
+            faces=bool(payload.get("faces", False)),
+            detect_every=int(payload.get("detectEvery", 10)),
+            early_stop=bool(payload.get("earlyStop", False)),
+            early_stop_error=float(payload.get("earlyStopError", 0.01)),
+            gate_threshold=payload.get("gateThreshold"),
+            gate_force_every=int(payload.get("gateForceEvery", 30)),
+            input_shape=self.input_shape,
+            image_size=self.image_size,
+            model_path=model_path,
+            progress_callback=progress
+        )
+    
+    def _premium_heatmap_job(self, payload, progress):
+        input_path = self._require_input(payload)
+        # Modelul premium este separat de ensemble, deci are propriul lock
+        with self._premium_lock:
+            if self._premium_generator is None:
+                from heatmapGeneratorAvansat import HeatmapGeneratorAvansat
+                self._premium_generator = HeatmapGeneratorAvansat()
+            progress(10)
+            return self._premium_generator.process_image_for_premium_user(input_path, payload.get("userId"))
+    
+    def _require_input(self, payload):
+        input_path = payload.get("inputPath")
+        if not input_path:
+            raise ValueError("Missing required field: inputPath")
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        return input_path
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    routes = {
+        "/predict": "predict",
+        "/video": "video",
+        "/heatmap": "heatmap",
+        "/analyze": "analyze"
+    }
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        if path == "/health":
+            self._send_json(200, self.service.health())
+        elif path == "/jobs" or path.startswith("/jobs/"):
+            self._handle_jobs_get(path, parse_qs(url.query))
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def _handle_jobs_get(self, path, query):
+        try:
+            if path == "/jobs":
+                if self.service.jobs is None:
+                    raise RuntimeError("Job queue is disabled (--jobWorkers 0)")
+                status = query.get("status", [None])[0]
+                self._send_json(200, {"jobs": self.service.jobs.list(status)})
+            else:
+                self._send_json(200, self.service.job_status(path[len("/jobs/"):]))
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except RuntimeError as e:
+            self._send_json(503, {"error": str(e)})
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip("/")
+        route = self.routes.get(path)
+        is_jobs = path == "/jobs" or (path.startswith("/jobs/") and path.endswith("/cancel"))
+        if route is None and not is_jobs:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {str(e)}"})
+            return
+
+        if is_jobs:
+            self._handle_jobs_post(path, payload)
+            return
+
+        try:
+            result = getattr(self.service, route)(payload)
+            self._send_json(200, result)
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Eroare la procesarea cererii {self.path}: {e}")
+            # Același fallback ca în CLI pentru predicții
+            if route in ("predict", "analyze"):
+                self._send_json(200, generate_mock_result(payload.get("inputPath", ""), f"Processing error: {str(e)}"))
+            else:
+                self._send_json(500, {"error": f"Processing error: {str(e)}"})
+
+    def _handle_jobs_post(self, path, payload):
+        try:
+            if path == "/jobs":
+                self._send_json(202, self.service.submit_job(payload))
+            else:
+                job_id = path[len("/jobs/"):-len("/cancel")]
+                self.service.job_status(job_id)
+                self._send_json(200, {"jobId": job_id, "cancelled": self.service.jobs.cancel(job_id)})
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except RuntimeError as e:
+            self._send_json(503, {"error": str(e)})
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, separators=(',', ':')).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s" % (self.address_string(), format % args))
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent deepfake inference server')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind')
+    parser.add_argument('--port', type=int, default=5055, help='Port to bind')
+    parser.add_argument('--modelPath', default=None, help='Path to the trained model')
+    parser.add_argument('--imageSize', type=int, default=299, help='Input image size (width and height)')
+    parser.add_argument('--useTrainModelArchitecture', action='store_true', help='Use EfficientNet architecture from trainModel.py')
+    parser.add_argument('--maxBatchSize', type=int, default=1, help='Maximum images per micro-batch (1 disables batching)')
+    parser.add_argument('--maxWaitMs', type=float, default=10, help='Maximum time a request waits for a batch to fill')
+    parser.add_argument('--perceptualIndex', action='store_true', help='Reuse results of near-duplicate images / video frames')
+    parser.add_argument('--maxHammingDistance', type=int, default=4, help='Maximum perceptual hash distance for a near-duplicate')
+    parser.add_argument('--jobWorkers', type=int, default=2, help='Worker threads for queued video / premium heatmap jobs (0 disables)')
+    parser.add_argument('--backend', choices=['keras', 'float16', 'int8'], default='keras', help='Keras models or their TFLite variants from quantizeModel.py')
+    parser.add_argument('--cascade', action='store_true', help='Light model first, full ensemble only inside the tuned uncertainty band')
+    parser.add_argument('--cascadeConfig', default=None, help='Cascade config written by tuneCascade.py')
+    parser.add_argument('--profileStartup', action='store_true', help='Report per-module import time and model load time as JSON on stderr once the server is ready')
+
+    args = parser.parse_args()
+
+    InferenceRequestHandler.service = InferenceService(
+        model_path=args.modelPath,
+        image_size=args.imageSize,
+        use_train_model_architecture=args.useTrainModelArchitecture,
+        max_batch_size=args.maxBatchSize,
+        max_wait_ms=args.maxWaitMs,
+        perceptual_index=args.perceptualIndex,
+        max_hamming_distance=args.maxHammingDistance,
+        job_workers=args.jobWorkers,
+        backend=args.backend,
+        cascade=args.cascade,
+        cascade_config=args.cascadeConfig
+    )
+
+    server = ThreadingHTTPServer((args.host, args.port), InferenceRequestHandler)
+    # Serverul nu se oprește, deci raportul de pornire este scris imediat
+    get_profiler().report()
+    logger.info(f"Server de inferență pornit pe http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Oprire server de inferență")
+    finally:
+        if InferenceRequestHandler.service.jobs is not None:
+            InferenceRequestHandler.service.jobs.stop()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
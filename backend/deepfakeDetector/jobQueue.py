@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coadă persistentă de job-uri pentru analizele lungi (video, heatmap premium)
+Job-urile sunt păstrate în SQLite, deci supraviețuiesc repornirii serverului; un pool de
+worker-i le preia în ordinea sosirii. Fiecare job expune starea, procentul de progres și
+rezultatele parțiale per cadru, astfel încât cererea HTTP să nu mai aștepte finalizarea.
+Rezultatele parțiale sunt șterse când rezultatul final este salvat, iar job-urile terminate
+sunt păstrate doar retention_days zile și cel mult max_finished.
+
+Worker-ii rulează în serverul de inferență (inferenceServer.py --jobWorkers N).
+Din linia de comandă se pot adăuga și interoga job-uri:
+    python jobQueue.py submit video <cale_video> [--options '{"skipFrames": 5}']
+    python jobQueue.py status <job_id>
+    python jobQueue.py list [--status queued]
+    python jobQueue.py prune
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import threading
+import traceback
+
+from resultCache import DEFAULT_CACHE_DIR
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+def _json_default(value):
+    # Scalarii numpy din rezultatele modelelor
+    return value.item() if hasattr(value, "item") else str(value)
+
+class JobQueue:
+    def __init__(self, handlers=None, db_dir=None, workers=2, poll_interval=1.0, retention_days=7, max_finished=1000):
+        """
+        Args:
+            handlers: {tip job: funcție(payload, progress)} - progress(procent, rezultate_cadre=None)
+            db_dir: directorul bazei de date (implicit același cu cache-ul de rezultate)
+            workers: numărul de thread-uri care procesează job-uri
+            poll_interval: cât așteaptă un worker liber înainte să verifice din nou coada
+            retention_days: după câte zile sunt șterse job-urile terminate
+            max_finished: numărul maxim de job-uri terminate păstrate (cele mai noi)
+        """
+        self.handlers = handlers or {}
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.max_finished = max(0, int(max_finished))
+        db_dir = db_dir or DEFAULT_CACHE_DIR
+        os.makedirs(db_dir, exist_ok=True)
+        self.db_path = os.path.join(db_dir, "jobs.sqlite")
+
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_frames (
+                job_id TEXT NOT NULL,
+                frame INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, frame)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished_at)")
+        conn.commit()
+
+    def _conn(self):
+        """O conexiune SQLite pentru fiecare thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def submit(self, job_type, payload):
+        """Adaugă un job în coadă și returnează id-ul lui"""
+        if self.handlers and job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = uuid.uuid4().hex
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO jobs (id, type, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, job_type, json.dumps(payload or {}), time.time())
+        )
+        conn.commit()
+
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id, frames_limit=100):
+        """Starea job-ului, cu ultimele rezultate per cadru și rezultatul final dacă există"""
+        conn = self._conn()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        frames_count = conn.execute("SELECT COUNT(*) FROM job_frames WHERE job_id = ?", (job_id,)).fetchone()[0]
+        frame_rows = conn.execute(
+            "SELECT result FROM job_frames WHERE job_id = ? ORDER BY frame DESC LIMIT ?", (job_id, frames_limit)
+        ).fetchall()
+
+        job = self._row_to_dict(row)
+        if row["status"] in FINISHED_STATUSES and isinstance(job["result"], dict):
+            # Rezultatele parțiale au fost șterse; numărul de cadre vine din rezultatul final
+            frames_count = job["result"].get("analysedFrames", frames_count)
+        job["framesProcessed"] = frames_count
+        job["partialResults"] = [json.loads(r["result"]) for r in reversed(frame_rows)]
+        if row["status"] == "queued":
+            job["queuePosition"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?", (row["created_at"],)
+            ).fetchone()[0]
+        return job
+
+    def list(self, status=None, limit=50):
+        conn = self._conn()
+        if status:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_dict(row, include_result=False) for row in rows]
+
+    def prune(self):
+        """Șterge job-urile terminate mai vechi de retention_days și pe cele peste max_finished"""
+        conn = self._conn()
+        placeholders = ",".join("?" for _ in FINISHED_STATUSES)
+        cutoff = time.time() - self.retention_days * 86400
+        expired = conn.execute(
+            f"SELECT id FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+            (*FINISHED_STATUSES, cutoff)
+        ).fetchall()
+        overflow = conn.execute(
+            f"SELECT id FROM jobs WHERE status IN ({placeholders}) ORDER BY finished_at DESC LIMIT -1 OFFSET ?",
+            (*FINISHED_STATUSES, self.max_finished)
+        ).fetchall()
+
+        job_ids = {row["id"] for row in expired} | {row["id"] for row in overflow}
+        for job_id in job_ids:
+            conn.execute("DELETE FROM job_frames WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        conn.commit()
+        return len(job_ids)
+
+    def cancel(self, job_id):
+        """Anulează un job care nu a început încă"""
+        conn = self._conn()
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id)
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def _row_to_dict(row, include_result=True):
+        job = {
+            "jobId": row["id"],
+            "type": row["type"],
+            "status": row["status"],
+            "progress": round(row["progress"], 1),
+            "createdAt": row["created_at"],
+            "startedAt": row["started_at"],
+            "finishedAt": row["finished_at"],
+            "error": row["error"]
+        }
+        if include_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def start(self):
+        """Repune în coadă job-urile întrerupte de o oprire anterioară și pornește worker-ii"""
+        conn = self._conn()
+        # Job-urile repuse în coadă pornesc de la zero, deci rezultatele lor parțiale nu mai sunt valabile
+        conn.execute("DELETE FROM job_frames WHERE job_id IN (SELECT id FROM jobs WHERE status = 'running')")
+        conn.execute("UPDATE jobs SET status = 'queued', progress = 0, started_at = NULL WHERE status = 'running'")
+        conn.commit()
+        self._prune_safely()
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def _claim_next(self):
+        """Preia atomic cel mai vechi job din coadă (sigur și între procese)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"])
+            )
+            conn.commit()
+            return row
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim_next()
+            except sqlite3.Error as e:
+                print(f"Eroare la preluarea unui job: {e}", file=sys.stderr)
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=self.poll_interval)
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job):
+        job_id = job["id"]
+        handler = self.handlers.get(job["type"])
+        conn = self._conn()
+
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job type: {job['type']}")
+
+            result = handler(json.loads(job["payload"]), lambda percent, frames=None: self._progress(job_id, percent, frames))
+            status = "failed" if isinstance(result, dict) and "error" in result else "completed"
+            conn.execute(
+                "UPDATE jobs SET status = ?, progress = 100, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, default=_json_default),
+                 result.get("error") if status == "failed" else None, time.time(), job_id)
+            )
+        except Exception as e:
+            print(f"Job-ul {job_id} a eșuat: {e}\n{traceback.format_exc()}", file=sys.stderr)
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (str(e), time.time(), job_id)
+            )
+        # Rezultatul final este salvat: rezultatele parțiale per cadru nu mai sunt necesare
+        conn.execute("DELETE FROM job_frames WHERE job_id = ?", (job_id,))
+        conn.commit()
+        self._prune_safely()
+
+    def _prune_safely(self):
+        try:
+            self.prune()
+        except sqlite3.Error as e:
+            print(f"Ștergerea job-urilor vechi a eșuat: {e}", file=sys.stderr)
+
+    def _progress(self, job_id, percent, frames=None):
+        """Apelat de handler: actualizează procentul și salvează rezultatele per cadru noi"""
+        conn = self._conn()
+        conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (max(0.0, min(float(percent), 99.9)), job_id))
+        for frame in frames or []:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_frames (job_id, frame, result) VALUES (?, ?, ?)",
+                (job_id, int(frame["frame"]), json.dumps(frame, default=_json_default))
+            )
+        conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or submit jobs in the persistent analysis queue')
+    parser.add_argument('--dbDir', default=None, help='Directory of the job database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    submit_parser = subparsers.add_parser('submit', help='Queue a new job')
+    submit_parser.add_argument('type', help='Job type (video, premiumHeatmap)')
+    submit_parser.add_argument('inputPath', help='Path to the media file')
+    submit_parser.add_argument('--options', default='{}', help='Extra job options as JSON')
+
+    status_parser = subparsers.add_parser('status', help='Show a job')
+    status_parser.add_argument('jobId')
+
+    list_parser = subparsers.add_parser('list', help='List recent jobs')
+    list_parser.add_argument('--status', choices=JOB_STATUSES)
+
+    cancel_parser = subparsers.add_parser('cancel', help='Cancel a queued job')
+    cancel_parser.add_argument('jobId')
+
+    subparsers.add_parser('prune', help='Delete finished jobs past the retention limits')
+
+    args = parser.parse_args()
+    jobs = JobQueue(db_dir=args.dbDir)
+
+    if args.command == 'submit':
+        payload = json.loads(args.options)
+        payload["inputPath"] = os.path.abspath(args.inputPath)
+        output = {"jobId": jobs.submit(args.type, payload), "status": "queued"}
+    elif args.command == 'status':
+        output = jobs.get(args.jobId) or {"error": f"Job not found: {args.jobId}"}
+    elif args.command == 'list':
+        output = {"jobs": jobs.list(args.status)}
+    elif args.command == 'prune':
+        output = {"deleted": jobs.prune()}
+    else:
+        output = {"cancelled": jobs.cancel(args.jobId)}
+
+    print(json.dumps(output, indent=2))
+
+if __name__ == "__main__":
+    main()
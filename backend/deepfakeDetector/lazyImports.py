@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importuri amânate și profilarea pornirii pentru scripturile CLI
+lazy_import înregistrează modulul imediat, dar îl execută abia la primul acces la un atribut,
+deci TensorFlow nu mai este încărcat pe căile care nu ating modelele (fișier lipsă, cache hit,
+rezultat mock).
+
+Cu --profileStartup, start_profiler măsoară durata fiecărui import de la nivelul scriptului și
+etapele marcate cu profiler.stage(...), iar la ieșire scrie raportul JSON pe stderr.
+"""
+
+import sys
+import json
+import time
+import atexit
+import builtins
+import importlib.util
+from contextlib import contextmanager, nullcontext
+
+_lazy_modules = {}
+
+def lazy_import(name):
+    """Returnează modulul, executat abia la prima utilizare"""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _lazy_modules[name] = module
+    return module
+
+def _is_loaded(module):
+    # LazyLoader schimbă clasa modulului înapoi la ModuleType după prima utilizare
+    return type(module).__name__ != "_LazyModule"
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports = []
+        self.stages = []
+        self._depth = 0
+        self._reported = False
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        atexit.register(self.report)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Doar importurile absolute care încarcă efectiv un modul nou
+        if level != 0 or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.imports.append((name, time.perf_counter() - start, self._depth))
+
+    @contextmanager
+    def stage(self, name):
+        """Măsoară o etapă (ex. model_load); importurile amânate declanșate aici intră în etapă"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self):
+        """Scrie raportul o singură dată (la ieșire sau explicit, ex. după pornirea serverului)"""
+        if self._reported:
+            return
+        self._reported = True
+        builtins.__import__ = self._original_import
+        # Importurile de la nivelul scriptului (depth 0), durata include sub-modulele
+        top_level = sorted((entry for entry in self.imports if entry[2] == 0), key=lambda entry: -entry[1])
+        profile = {
+            "totalMs": round((time.perf_counter() - self.started) * 1000, 1),
+            "importsMs": round(sum(entry[1] for entry in top_level) * 1000, 1),
+            "imports": [{"module": name, "ms": round(seconds * 1000, 1)} for name, seconds, _ in top_level[:25]],
+            "stages": [{"stage": name, "ms": round(seconds * 1000, 1)} for name, seconds in self.stages],
+            "lazyModules": {name: _is_loaded(module) for name, module in _lazy_modules.items()}
+        }
+        print(json.dumps({"startupProfile": profile}), file=sys.stderr)
+
+class _NullProfiler:
+    def stage(self, name):
+        return nullcontext()
+
+    def report(self):
+        pass
+
+_profiler = None
+
+def start_profiler(argv=None):
+    """Pornește profilarea dacă scriptul a primit --profileStartup; trebuie apelat înaintea celorlalte importuri"""
+    global _profiler
+    if _profiler is None and "--profileStartup" in (argv if argv is not None else sys.argv):
+        _profiler = StartupProfiler()
+    return get_profiler()
+
+def get_profiler():
+    return _profiler or _NullProfiler()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-batching dinamic pentru DeepfakeDetector
+Colectează cererile concurente de imagini timp de cel mult max_wait_ms sau până la
+max_batch_size imagini, le stivuiește într-un singur tensor și rulează fiecare model
+din ensemble o singură dată pe batch. Tot pe batch sunt calculate și statisticile MC dropout
+pentru încredere, partea cea mai scumpă a unei predicții.
+Cu cascada activă, modelul ușor evaluează tot batch-ul, iar doar imaginile din banda de
+incertitudine ajung la ensemble și la MC dropout.
+Batch-ul rulează sub detector.model_lock, lock-ul pe care îl ia fiecare apel de model al
+detectorului, deci nu se suprapune cu analizele din alte thread-uri.
+"""
+
+import sys
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+from concurrent.futures import Future
+
+# Eșantioanele MC dropout per imagine, ca în getConsistentScoring
+MC_SAMPLES = 7
+
+# Timpii de așteptare păstrați pentru percentile (ultimele cereri)
+WAIT_SAMPLES = 1000
+
+class MicroBatchScheduler:
+    def __init__(self, detector, max_batch_size=8, max_wait_ms=10, lock=None):
+        """
+        Args:
+            detector: instanța DeepfakeDetector deja încărcată
+            max_batch_size: numărul maxim de imagini dintr-un batch
+            max_wait_ms: cât așteaptă primul request din batch după alte cereri
+            lock: lock-ul care serializează accesul la modele (implicit detector.model_lock)
+        """
+        self.detector = detector
+        self.lock = lock or detector.model_lock
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._full_batches = 0
+        self._escalated = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_times = deque(maxlen=WAIT_SAMPLES)
+        self._running = True
+
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, img):
+        """
+        Pune în coadă o imagine preprocesată (H, W, C) și returnează un Future cu
+        (ieșirea din predictBatch, statisticile MC dropout sau None, scorul ușor, informația de cascadă).
+        Fără cascadă ultimele două sunt None; pentru imaginile rezolvate de modelul ușor ieșirea este None.
+        """
+        future = Future()
+        self._queue.put((img, future, time.time()))
+        return future
+
+    def predict(self, imagePath):
+        """Echivalentul lui DeepfakeDetector.predict, cu predicția rulată în batch-uri partajate"""
+        try:
+            startTime = time.time()
+
+            img = self.detector.loadImageForModel(imagePath)
+            if img is None:
+                return {"error": f"Could not load image from {imagePath}"}
+
+            reused, hash_value = self.detector.findNearDuplicate(img, imagePath, startTime)
+            if reused is not None:
+                return reused
+
+            try:
+                batch_output, confidence_stats, light_score, cascade_info = self.submit(img).result()
+            except Exception as pred_error:
+                if self.detector.ensemble_models and len(self.detector.ensemble_models) > 1:
+                    return {"error": str(pred_error)}
+                return {"error": f"Prediction failed: {str(pred_error)}"}
+
+            if batch_output is None:
+                result = self.detector.buildLightResult(light_score, imagePath, startTime, cascade_info)
+            else:
+                # Un eventual pas de gradient (statistici lipsă) ia singur detector.model_lock
+                result = self.detector.buildPredictionResult(
+                    batch_output, img, imagePath, startTime, confidence_stats=confidence_stats
+                )
+                if cascade_info is not None:
+                    result["debugInfo"]["cascade"] = cascade_info
+            if self.detector.perceptual_index is not None:
+                self.detector.perceptual_index.add(img, result, source=imagePath, hash_value=hash_value)
+            return result
+
+        except Exception as e:
+            return {"error": f"Prediction error: {str(e)}"}
+
+    def _collect_batch(self):
+        """Blochează până la primul request, apoi adună altele până la limită sau deadline"""
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                break
+
+            started = time.time()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            with self._stats_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._full_batches += int(len(batch) == self.max_batch_size)
+                self._wait_total += sum(waits)
+                self._wait_max = max(self._wait_max, max(waits))
+                self._wait_times.extend(waits)
+
+            try:
+                stacked = np.stack([img for img, _, _ in batch], axis=0)
+                light_scores, escalated = self._cascade_split(stacked)
+
+                results = [None] * len(batch)
+                if escalated:
+                    with self.lock:
+                        outputs = self.detector.predictBatch(stacked[escalated])
+                        # None dacă nu se poate pe batch: încrederea este calculată atunci per imagine
+                        confidence_stats = self.detector.batchConfidenceStats(stacked[escalated], MC_SAMPLES)
+                    for j, (i, output) in enumerate(zip(escalated, outputs)):
+                        results[i] = (output, confidence_stats[j] if confidence_stats else None)
+
+                cascade = self.detector.cascade
+                for i, (_, future, _) in enumerate(batch):
+                    if light_scores is None:
+                        future.set_result(results[i] + (None, None))
+                    else:
+                        light_score = float(light_scores[i])
+                        info = cascade.debug_info(light_score, results[i] is not None)
+                        output, stats = results[i] if results[i] is not None else (None, None)
+                        future.set_result((output, stats, light_score, info))
+            except Exception as e:
+                print(f"Eroare la batch-ul de {len(batch)} imagini: {e}", file=sys.stderr)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _cascade_split(self, stacked):
+        """
+        Scorurile modelului ușor și indicii imaginilor escaladate la ensemble.
+        Fără cascadă (sau dacă modelul ușor eșuează) toate imaginile merg la ensemble.
+        """
+        cascade = self.detector.cascade
+        if cascade is None:
+            return None, list(range(len(stacked)))
+
+        try:
+            with self.lock:
+                light_scores = cascade.score(stacked)
+        except Exception as cascade_error:
+            print(f"Modelul ușor al cascadei a eșuat, folosesc ensemble-ul: {cascade_error}", file=sys.stderr)
+            return None, list(range(len(stacked)))
+
+        escalated = [i for i, score in enumerate(light_scores) if cascade.should_escalate(score)]
+        cascade.record(len(stacked), len(escalated))
+        with self._stats_lock:
+            self._escalated += len(escalated)
+        return light_scores, escalated
+
+    def stats(self):
+        """Cât de pline au fost batch-urile și cât au așteptat cererile"""
+        with self._stats_lock:
+            batches, requests, full_batches = self._batches, self._requests, self._full_batches
+            escalated = self._escalated
+            wait_total, wait_max = self._wait_total, self._wait_max
+            waits = list(self._wait_times)
+
+        if not batches:
+            return {
+                "batches": 0,
+                "requests": 0,
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": round(self.max_wait * 1000, 2)
+            }
+
+        # Media și maximul acoperă toate cererile; percentilele, ultimele WAIT_SAMPLES
+        waits_ms = np.array(waits) * 1000
+        average_size = requests / batches
+        stats = {
+            "batches": batches,
+            "requests": requests,
+            "maxBatchSize": self.max_batch_size,
+            "maxWaitMs": round(self.max_wait * 1000, 2),
+            "averageBatchSize": round(average_size, 2),
+            "averageBatchFill": round(average_size / self.max_batch_size * 100, 2),
+            "fullBatches": full_batches,
+            "waitMs": {
+                "mean": round(wait_total / requests * 1000, 2),
+                "p50": round(float(np.percentile(waits_ms, 50)), 2),
+                "p95": round(float(np.percentile(waits_ms, 95)), 2),
+                "max": round(wait_max * 1000, 2)
+            }
+        }
+        if self.detector.cascade is not None:
+            # Câte imagini din batch-uri au ajuns la ensemble după modelul ușor
+            stats["escalated"] = escalated
+            stats["escalatedFraction"] = round(escalated / requests, 4)
+        return stats
+
+    def close(self):
+        """Oprește thread-ul de batching după ce termină cererile deja preluate"""
+        self._queue.put(None)
+        self._worker.join(timeout=5)
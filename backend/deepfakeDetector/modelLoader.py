@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Artefacte de model doar pentru inferență
+Fiecare model .keras din savedModel/ și modelAntrenat/ poate fi exportat (exportInferenceModels.py)
+într-o copie fără starea optimizer-ului și fără configurația de compilare, în subdirectorul
+inference/ de lângă original. Copia se încarcă cu compile=False, deci fără deserializarea
+variabilelor optimizer-ului și fără custom_objects pentru loss-uri și metrici.
+
+Un manifest JSON lângă artefact reține dimensiunea și mtime-ul originalului și versiunea
+TensorFlow; dacă originalul a fost înlocuit, artefactul este ignorat până la un nou export.
+"""
+
+import os
+import sys
+import json
+import time
+
+from lazyImports import lazy_import
+
+tf = lazy_import("tensorflow")
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIRS = (os.path.join(current_dir, "savedModel"), os.path.join(current_dir, "modelAntrenat"))
+INFERENCE_SUBDIR = "inference"
+
+def inference_artifact_path(model_path):
+    model_path = os.path.abspath(model_path)
+    return os.path.join(os.path.dirname(model_path), INFERENCE_SUBDIR, os.path.basename(model_path))
+
+def _manifest_path(artifact_path):
+    return artifact_path + ".json"
+
+def source_signature(model_path):
+    stat = os.stat(model_path)
+    return {"sourceSize": stat.st_size, "sourceMtimeNs": stat.st_mtime_ns}
+
+def current_artifact(model_path):
+    """Calea artefactului dacă există și corespunde originalului și versiunii TensorFlow, altfel None"""
+    artifact_path = inference_artifact_path(model_path)
+    try:
+        with open(_manifest_path(artifact_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        signature = source_signature(model_path)
+    except (OSError, ValueError):
+        return None
+
+    if not os.path.isfile(artifact_path):
+        return None
+    if any(manifest.get(key) != value for key, value in signature.items()):
+        return None
+    if manifest.get("tfVersion") != tf.__version__:
+        return None
+    return artifact_path
+
+def load_inference_model(model_path, custom_objects=None, compile=True, prefer_artifact=True):
+    """
+    Încarcă modelul pentru inferență: artefactul exportat dacă este la zi, altfel originalul.
+    compile se aplică doar originalului (comportamentul de până acum al apelantului);
+    artefactul nu are configurație de compilare.
+    """
+    artifact_path = current_artifact(model_path) if prefer_artifact else None
+    if artifact_path is not None:
+        try:
+            model = tf.keras.models.load_model(artifact_path, compile=False)
+            print(f"Artefact de inferență încărcat: {artifact_path}", file=sys.stderr)
+            return model
+        except Exception as e:
+            print(f"Artefactul {artifact_path} nu a putut fi încărcat, folosesc originalul: {e}", file=sys.stderr)
+
+    return tf.keras.models.load_model(model_path, custom_objects=custom_objects, compile=compile)
+
+def ensure_compiled(model, optimizer="adam"):
+    """Compilează un model încărcat doar pentru inferență, înainte de evaluate() sau fit()"""
+    if getattr(model, "optimizer", None) is None:
+        model.compile(
+            optimizer=optimizer,
+            loss="binary_crossentropy",
+            metrics=["accuracy", tf.keras.metrics.AUC(name="auc")]
+        )
+    return model
+
+def export_inference_model(model_path, force=False, custom_objects=None):
+    """
+    Exportă artefactul de inferență pentru un model. Returnează un dicționar cu rezultatul;
+    erorile sunt raportate ca {"error": ...}, ca în restul scripturilor.
+    """
+    artifact_path = inference_artifact_path(model_path)
+    if not force and current_artifact(model_path) is not None:
+        return {"model": model_path, "artifact": artifact_path, "status": "up-to-date"}
+
+    started = time.time()
+    try:
+        # compile=False: optimizer-ul și loss-urile custom nu sunt deserializate, deci nici salvate
+        model = tf.keras.models.load_model(model_path, custom_objects=custom_objects, compile=False)
+        os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+        tmp_path = artifact_path + ".tmp.keras"
+        model.save(tmp_path)
+        os.replace(tmp_path, artifact_path)
+    except Exception as e:
+        return {"model": model_path, "error": f"Export failed: {str(e)}"}
+
+    manifest = {
+        "source": os.path.abspath(model_path),
+        "tfVersion": tf.__version__,
+        "exportedAt": time.strftime("%Y-%m-%d %H:%M:%S"),
+        **source_signature(model_path)
+    }
+    with open(_manifest_path(artifact_path), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return {
+        "model": model_path,
+        "artifact": artifact_path,
+        "status": "exported",
+        "sourceBytes": manifest["sourceSize"],
+        "artifactBytes": os.path.getsize(artifact_path),
+        "exportTime": round(time.time() - started, 3)
+    }
+
+def discover_models(model_dirs=MODEL_DIRS):
+    """Modelele .keras din directoarele de modele (fără artefactele deja exportate)"""
+    models = []
+    for model_dir in model_dirs:
+        if not os.path.isdir(model_dir):
+            continue
+        for name in sorted(os.listdir(model_dir)):
+            path = os.path.join(model_dir, name)
+            if name.endswith(".keras") and os.path.isfile(path):
+                models.append(path)
+    return models
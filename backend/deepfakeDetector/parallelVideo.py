@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analiză video paralelă pe segmente, în procese separate
+Video-ul este împărțit în N intervale de cadre consecutive. Fiecare proces worker face seek la
+începutul intervalului său, decodează doar acel interval și evaluează cadrele eșantionate în
+batch-uri, cu aceeași grilă stride ca VideoPipeline (cadrul n este eșantionat dacă n % skipFrames == 0),
+deci cadrele evaluate sunt aceleași ca la analiza secvențială. Rezultatele per cadru sunt
+unite în ordine în aceleași câmpuri de sumar (averageFakeScore, percentDeepfake, framesPerSecond).
+
+Worker-ii sunt procese noi (spawn), nu fork-uri ale părintelui: TensorFlow nu este sigur după
+fork odată ce modelele sunt încărcate și thread pool-urile lui pornite. Fiecare worker își
+încarcă propriul detector cu aceleași argumente ca părintele (artefactul de inferență din
+modelLoader, dacă este exportat), cu TensorFlow limitat la cota lui de nuclee, astfel încât
+N worker-i să nu concureze pentru aceleași nuclee. Încărcarea intră în processingTime și este
+raportată per segment (loadSeconds).
+"""
+
+import os
+import sys
+import time
+import multiprocessing
+import numpy as np
+import cv2
+
+from videoPipeline import summarize_frames
+
+# Detectorul încărcat de _init_worker în fiecare proces worker
+_DETECTOR = None
+_LOAD_SECONDS = None
+_LOAD_ERROR = None
+
+def _init_worker(load_args, cascade_args, threads):
+    """Inițializarea worker-ului: limitele de thread-uri, apoi detectorul"""
+    global _DETECTOR, _LOAD_SECONDS, _LOAD_ERROR
+    started = time.time()
+    # Limitele trebuie stabilite înainte de prima operație TensorFlow din proces
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    cv2.setNumThreads(1)
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+        from customModel import DeepfakeDetector
+        detector = DeepfakeDetector(**load_args)
+        if cascade_args is not None:
+            detector.enableCascade(*cascade_args)
+        if not detector.model_loaded:
+            raise RuntimeError("models could not be loaded in the worker process")
+        _DETECTOR = detector
+    except Exception as e:
+        # O excepție în initializer ar face pool-ul să repornească worker-ul la nesfârșit
+        _LOAD_ERROR = str(e)
+    _LOAD_SECONDS = round(time.time() - started, 3)
+
+def split_segments(total_frames, workers):
+    """Intervale [start, end) de poziții (de la 0), de lungimi aproape egale"""
+    workers = max(1, min(int(workers), total_frames))
+    bounds = np.linspace(0, total_frames, workers + 1, dtype=int)
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def _analyze_segment(task):
+    """Worker: decodează și evaluează un segment; returnează rezultatele per cadru și timpii"""
+    video_path, start, end, skip_frames, batch_size = task
+    detector = _DETECTOR
+    if detector is None:
+        return {"start": start, "end": end, "error": f"Worker initialization failed: {_LOAD_ERROR}",
+                "loadSeconds": _LOAD_SECONDS}
+
+    started = time.time()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return {"start": start, "end": end, "error": f"Could not open video file: {video_path}"}
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    results, batch, indices = [], [], []
+    infer_time = 0.0
+
+    def flush():
+        nonlocal infer_time
+        infer_start = time.time()
+        for frame_index, score in zip(indices, detector.scoreBatch(np.stack(batch, axis=0))):
+            results.append({
+                "frame": frame_index,
+                "fakeScore": round(score["fakeScore"], 2),
+                "confidenceScore": round(score["confidenceScore"], 2),
+                "isDeepfake": score["isDeepfake"]
+            })
+        infer_time += time.time() - infer_start
+        batch.clear()
+        indices.clear()
+
+    decoded_until = start
+    try:
+        for position in range(start, end):
+            if not cap.grab():
+                break
+            decoded_until = position + 1
+            # Numerotarea de la 1, ca în stride_frames
+            frame_index = position + 1
+            if frame_index % skip_frames:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            batch.append(detector.preprocessArray(frame))
+            indices.append(frame_index)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except Exception as e:
+        return {"start": start, "end": end, "error": str(e), "results": results}
+    finally:
+        cap.release()
+
+    return {
+        "start": start,
+        "end": end,
+        "decodedUntil": decoded_until,
+        "results": results,
+        "seconds": round(time.time() - started, 3),
+        "inferenceTime": round(infer_time, 3),
+        "loadSeconds": _LOAD_SECONDS,
+        "pid": os.getpid()
+    }
+
+def analyze_parallel(detector, video_path, workers=None, skip_frames=5, batch_size=16):
+    """
+    Analizează video-ul cu `workers` procese (implicit numărul de nuclee).
+    Returnează același JSON ca predictVideo în modul stride, plus debugInfo.parallel.
+    Worker-ii încarcă modelele cu detector.load_args; detectorul părintelui nu este partajat.
+    """
+    start_time = time.time()
+    skip_frames = max(1, int(skip_frames))
+    workers = int(workers or os.cpu_count() or 1)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return {"error": f"Could not open video file: {video_path}"}
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    # Fără numărul de cadre nu există segmente pentru seek; predicțiile mock nu pot fi reproduse în worker-i
+    if workers <= 1 or total_frames <= 0 or not detector.model_loaded:
+        print("Analiza paralelă nu este posibilă aici, rulez pipeline-ul secvențial", file=sys.stderr)
+        return detector.predictVideo(video_path, skipFrames=skip_frames, batchSize=batch_size)
+
+    segments = split_segments(total_frames, workers)
+    tasks = [(video_path, start, end, skip_frames, batch_size) for start, end in segments]
+    # Fiecare worker primește o cotă egală din nuclee pentru thread-urile TensorFlow
+    threads = max(1, (os.cpu_count() or 1) // len(tasks))
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=len(tasks), initializer=_init_worker,
+                      initargs=(detector.load_args, detector.cascade_args, threads)) as pool:
+        # Segmentele revin în ordinea lor, deci cadrele rămân ordonate
+        segment_outputs = pool.map(_analyze_segment, tasks, chunksize=1)
+
+    results = []
+    errors = []
+    for output in segment_outputs:
+        results.extend(output.get("results", []))
+        if "error" in output:
+            errors.append(f"frames {output['start']}-{output['end']}: {output['error']}")
+    for error in errors:
+        print(f"Eroare în segmentul video {error}", file=sys.stderr)
+
+    if not results:
+        return {"error": "No frames could be processed"}
+
+    frame_count = max(output.get("decodedUntil", 0) for output in segment_outputs)
+    processing_time = time.time() - start_time
+
+    return {
+        **summarize_frames(results, frame_count, processing_time),
+        "analysisTime": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "fileName": os.path.basename(video_path),
+        "debugInfo": {
+            "model_loaded": detector.model_loaded,
+            "input_shape": detector.inputShape,
+            "total_video_frames": total_frames,
+            "video_fps": fps,
+            "sampling": {"mode": "stride", "requestedMode": "stride", "skipFrames": skip_frames},
+            "ensemble_used": len(detector.ensemble_models) > 1,
+            "parallel": {
+                "workers": len(tasks),
+                "startMethod": "spawn",
+                "threadsPerWorker": threads,
+                "cpuCount": os.cpu_count(),
+                "batchSize": batch_size,
+                "segments": [
+                    {
+                        "frames": [output["start"] + 1, output["end"]],
+                        "analysedFrames": len(output.get("results", [])),
+                        "seconds": output.get("seconds"),
+                        "inferenceTime": output.get("inferenceTime"),
+                        "loadSeconds": output.get("loadSeconds"),
+                        "error": output.get("error")
+                    }
+                    for output in segment_outputs
+                ]
+            }
+        },
+        "frameResults": results[:10]  # Limit frame results to first 10 for JSON size
+    }
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index de hash-uri perceptuale pentru aproape-duplicate
+Imaginile (și cadrele video eșantionate) deja analizate sunt indexate după pHash sau dHash,
+calculat pe aceeași imagine pe care o vede modelul (cv2.imread + resize). O imagine redimensionată,
+recomprimată sau ușor decupată are un hash apropiat în distanță Hamming, deci rezultatul anterior
+poate fi refolosit fără a rula modelele.
+
+Căutarea folosește un BK-tree în memorie, reconstruit din baza SQLite la pornire.
+Indexul are o capacitate maximă de intrări, cu evicție LRU ca ResultCache.
+Atenție: un deepfake obținut dintr-o fotografie reală poate diferi doar în zona feței, deci
+distanța maximă trebuie să rămână mică.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+import numpy as np
+import cv2
+
+from resultCache import DEFAULT_CACHE_DIR, model_fingerprint
+
+HASH_METHODS = ("phash", "dhash")
+
+# Latențele păstrate pentru statistici (ultimele căutări)
+LATENCY_SAMPLES = 1000
+
+def _to_gray(img):
+    """Imagine uint8 grayscale din formatul modelului (RGB float [0, 1]) sau dintr-o imagine BGR uint8"""
+    if img.dtype != np.uint8:
+        img = np.clip(img * 255.0, 0, 255).astype(np.uint8)
+        return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def dhash(img, hash_size=8):
+    """Difference hash: compară pixelii vecini pe orizontală"""
+    gray = cv2.resize(_to_gray(img), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(gray[:, 1:] > gray[:, :-1])
+
+def phash(img, hash_size=8, highfreq_factor=4):
+    """Perceptual hash: semnul coeficienților DCT de frecvență joasă față de mediană"""
+    size = hash_size * highfreq_factor
+    gray = cv2.resize(_to_gray(img), (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(gray)[:hash_size, :hash_size]
+    # Componenta continuă (DC) nu participă la mediană
+    median = np.median(low.flatten()[1:])
+    return _bits_to_int(low > median)
+
+def _json_default(value):
+    # Scalarii numpy din debugInfo
+    return value.item() if hasattr(value, "item") else str(value)
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class BKTree:
+    """BK-tree pe distanța Hamming; fiecare nod păstrează toate intrările cu același hash"""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+        self.nodes = 0
+
+    def add(self, hash_value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_value, [item], {}]
+            self.nodes = 1
+            return
+
+        node = self.root
+        while True:
+            distance = hamming(hash_value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, [item], {}]
+                self.nodes += 1
+                return
+            node = child
+
+    def remove(self, hash_value, item):
+        """Scoate intrarea; nodul rămâne în arbore ca punct de ramificare (vezi PerceptualIndex._evict)"""
+        node = self.root
+        while node is not None:
+            distance = hamming(hash_value, node[0])
+            if distance == 0:
+                if item in node[1]:
+                    node[1].remove(item)
+                    self.size -= 1
+                    return True
+                return False
+            node = node[2].get(distance)
+        return False
+
+    def search(self, hash_value, max_distance):
+        """Returnează (distanță, intrare) pentru toate intrările aflate la cel mult max_distance"""
+        if self.root is None:
+            return []
+
+        matches = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(hash_value, node[0])
+            if distance <= max_distance:
+                matches.extend((distance, item) for item in node[1])
+            # Inegalitatea triunghiului limitează subarborii care pot conține potriviri
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+class PerceptualIndex:
+    def __init__(self, model_paths, confidence_temperature=1.0, index_dir=None, max_distance=4, method="phash",
+                 max_entries=20000):
+        """
+        Args:
+            model_paths: modelele care produc rezultatele (rezultatele altor modele sunt ignorate)
+            index_dir: directorul bazei de date (implicit același cu cache-ul de rezultate)
+            max_distance: distanța Hamming maximă (din 64 de biți) considerată aproape-duplicat
+            method: "phash" sau "dhash"
+            max_entries: numărul maxim de hash-uri păstrate (toate modelele), cu evicție LRU
+        """
+        if method not in HASH_METHODS:
+            raise ValueError(f"Unknown hash method: {method}")
+
+        self.method = method
+        self.max_distance = int(max_distance)
+        self.max_entries = max(1, int(max_entries))
+        self.fingerprint = model_fingerprint(model_paths, confidence_temperature) or "no-model"
+        self.index_dir = index_dir or DEFAULT_CACHE_DIR
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.index_dir, "perceptual.sqlite"), timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                method TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                model_fingerprint TEXT NOT NULL,
+                source TEXT,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL DEFAULT 0
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(hashes)")]
+        if "last_access" not in columns:
+            # Baze create înainte de evicție: ordinea LRU pornește de la momentul creării
+            self._conn.execute("ALTER TABLE hashes ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE hashes SET last_access = created_at")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_model ON hashes(model_fingerprint, method)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_hashes_access ON hashes(last_access)")
+        self._conn.commit()
+
+        self._trees = {}
+        self._lookups = 0
+        self._hits = 0
+        self._evicted = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+        self._load()
+
+    def _load(self):
+        """Reconstruiește BK-tree-urile (câte unul pentru imagini și pentru cadre) din baza de date"""
+        self._trees = {}
+        rows = self._conn.execute(
+            "SELECT id, kind, hash FROM hashes WHERE model_fingerprint = ? AND method = ?",
+            (self.fingerprint, self.method)
+        ).fetchall()
+        for row_id, kind, hash_hex in rows:
+            self._tree(kind).add(int(hash_hex, 16), row_id)
+
+    def _tree(self, kind):
+        tree = self._trees.get(kind)
+        if tree is None:
+            tree = self._trees[kind] = BKTree()
+        return tree
+
+    def hash(self, img):
+        return phash(img) if self.method == "phash" else dhash(img)
+
+    def lookup(self, img, kind="image", hash_value=None, commit=True):
+        """
+        Caută cel mai apropiat rezultat anterior. Returnează (rezultat, distanță) sau (None, None).
+        img este imaginea în formatul modelului sau BGR uint8.
+        commit=False lasă actualizarea LRU pentru următorul commit() (ex. o dată per batch video)
+        """
+        started = time.perf_counter()
+        hash_value = self.hash(img) if hash_value is None else hash_value
+
+        with self._lock:
+            matches = self._tree(kind).search(hash_value, self.max_distance)
+            result, distance = None, None
+            if matches:
+                distance, row_id = min(matches)
+                row = self._conn.execute("SELECT result FROM hashes WHERE id = ?", (row_id,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._conn.execute("UPDATE hashes SET last_access = ? WHERE id = ?", (time.time(), row_id))
+                    if commit:
+                        self._conn.commit()
+                else:
+                    distance = None
+
+            self._lookups += 1
+            if result is not None:
+                self._hits += 1
+            self._latencies.append((time.perf_counter() - started) * 1000)
+        return result, distance
+
+    def add(self, img, result, kind="image", source=None, hash_value=None, commit=True):
+        """
+        Indexează rezultatul unei analize; erorile și rezultatele mock nu sunt păstrate.
+        commit=False amână commit-ul și evicția până la commit() (ex. o dată per batch video)
+        """
+        if not isinstance(result, dict) or "error" in result:
+            return False
+        debug_info = result.get("debugInfo")
+        if isinstance(debug_info, dict) and debug_info.get("mock_data"):
+            return False
+
+        hash_value = self.hash(img) if hash_value is None else hash_value
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO hashes (kind, method, hash, model_fingerprint, source, result, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, self.method, format(hash_value, "016x"), self.fingerprint, source,
+                 json.dumps(result, separators=(',', ':'), default=_json_default), now, now)
+            )
+            self._tree(kind).add(hash_value, cursor.lastrowid)
+            if commit:
+                self._evict()
+                self._conn.commit()
+        return True
+
+    def commit(self):
+        """Salvează adăugările și actualizările LRU amânate, după evicție"""
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Șterge hash-urile folosite cel mai de demult peste max_entries (apelat cu lock-ul luat)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+
+        rows = self._conn.execute(
+            "SELECT id, kind, method, hash, model_fingerprint FROM hashes ORDER BY last_access ASC LIMIT ?", (excess,)
+        ).fetchall()
+        for row_id, kind, method, hash_hex, fingerprint in rows:
+            self._conn.execute("DELETE FROM hashes WHERE id = ?", (row_id,))
+            if method == self.method and fingerprint == self.fingerprint and kind in self._trees:
+                self._trees[kind].remove(int(hash_hex, 16), row_id)
+        self._evicted += len(rows)
+
+        # Nodurile golite rămân în BK-tree; arborele este reconstruit când ele devin majoritare
+        if any(tree.nodes > 2 * tree.size + 64 for tree in self._trees.values()):
+            self._load()
+
+    def stats(self):
+        """Rata de hit și latența căutărilor din procesul curent"""
+        with self._lock:
+            latencies = list(self._latencies)
+            lookups, hits, evicted = self._lookups, self._hits, self._evicted
+            sizes = {kind: tree.size for kind, tree in self._trees.items()}
+
+        stats = {
+            "method": self.method,
+            "maxDistance": self.max_distance,
+            "entries": sizes,
+            "maxEntries": self.max_entries,
+            "evicted": evicted,
+            "lookups": lookups,
+            "hits": hits,
+            "hitRate": round(hits / lookups * 100, 2) if lookups else 0.0
+        }
+        if latencies:
+            stats["lookupMs"] = {
+                "mean": round(float(np.mean(latencies)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3),
+                "max": round(float(np.max(latencies)), 3)
+            }
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def open_index(model_paths, confidence_temperature=1.0, index_dir=None, max_distance=4, method="phash",
+               max_entries=20000):
+    """Deschide indexul; o eroare dezactivează doar reutilizarea rezultatelor, nu analiza"""
+    try:
+        return PerceptualIndex(model_paths, confidence_temperature, index_dir, max_distance, method, max_entries)
+    except Exception as e:
+        print(f"Index perceptual indisponibil: {e}", file=sys.stderr)
+        return None
+
+def load_model_view(image_path, image_size):
+    """Imaginea așa cum o vede modelul în predict (cv2.imread + resize), pentru hash înainte de încărcarea modelelor"""
+    img = cv2.imread(image_path)
+    if img is None:
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, (image_size, image_size))
+    return img.astype('float32') / 255.0
+
+def mark_reused(result, distance, input_path, start_time, index):
+    """Adaptează un rezultat refolosit la fișierul curent"""
+    result["fileName"] = os.path.basename(input_path)
+    result["processingTime"] = round(time.time() - start_time, 3)
+    result["analysisTime"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    if not isinstance(result.get("debugInfo"), dict):
+        result["debugInfo"] = {}
+    result["debugInfo"]["perceptualMatch"] = {
+        "hit": True,
+        "distance": distance,
+        "index": index.stats()
+    }
+    return result
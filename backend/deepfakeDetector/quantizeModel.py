@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cuantizare post-antrenare a unui model .keras în variante TFLite int8 și float16
+Calibrarea int8 folosește imaginile dintr-un director cu structura real/ + fake/ (aceeași ca
+evaluateModel.SimpleDataGenerator), preprocesate exact ca în DeepfakeDetector (RGB, [0, 1]).
+
+După conversie, fiecare variantă (inclusiv modelul float32 de referință) este evaluată într-un
+proces separat: AUC, acuratețe, latența p50/p99 pe o imagine și memoria (RSS maxim, dimensiunea
+fișierului). Raportul comparativ este salvat lângă variante și afișat ca JSON.
+
+Utilizare:
+    python quantizeModel.py --model savedModel/model_xception.keras --calibrationDir date/validare [--evalDir date/test]
+    python deepfakeDetector.py imagine.jpg --backend int8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from glob import glob
+
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from tfliteBackend import BACKENDS, TFLiteModel, quantized_model_path, write_manifest
+
+VARIANTS = tuple(backend for backend in BACKENDS if backend != "keras")
+
+def labeled_images(directory, limit=None):
+    """(cale, etichetă) din directory/real (0) și directory/fake (1), jumătate din fiecare clasă"""
+    per_class = None if limit is None else max(1, limit // 2)
+    samples = []
+    for label, name in ((0, "real"), (1, "fake")):
+        class_dir = os.path.join(directory, name)
+        files = sorted(
+            glob(os.path.join(class_dir, "*.jpg")) + glob(os.path.join(class_dir, "*.jpeg")) + glob(os.path.join(class_dir, "*.png"))
+        )
+        samples.extend((path, label) for path in files[:per_class])
+    return samples
+
+def load_image(path, image_size):
+    """Aceeași preprocesare ca DeepfakeDetector.preprocessArray"""
+    img = cv2.imread(path)
+    if img is None:
+        return None
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, (image_size, image_size))
+    return img.astype('float32') / 255.0
+
+def convert(model_path, variant, calibration_dir, calibration_samples):
+    """Convertește modelul și salvează varianta; returnează calea fișierului .tflite"""
+    import tensorflow as tf
+    from modelLoader import load_inference_model
+
+    model = load_inference_model(model_path, compile=False)
+    image_size = int(model.input_shape[1])
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        calibration = [path for path, _ in labeled_images(calibration_dir, calibration_samples)]
+        if not calibration:
+            raise ValueError(f"No calibration images in {calibration_dir}/real or {calibration_dir}/fake")
+
+        def representative_dataset():
+            for path in calibration:
+                img = load_image(path, image_size)
+                if img is not None:
+                    yield [np.expand_dims(img, axis=0)]
+
+        # Intrarea și ieșirea rămân float32, deci interfața cu DeepfakeDetector nu se schimbă
+        converter.representative_dataset = representative_dataset
+
+    tflite_model = converter.convert()
+    output_path = quantized_model_path(model_path, variant)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    write_manifest(output_path, model_path, {
+        "backend": variant,
+        "tfVersion": tf.__version__,
+        "calibrationDir": os.path.abspath(calibration_dir) if variant == "int8" else None,
+        "createdAt": time.strftime("%Y-%m-%d %H:%M:%S")
+    })
+    return output_path
+
+def _max_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def evaluate_variant(variant, model_path, eval_dir, eval_samples, warmup=3):
+    """Evaluează o variantă în procesul curent (apelat în worker, câte un proces per variantă)"""
+    from sklearn.metrics import roc_auc_score
+
+    start = time.perf_counter()
+    if variant == "float32":
+        from modelLoader import load_inference_model
+        model = load_inference_model(model_path, compile=False)
+        artifact = model_path
+    else:
+        artifact = quantized_model_path(model_path, variant)
+        model = TFLiteModel(artifact)
+    load_time = time.perf_counter() - start
+
+    image_size = int(model.input_shape[1])
+    labels, scores, latencies = [], [], []
+    for index, (path, label) in enumerate(labeled_images(eval_dir, eval_samples)):
+        img = load_image(path, image_size)
+        if img is None:
+            continue
+        batch = np.expand_dims(img, axis=0)
+        started = time.perf_counter()
+        score = float(np.asarray(model.predict(batch, verbose=0)).reshape(-1)[0])
+        if index >= warmup:
+            latencies.append((time.perf_counter() - started) * 1000)
+        labels.append(label)
+        scores.append(score)
+
+    if not labels:
+        return {"error": f"No evaluation images in {eval_dir}/real or {eval_dir}/fake"}
+
+    labels, scores = np.array(labels), np.array(scores)
+    return {
+        "variant": variant,
+        "samples": len(labels),
+        "auc": round(float(roc_auc_score(labels, scores)), 4) if len(set(labels.tolist())) == 2 else None,
+        "accuracy": round(float(np.mean((scores > 0.5).astype(int) == labels)), 4),
+        "latencyMs": {
+            "p50": round(float(np.percentile(latencies, 50)), 2) if latencies else None,
+            "p99": round(float(np.percentile(latencies, 99)), 2) if latencies else None
+        },
+        "loadTime": round(load_time, 3),
+        "rssMb": round(_max_rss_mb(), 1),
+        "fileMb": round(os.path.getsize(artifact) / (1024 * 1024), 2)
+    }
+
+def run_worker(variant, model_path, eval_dir, eval_samples):
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", variant, "--model", model_path,
+         "--evalDir", eval_dir, "--evalSamples", str(eval_samples)],
+        capture_output=True, text=True
+    )
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        stderr = completed.stderr.strip().splitlines()
+        return {"variant": variant, "error": stderr[-1] if stderr else "worker failed"}
+    return json.loads(lines[-1])
+
+def compare(report):
+    """Diferențele față de modelul float32"""
+    baseline = report.get("float32", {})
+    if "error" in baseline:
+        return {}
+    deltas = {}
+    for variant, metrics in report.items():
+        if variant == "float32" or "error" in metrics:
+            continue
+        deltas[variant] = {
+            "aucDelta": round(metrics["auc"] - baseline["auc"], 4) if metrics["auc"] is not None and baseline["auc"] is not None else None,
+            "accuracyDelta": round(metrics["accuracy"] - baseline["accuracy"], 4),
+            "p50Speedup": round(baseline["latencyMs"]["p50"] / metrics["latencyMs"]["p50"], 2) if metrics["latencyMs"]["p50"] else None,
+            "fileSizeRatio": round(metrics["fileMb"] / baseline["fileMb"], 3) if baseline["fileMb"] else None
+        }
+    return deltas
+
+def print_table(report):
+    print(f"{'variantă':<10}{'AUC':>8}{'acc':>8}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>10}{'fișier MB':>11}", file=sys.stderr)
+    for variant, metrics in report.items():
+        if "error" in metrics:
+            print(f"{variant:<10} eroare: {metrics['error']}", file=sys.stderr)
+            continue
+        print(
+            f"{variant:<10}{metrics['auc'] if metrics['auc'] is not None else '-':>8}{metrics['accuracy']:>8}"
+            f"{metrics['latencyMs']['p50'] or '-':>10}{metrics['latencyMs']['p99'] or '-':>10}"
+            f"{metrics['rssMb']:>10}{metrics['fileMb']:>11}",
+            file=sys.stderr
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description='Post-training INT8 / float16 quantization with an accuracy and latency report')
+    parser.add_argument('--model', required=True, help='Path to the .keras model')
+    parser.add_argument('--calibrationDir', help='Directory with real/ and fake/ images for INT8 calibration')
+    parser.add_argument('--evalDir', help='Directory with real/ and fake/ images for the report (default: calibrationDir)')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS), help='Variants to produce')
+    parser.add_argument('--calibrationSamples', type=int, default=200, help='Images used for INT8 calibration')
+    parser.add_argument('--evalSamples', type=int, default=500, help='Images used for the report')
+    parser.add_argument('--skipConvert', action='store_true', help='Only rebuild the report from existing variants')
+    parser.add_argument('--worker', choices=('float32',) + VARIANTS, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(evaluate_variant(args.worker, args.model, args.evalDir, args.evalSamples)))
+        return
+
+    if not os.path.exists(args.model):
+        print(json.dumps({"error": f"Model not found: {args.model}"}))
+        sys.exit(1)
+
+    eval_dir = args.evalDir or args.calibrationDir
+    if not eval_dir or ("int8" in args.variants and not args.calibrationDir and not args.skipConvert):
+        print(json.dumps({"error": "--calibrationDir is required (and is the default --evalDir)"}))
+        sys.exit(1)
+    if not args.evalDir:
+        print("Atenție: raportul folosește imaginile de calibrare; pentru o estimare corectă dați --evalDir", file=sys.stderr)
+
+    conversions = {}
+    if not args.skipConvert:
+        for variant in args.variants:
+            print(f"Conversie {variant}...", file=sys.stderr)
+            started = time.time()
+            try:
+                conversions[variant] = {
+                    "path": convert(args.model, variant, args.calibrationDir, args.calibrationSamples),
+                    "convertTime": round(time.time() - started, 1)
+                }
+            except Exception as e:
+                conversions[variant] = {"error": f"Conversion failed: {str(e)}"}
+
+    report = {}
+    for variant in ("float32",) + tuple(args.variants):
+        if "error" in conversions.get(variant, {}):
+            report[variant] = {"variant": variant, "error": conversions[variant]["error"]}
+            continue
+        print(f"Evaluare {variant}...", file=sys.stderr)
+        report[variant] = run_worker(variant, args.model, eval_dir, args.evalSamples)
+
+    print_table(report)
+    output = {
+        "model": os.path.abspath(args.model),
+        "evalDir": os.path.abspath(eval_dir),
+        "conversions": conversions,
+        "variants": report,
+        "comparison": compare(report),
+        "createdAt": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    report_path = os.path.join(
+        os.path.dirname(quantized_model_path(args.model, "int8")),
+        os.path.splitext(os.path.basename(args.model))[0] + ".quantization_report.json"
+    )
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    output["reportPath"] = report_path
+
+    print(json.dumps(output, indent=2))
+
+if __name__ == "__main__":
+    main()
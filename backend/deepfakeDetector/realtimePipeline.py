@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline realtime cu latență limitată
+Thread-ul de captură citește continuu sursa și păstrează doar cel mai nou cadru; thread-ul de
+inferență ia întotdeauna ultimul cadru disponibil, iar cadrele care nu au apucat să fie evaluate
+sunt aruncate. Astfel analiza nu rămâne în urma sursei când inferența este mai lentă decât
+camera, iar latența este limitată la durata unei singure inferențe.
+
+Sursa poate fi o cameră (index) sau un fișier video, redat în ritmul FPS-ului său pentru a
+simula o cameră. Rezultatul raportează latența end-to-end (captură -> rezultat) și FPS-ul efectiv.
+"""
+
+import os
+import sys
+import time
+import threading
+import numpy as np
+import cv2
+
+def parse_source(source):
+    """Indexul camerei ("0", 1) sau calea / URL-ul unui video"""
+    if isinstance(source, int):
+        return source
+    return int(source) if str(source).isdigit() else source
+
+class LatestFrameCapture:
+    def __init__(self, source, pace=None):
+        """
+        Args:
+            source: indexul camerei sau calea unui fișier video
+            pace: redă fișierele în ritmul FPS-ului lor (implicit da pentru fișiere, nu pentru camere)
+        """
+        self.source = parse_source(source)
+        self.cap = cv2.VideoCapture(self.source)
+        self.is_file = not isinstance(self.source, int)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.fps = fps if fps and fps > 0 else None
+        self.pace = self.is_file if pace is None else pace
+
+        self._condition = threading.Condition()
+        self._frame = None  # (număr cadru, cadru BGR, momentul capturii)
+        self._taken = True
+        self._stopped = threading.Event()
+        self._finished = False
+        self._thread = None
+        self.captured = 0
+        self.dropped = 0
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="realtime-capture", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = 1.0 / self.fps if self.pace and self.fps else 0.0
+        next_time = time.perf_counter()
+        try:
+            while not self._stopped.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                captured_at = time.perf_counter()
+
+                with self._condition:
+                    self.captured += 1
+                    # Cadrul anterior nu a fost luat de inferență: este înlocuit
+                    if not self._taken:
+                        self.dropped += 1
+                    self._frame = (self.captured, frame, captured_at)
+                    self._taken = False
+                    self._condition.notify()
+
+                if interval:
+                    next_time += interval
+                    delay = next_time - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_time = time.perf_counter()
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def latest(self, timeout=1.0):
+        """Cel mai nou cadru neevaluat; None la sfârșitul sursei"""
+        with self._condition:
+            while self._taken and not self._finished:
+                if not self._condition.wait(timeout) and self._stopped.is_set():
+                    return None
+            if self._taken:
+                return None
+            self._taken = True
+            return self._frame
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.cap.release()
+
+def _percentiles(values_ms):
+    if not values_ms:
+        return None
+    values = np.array(values_ms)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "max": round(float(values.max()), 2)
+    }
+
+class RealtimePipeline:
+    def __init__(self, detector, gate_threshold=None, gate_force_every=30):
+        """
+        Args:
+            detector: instanța DeepfakeDetector deja încărcată
+            gate_threshold / gate_force_every: FrameGate pentru cadrele aproape identice (None = fără filtru)
+        """
+        self.detector = detector
+        self.gate = None
+        if gate_threshold:
+            from frameGate import FrameGate
+            self.gate = FrameGate(gate_threshold, gate_force_every)
+
+    def run(self, source=0, maxFrames=100, displayOutput=True, pace=None):
+        """
+        Evaluează cel mult maxFrames cadre (cele mai noi la momentul fiecărei inferențe).
+        Returnează același JSON ca predictRealtime, plus latența și cadrele aruncate.
+        """
+        capture = LatestFrameCapture(source, pace)
+        if not capture.is_opened():
+            return {"error": f"Could not open source {source}"}
+
+        results = []
+        latencies, inference_times = [], []
+        last_result = None
+        start = time.perf_counter()
+        capture.start()
+
+        try:
+            # Thread-ul curent este etapa de inferență
+            while len(results) < maxFrames:
+                item = capture.latest()
+                if item is None:
+                    break
+                frame_index, frame, captured_at = item
+
+                infer_start = time.perf_counter()
+                try:
+                    gated = self.gate is not None and self.gate.should_reuse(frame) and last_result is not None
+                    if gated:
+                        result = last_result
+                    else:
+                        batch = np.expand_dims(self.detector.preprocessArray(frame), axis=0)
+                        result = self.detector.scoreBatch(batch)[0]
+                        last_result = result
+                except Exception as frame_error:
+                    print(f"Error processing frame {frame_index}: {frame_error}", file=sys.stderr)
+                    continue
+                done = time.perf_counter()
+                inference_times.append((done - infer_start) * 1000)
+                latencies.append((done - captured_at) * 1000)
+
+                frame_result = {
+                    "frame": frame_index,
+                    "fakeScore": round(result["fakeScore"], 2),
+                    "confidenceScore": round(result["confidenceScore"], 2),
+                    "isDeepfake": result["isDeepfake"],
+                    "latencyMs": round(latencies[-1], 2)
+                }
+                if gated:
+                    frame_result["gated"] = True
+                results.append(frame_result)
+
+                if displayOutput:
+                    status = "FAKE" if result["isDeepfake"] else "REAL"
+                    color = (0, 0, 255) if result["isDeepfake"] else (0, 255, 0)
+                    cv2.putText(frame, f"{status}: {result['fakeScore']:.1f}%", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+                    cv2.putText(frame, f"Confidence: {result['confidenceScore']:.1f}%", (10, 70),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+                    cv2.imshow('Deepfake Detection', frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+        finally:
+            capture.stop()
+            if displayOutput:
+                cv2.destroyAllWindows()
+
+        elapsed = time.perf_counter() - start
+        if not results:
+            return {"error": "No frames could be processed"}
+
+        averageFakeScore = np.mean([r["fakeScore"] for r in results])
+        averageConfidence = np.mean([r["confidenceScore"] for r in results])
+        percentDeepfake = sum(1 for r in results if r["isDeepfake"]) / len(results) * 100
+
+        return {
+            "totalFrames": capture.captured,
+            "analysedFrames": len(results),
+            "droppedFrames": capture.dropped,
+            "averageFakeScore": round(averageFakeScore, 2),
+            "averageConfidence": round(averageConfidence, 2),
+            "percentDeepfake": round(percentDeepfake, 2),
+            "isDeepfake": percentDeepfake > 50,
+            "effectiveFps": round(len(results) / elapsed, 2) if elapsed > 0 else 0,
+            "sourceFps": capture.fps,
+            "latencyMs": _percentiles(latencies),
+            "inferenceMs": _percentiles(inference_times),
+            "processingTime": round(elapsed, 3),
+            "analysisTime": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "debugInfo": {
+                "model_loaded": self.detector.model_loaded,
+                "input_shape": self.detector.inputShape,
+                "source": os.path.basename(capture.source) if capture.is_file else capture.source,
+                "camera_id": None if capture.is_file else capture.source,
+                "paced": bool(capture.pace and capture.fps),
+                "frameGate": self.gate.stats() if self.gate is not None else None
+            },
+            "frameResults": results
+        }
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de rezultate pe baza conținutului fișierului
+Cheia combină hash-ul SHA-256 al fișierului încărcat, identitatea modelelor (căi, mtime,
+dimensiune, confidence_temperature) și parametrii analizei. Rezultatele JSON, împreună cu
+calea heatmap-ului, sunt păstrate într-o bază SQLite locală cu evicție LRU după număr de
+intrări și dimensiune totală.
+
+Nu importă TensorFlow, astfel încât un hit să poată fi servit înainte de încărcarea modelelor.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(current_dir, "cache")
+
+# Câmpurile în care rezultatele diverselor scripturi păstrează calea heatmap-ului
+HEATMAP_PATH_KEYS = ("heatmapPath", "output_path", "heatmap_path", "path")
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 al conținutului fișierului"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def model_fingerprint(model_paths, confidence_temperature=1.0):
+    """
+    Identitatea modelelor folosite. Se schimbă când un fișier de model este înlocuit,
+    deci intrările vechi nu mai sunt găsite. Returnează None dacă nu există niciun model pe disc.
+    """
+    entries = []
+    for path in model_paths or []:
+        if not path or not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        entries.append([os.path.abspath(path), stat.st_mtime_ns, stat.st_size])
+
+    if not entries:
+        return None
+
+    payload = json.dumps({"models": entries, "temperature": float(confidence_temperature)}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+class ResultCache:
+    def __init__(self, cache_dir=None, max_entries=2000, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: directorul bazei de date (implicit backend/deepfakeDetector/cache)
+            max_entries: numărul maxim de rezultate păstrate
+            max_bytes: dimensiunea maximă totală a rezultatelor JSON
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.db_path = os.path.join(self.cache_dir, "results.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                params TEXT NOT NULL,
+                model_fingerprint TEXT NOT NULL,
+                result TEXT NOT NULL,
+                heatmap_path TEXT,
+                heatmap_signature TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_access ON results(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_content ON results(content_hash, namespace, params)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(content_hash, namespace, fingerprint, params=None):
+        """Cheia unei intrări: conținut + scriptul care a produs rezultatul + modele + parametri"""
+        params_json = json.dumps(params or {}, sort_keys=True)
+        raw = f"{content_hash}|{namespace}|{fingerprint}|{params_json}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest(), params_json
+
+    def lookup(self, input_path, namespace, model_paths, confidence_temperature=1.0, params=None):
+        """
+        Caută rezultatul pentru fișier. Returnează (rezultat sau None, context pentru store).
+        Contextul este None când cache-ul nu se poate folosi (ex. niciun model pe disc).
+        """
+        fingerprint = model_fingerprint(model_paths, confidence_temperature)
+        if fingerprint is None:
+            return None, None
+
+        started = time.time()
+        content_hash = file_digest(input_path)
+        key, params_json = self.make_key(content_hash, namespace, fingerprint, params)
+        context = {
+            "key": key,
+            "content_hash": content_hash,
+            "namespace": namespace,
+            "params": params_json,
+            "model_fingerprint": fingerprint
+        }
+
+        result = self.get(key)
+        if result is not None:
+            result.setdefault("debugInfo", {})
+            if isinstance(result["debugInfo"], dict):
+                result["debugInfo"]["cache"] = {
+                    "hit": True,
+                    "key": key[:16],
+                    "lookupMs": round((time.time() - started) * 1000, 2)
+                }
+        return result, context
+
+    def get(self, key):
+        """Rezultatul salvat sau None; intrările cu heatmap-ul lipsă sau modificat sunt șterse"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, heatmap_path, heatmap_signature FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            result_json, heatmap_path, heatmap_signature = row
+            if heatmap_path:
+                try:
+                    valid = _file_signature(heatmap_path) == heatmap_signature
+                except OSError:
+                    valid = False
+                if not valid:
+                    # Heatmap-ul a fost șters sau suprascris de altă analiză
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+
+            self._conn.execute(
+                "UPDATE results SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(result_json)
+
+    def store(self, context, result):
+        """Salvează rezultatul; erorile și rezultatele mock nu sunt păstrate"""
+        if context is None or not isinstance(result, dict) or not self.is_cacheable(result):
+            return False
+
+        heatmap_path, heatmap_signature = None, None
+        for field in HEATMAP_PATH_KEYS:
+            candidate = result.get(field)
+            if isinstance(candidate, str) and os.path.isfile(candidate):
+                heatmap_path = os.path.abspath(candidate)
+                heatmap_signature = _file_signature(candidate)
+                break
+
+        result_json = json.dumps(result, separators=(',', ':'))
+        now = time.time()
+        with self._lock:
+            # Rezultatele aceluiași fișier produse cu modele vechi nu mai pot fi folosite
+            self._conn.execute(
+                "DELETE FROM results WHERE content_hash = ? AND namespace = ? AND params = ? AND model_fingerprint != ?",
+                (context["content_hash"], context["namespace"], context["params"], context["model_fingerprint"])
+            )
+            self._conn.execute(
+                """INSERT OR REPLACE INTO results
+                   (key, content_hash, namespace, params, model_fingerprint, result, heatmap_path,
+                    heatmap_signature, size, created_at, last_access, hits)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)""",
+                (context["key"], context["content_hash"], context["namespace"], context["params"],
+                 context["model_fingerprint"], result_json, heatmap_path, heatmap_signature,
+                 len(result_json), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+        return True
+
+    @staticmethod
+    def is_cacheable(result):
+        if "error" in result or result.get("status") == "error" or result.get("success") is False:
+            return False
+        debug_info = result.get("debugInfo")
+        return not (isinstance(debug_info, dict) and debug_info.get("mock_data"))
+
+    def _evict(self):
+        """Șterge intrările folosite cel mai de demult până la limitele de număr și dimensiune"""
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM results ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            count, total, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM results"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": hits,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "path": self.db_path
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def copy_cached_heatmap(result, output_path, field):
+    """Copiază heatmap-ul din cache la calea cerută de apelant, dacă aceasta diferă"""
+    cached_path = result.get(field)
+    if not output_path or not cached_path or os.path.abspath(cached_path) == os.path.abspath(output_path):
+        return result
+    try:
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        shutil.copyfile(cached_path, output_path)
+        result[field] = output_path
+    except OSError as e:
+        print(f"Nu am putut copia heatmap-ul din cache: {e}", file=sys.stderr)
+    return result
+
+def open_cache(cache_dir=None, enabled=True):
+    """Deschide cache-ul; erorile (ex. director read-only) dezactivează doar cache-ul, nu analiza"""
+    if not enabled:
+        return None
+    try:
+        return ResultCache(cache_dir)
+    except Exception as e:
+        print(f"Cache de rezultate indisponibil: {e}", file=sys.stderr)
+        return None
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend de inferență TFLite pentru modelele cuantizate (int8 / float16)
+Variantele sunt generate de quantizeModel.py în subdirectorul quantized/ de lângă modelul .keras
+și sunt selectate cu --backend în deepfakeDetector.py și inferenceServer.py.
+
+TFLiteModel expune doar ce folosește DeepfakeDetector pentru predicție (input_shape, predict).
+Interpretorul nu oferă gradienți și nici dropout la inferență, deci MC dropout, încrederea pe
+gradient și Grad-CAM rămân disponibile doar cu backend-ul keras.
+"""
+
+import os
+import sys
+import json
+import threading
+import numpy as np
+
+from lazyImports import lazy_import
+from modelLoader import source_signature
+
+tf = lazy_import("tensorflow")
+
+BACKENDS = ("keras", "float16", "int8")
+QUANTIZED_SUBDIR = "quantized"
+
+def quantized_model_path(model_path, backend):
+    """Calea variantei cuantizate a unui model .keras"""
+    model_path = os.path.abspath(model_path)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(os.path.dirname(model_path), QUANTIZED_SUBDIR, f"{stem}.{backend}.tflite")
+
+def write_manifest(quantized_path, model_path, extra=None):
+    manifest = {"source": os.path.abspath(model_path), **source_signature(model_path), **(extra or {})}
+    with open(quantized_path + ".json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+def current_quantized_model(model_path, backend):
+    """Varianta cuantizată dacă există și a fost generată din versiunea curentă a modelului, altfel None"""
+    if backend == "keras":
+        return None
+    quantized_path = quantized_model_path(model_path, backend)
+    try:
+        with open(quantized_path + ".json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        signature = source_signature(model_path)
+    except (OSError, ValueError):
+        return None
+
+    if not os.path.isfile(quantized_path):
+        return None
+    if any(manifest.get(key) != value for key, value in signature.items()):
+        print(f"Varianta {backend} pentru {os.path.basename(model_path)} este mai veche decât modelul, o ignor", file=sys.stderr)
+        return None
+    return quantized_path
+
+def backend_model_paths(model_paths, backend):
+    """Fișierele efectiv încărcate cu backend-ul ales (varianta cuantizată sau, dacă lipsește, modelul .keras)"""
+    return [current_quantized_model(path, backend) or path for path in model_paths]
+
+class TFLiteModel:
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.name = os.path.basename(model_path)
+        self._interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads or os.cpu_count())
+        self._interpreter.allocate_tensors()
+        self._refresh_details()
+        self.input_shape = (None,) + tuple(int(d) for d in self._input["shape"][1:])
+        # Interpretorul nu poate fi folosit simultan din mai multe thread-uri
+        self._lock = threading.Lock()
+
+    def _refresh_details(self):
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+
+    def predict(self, batch, verbose=0):
+        """Predicțiile (N, 1) pentru un batch (N, H, W, C) în formatul modelului Keras"""
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if tuple(self._input["shape"]) != batch.shape:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._refresh_details()
+
+            # Modelele cu intrare întreagă primesc valorile cuantizate cu parametrii tensorului
+            if self._input["dtype"] != np.float32:
+                scale, zero_point = self._input["quantization"]
+                batch = np.round(batch / scale + zero_point).astype(self._input["dtype"])
+
+            self._interpreter.set_tensor(self._input["index"], batch)
+            self._interpreter.invoke()
+            output = self._interpreter.get_tensor(self._output["index"])
+
+            if self._output["dtype"] != np.float32:
+                scale, zero_point = self._output["quantization"]
+                output = (output.astype(np.float32) - zero_point) * scale
+        return output.astype(np.float32)
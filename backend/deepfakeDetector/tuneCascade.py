@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibrarea offline a cascadei (deepfakeDetector.py --cascade)
+Pe un director de validare cu structura real/ + fake/, fiecare imagine este evaluată o dată cu
+modelul ușor și o dată pe calea completă (ensemble + calculateAdvancedConfidence), măsurând
+decizia și latența fiecăreia. Apoi se caută banda [low, high] cu cea mai mică latență medie
+estimată la o acuratețe cel puțin egală cu a ensemble-ului (minus --tolerance).
+
+Rezultatul (banda, fracția escaladată, acuratețea și accelerarea) este scris în
+savedModel/cascade_config.json și afișat ca JSON.
+
+Utilizare:
+    python tuneCascade.py --validationDir date/validare [--lightModel robust_deepfake_model.h5] [--tolerance 0.0]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from cascade import CASCADE_CONFIG_PATH, CascadeStage, find_light_model
+from quantizeModel import labeled_images
+
+def decide(detector, prediction):
+    """Decizia isDeepfake a detectorului pentru un scor brut (post-procesare + prag)"""
+    return detector.getConsistentScoring(detector._apply_smart_postprocessing(prediction))["isDeepfake"]
+
+def collect(detector, light, samples, warmup=2):
+    """Scorul ușor, deciziile celor două căi și latențele lor pentru fiecare imagine"""
+    import tensorflow as tf
+
+    rows = []
+    for index, (path, label) in enumerate(samples):
+        img = detector.loadImageForModel(path)
+        if img is None:
+            continue
+        batch = np.expand_dims(img, axis=0)
+
+        started = time.perf_counter()
+        light_score = float(light.score(batch)[0])
+        light_ms = (time.perf_counter() - started) * 1000
+
+        # Calea completă, ca în predict: ensemble + încrederea avansată (MC dropout)
+        started = time.perf_counter()
+        prediction = detector._apply_smart_postprocessing(detector.predictBatch(batch)[0]["prediction"])
+        full_decision = detector.getConsistentScoring(prediction, tf.convert_to_tensor(batch))["isDeepfake"]
+        full_ms = (time.perf_counter() - started) * 1000
+
+        rows.append({
+            "label": label,
+            "lightScore": light_score,
+            "lightDecision": decide(detector, light_score),
+            "fullDecision": full_decision,
+            "lightMs": light_ms if index >= warmup else None,
+            "fullMs": full_ms if index >= warmup else None
+        })
+    return rows
+
+def search_band(rows, tolerance=0.0, step=0.025):
+    """Banda cu latența estimată minimă la acuratețea ensemble-ului; banda completă [0, 1] este mereu validă"""
+    labels = np.array([row["label"] for row in rows], dtype=bool)
+    light_scores = np.array([row["lightScore"] for row in rows])
+    light_decisions = np.array([row["lightDecision"] for row in rows], dtype=bool)
+    full_decisions = np.array([row["fullDecision"] for row in rows], dtype=bool)
+    light_ms = float(np.mean([row["lightMs"] for row in rows if row["lightMs"] is not None] or [0.0]))
+    full_ms = float(np.mean([row["fullMs"] for row in rows if row["fullMs"] is not None] or [0.0]))
+
+    full_accuracy = float(np.mean(full_decisions == labels))
+    best = None
+    for low in np.arange(0.0, 0.5 + 1e-9, step):
+        for high in np.arange(0.5, 1.0 + 1e-9, step):
+            escalate = (light_scores >= low) & (light_scores <= high)
+            decisions = np.where(escalate, full_decisions, light_decisions)
+            accuracy = float(np.mean(decisions == labels))
+            if accuracy < full_accuracy - tolerance:
+                continue
+
+            fraction = float(np.mean(escalate))
+            cascade_ms = light_ms + fraction * full_ms
+            # La latență egală, banda mai largă (mai conservatoare)
+            key = (cascade_ms, -(high - low))
+            if best is None or key < best[0]:
+                best = (key, {
+                    "low": round(float(low), 3),
+                    "high": round(float(high), 3),
+                    "cascadeAccuracy": round(accuracy, 4),
+                    "escalatedFraction": round(fraction, 4),
+                    "cascadeMs": round(cascade_ms, 2)
+                })
+
+    band = best[1]
+    cascade_ms = band.pop("cascadeMs")
+    return {
+        **band,
+        "fullAccuracy": round(full_accuracy, 4),
+        "lightAccuracy": round(float(np.mean(light_decisions == labels)), 4),
+        "latencyMs": {"light": round(light_ms, 2), "full": round(full_ms, 2), "cascade": cascade_ms},
+        "speedup": round(full_ms / max(cascade_ms, 1e-6), 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune the cascade uncertainty band on a validation folder (real/ + fake/)')
+    parser.add_argument('--validationDir', required=True, help='Directory with real/ and fake/ images')
+    parser.add_argument('--lightModel', default=None, help='Light model (default: robust_deepfake_model.h5 from advancedDeepfakeDetector.py)')
+    parser.add_argument('--modelPath', default=None, help='Full model (default: the ensemble)')
+    parser.add_argument('--samples', type=int, default=400, help='Validation images used (half real, half fake)')
+    parser.add_argument('--tolerance', type=float, default=0.0, help='Accuracy the cascade may lose relative to the ensemble')
+    parser.add_argument('--output', default=CASCADE_CONFIG_PATH, help='Where to write the cascade config')
+
+    args = parser.parse_args()
+
+    light_model_path = args.lightModel or find_light_model()
+    if not light_model_path or not os.path.exists(light_model_path):
+        print(json.dumps({"error": "Light model not found; train it with advancedDeepfakeDetector.py or pass --lightModel"}))
+        sys.exit(1)
+
+    samples = labeled_images(args.validationDir, args.samples)
+    if not samples:
+        print(json.dumps({"error": f"No images in {args.validationDir}/real or {args.validationDir}/fake"}))
+        sys.exit(1)
+
+    from deepfakeDetector import create_detector, resolve_model_path
+    detector = create_detector(resolve_model_path(args.modelPath))
+    light = CascadeStage(light_model_path)
+
+    print(f"Evaluez {len(samples)} imagini pe ambele căi...", file=sys.stderr)
+    rows = collect(detector, light, samples)
+    if not rows:
+        print(json.dumps({"error": "No readable validation images"}))
+        sys.exit(1)
+
+    config = {
+        "lightModel": os.path.abspath(light_model_path),
+        **search_band(rows, args.tolerance),
+        "tolerance": args.tolerance,
+        "validationDir": os.path.abspath(args.validationDir),
+        "samples": len(rows),
+        "tunedAt": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    print(json.dumps(config, indent=2))
+
+if __name__ == "__main__":
+    main()
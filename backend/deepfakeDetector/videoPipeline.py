@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline de analiză video: decodare și inferență în paralel
+Un thread decodor citește cadrele și le preprocesează într-o coadă limitată, iar thread-ul
+principal le grupează în batch-uri care trec o singură dată prin toate modelele din ensemble.
+Încrederea (MC dropout) este calculată tot per batch.
+Cadrele sunt alese după una dintre strategiile din videoSampling (stride, uniform, budget).
+În modul cu fețe, decodorul urmărește fețele cu FaceTracker, iar batch-ul conține decupajele
+tuturor fețelor din cadrele eșantionate; fiecare persoană primește o cronologie de scoruri.
+Cu frameGate, cadrele aproape identice cu ultimul cadru evaluat îi refolosesc rezultatul.
+Cu frameCallback (--stream), rezultatele per cadru sunt trimise imediat după fiecare batch și
+nu mai sunt păstrate: sumarul se calculează incremental, cu memorie constantă.
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import numpy as np
+import cv2
+
+from videoSampling import iter_frames
+
+_END = object()
+
+class FrameSummary:
+    """Agregatele sumarului video, actualizate incremental din rezultatele per cadru"""
+
+    def __init__(self, head_size=10):
+        self.head_size = head_size
+        self.count = 0
+        self.fake_sum = 0.0
+        self.confidence_sum = 0.0
+        self.deepfake_count = 0
+        self.last_frame = 0
+        # Primele cadre evaluate, pentru frameResults
+        self.head = []
+
+    def add(self, results):
+        for r in results:
+            self.count += 1
+            self.fake_sum += r["fakeScore"]
+            self.confidence_sum += r["confidenceScore"]
+            self.deepfake_count += 1 if r["isDeepfake"] else 0
+            self.last_frame = max(self.last_frame, r["frame"])
+            if len(self.head) < self.head_size:
+                self.head.append(r)
+
+    def summarize(self, frameCount, processingTime):
+        """Câmpurile de sumar ale rezultatului video (cel puțin un cadru adăugat)"""
+        percentDeepfake = self.deepfake_count / self.count * 100
+        return {
+            "totalFrames": frameCount,
+            "analysedFrames": self.count,
+            "averageFakeScore": round(self.fake_sum / self.count, 2),
+            "averageConfidence": round(self.confidence_sum / self.count, 2),
+            "percentDeepfake": round(percentDeepfake, 2),
+            "isDeepfake": percentDeepfake > 50,
+            "processingTime": round(processingTime, 3),
+            "framesPerSecond": round(frameCount / processingTime, 2) if processingTime > 0 else 0
+        }
+
+def summarize_frames(results, frameCount, processingTime):
+    """Câmpurile de sumar ale rezultatului video, din rezultatele per cadru (nevide)"""
+    summary = FrameSummary()
+    summary.add(results)
+    return summary.summarize(frameCount, processingTime)
+
+class VideoPipeline:
+    def __init__(self, detector, batch_size=16, queue_size=64, faces=False, detect_every=10,
+                 gate_threshold=None, gate_force_every=30):
+        """
+        Args:
+            detector: instanța DeepfakeDetector deja încărcată
+            batch_size: câte cadre eșantionate intră într-un batch de inferență
+            queue_size: numărul maxim de cadre decodate care așteaptă inferența
+            faces: evaluează fețele urmărite în locul cadrelor întregi
+            detect_every: YuNet rulează la fiecare al K-lea cadru eșantionat (modul cu fețe)
+            gate_threshold: pragul FrameGate pentru refolosirea rezultatului (None = fără filtru)
+            gate_force_every: cadre refolosite consecutiv după care urmează o evaluare forțată
+        """
+        self.detector = detector
+        self.batch_size = max(1, int(batch_size))
+        self.queue_size = max(self.batch_size, int(queue_size))
+        self.faces = faces
+        self.detect_every = max(1, int(detect_every))
+        self._timelines = {}
+        self.gate_threshold = gate_threshold
+        self.gate_force_every = gate_force_every
+        self._gate = None
+
+    def run(self, videoPath, skipFrames=5, outputPath=None, sampling="stride", numFrames=None, timeBudget=None,
+            progressCallback=None, earlyStop=False, earlyStopError=0.01, frameCallback=None):
+        """
+        Analizează video-ul și returnează același JSON ca DeepfakeDetector.predictVideo.
+        sampling: "stride", "uniform" (numFrames cadre) sau "budget" (ordine progresivă)
+        timeBudget: secunde de procesare după care analiza se oprește cu cadrele deja evaluate
+        progressCallback: apelat după fiecare batch cu (procent estimat, rezultatele noilor cadre)
+        earlyStop: oprește decodarea când testul secvențial (earlyStopping) a stabilit verdictul,
+            cu rata de eroare earlyStopError pentru fiecare sens
+        frameCallback: primește fiecare rezultat per cadru imediat după batch-ul său; rezultatele
+            nu mai sunt păstrate, iar frameResults conține primele cadre în ordinea evaluării
+        """
+        startTime = time.time()
+        skipFrames = max(1, int(skipFrames))
+
+        cap = cv2.VideoCapture(videoPath)
+        if not cap.isOpened():
+            return {"error": f"Could not open video file: {videoPath}"}
+
+        totalFrames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+
+        out = None
+        if outputPath:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fourcc = cv2.VideoWriter_fourcc(*'XVID')
+            out = cv2.VideoWriter(outputPath, fourcc, fps, (width, height))
+
+        frames = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        try:
+            frame_source, samplingUsed = iter_frames(cap, sampling, skipFrames, out is not None, stop, numFrames)
+        except ValueError:
+            cap.release()
+            if out is not None:
+                out.release()
+            raise
+
+        # Numărul estimat de cadre evaluate, pentru procentul de progres
+        if samplingUsed == "uniform":
+            expectedFrames = min(numFrames or 32, totalFrames)
+        else:
+            expectedFrames = totalFrames // skipFrames if totalFrames > 0 else 0
+
+        tracker = None
+        self._timelines = {}
+        self._gate = None
+        self._gate_reference, self._gate_last = None, None
+        if self.gate_threshold:
+            from frameGate import FrameGate
+            self._gate = FrameGate(self.gate_threshold, self.gate_force_every)
+        if self.faces:
+            from faceTracker import FaceTracker
+            # Cadrele la distanță mare (seek) nu pot fi legate prin flux optic: YuNet rulează din nou
+            tracker = FaceTracker(self.detect_every, max_frame_gap=4 * skipFrames)
+
+        decoder_state = {"frameCount": 0, "decodedFrames": 0, "error": None}
+        decoder = threading.Thread(
+            target=self._decode,
+            args=(frame_source, out is not None, frames, stop, decoder_state, tracker),
+            name="video-decoder",
+            daemon=True
+        )
+        decoder.start()
+
+        results = []
+        # Sumarul incremental; cu frameCallback, rezultatele trimise nu rămân în results
+        summary = FrameSummary() if frameCallback is not None else None
+        stats = {"batches": 0, "inferenceTime": 0.0, "decodeWait": 0.0, "reusedFrames": 0, "gatedFrames": 0}
+        # Cadrele de la ultimul batch, în ordine, pentru scrierea video-ului de ieșire
+        pending = []
+        sampled = 0
+        budgetExhausted = False
+        stoppingReason = "end_of_video"
+
+        verdict = None
+        if earlyStop:
+            from earlyStopping import SequentialVerdict
+            verdict = SequentialVerdict(alpha=earlyStopError, beta=earlyStopError)
+
+        try:
+            while True:
+                wait_start = time.time()
+                item = frames.get()
+                stats["decodeWait"] += time.time() - wait_start
+                if item is _END:
+                    break
+
+                pending.append(item)
+                if item[2] is not None:
+                    sampled += 1
+                if sampled >= self.batch_size:
+                    tested = len(results)
+                    self._flush(pending, out, results, stats)
+                    self._report(progressCallback, results, stats, expectedFrames)
+                    sampled = 0
+                    fresh = results[tested:]
+                    if summary is not None:
+                        self._stream(frameCallback, results, summary, stats)
+
+                    # Cadrele refolosite de FrameGate nu aduc informație nouă testului
+                    if verdict is not None and verdict.update(r["isDeepfake"] for r in fresh if not r.get("gated")):
+                        # Verdictul nu se mai poate schimba cu probabilitate semnificativă
+                        stoppingReason = f"sprt_{verdict.decision}"
+                        break
+
+                    if timeBudget and time.time() - startTime >= timeBudget:
+                        # Bugetul s-a epuizat: rezultatul folosește cadrele deja evaluate
+                        budgetExhausted = True
+                        stoppingReason = "time_budget"
+                        break
+
+            if pending and stoppingReason == "end_of_video":
+                self._flush(pending, out, results, stats)
+                self._report(progressCallback, results, stats, expectedFrames)
+                if summary is not None:
+                    self._stream(frameCallback, results, summary, stats)
+        finally:
+            stop.set()
+            decoder.join(timeout=5)
+            cap.release()
+            if out is not None:
+                out.release()
+
+        if decoder_state["error"]:
+            print(f"Eroare la decodarea video-ului: {decoder_state['error']}", file=sys.stderr)
+
+        if summary is None:
+            # În modurile cu seek, cadrele nu sunt evaluate în ordine
+            results.sort(key=lambda r: r["frame"])
+            summary = FrameSummary()
+            summary.add(results)
+        if not summary.count:
+            return {"error": "No frames could be processed"}
+
+        # Cu seek, video-ul este acoperit integral fără a-i decoda toate cadrele
+        frameCount = decoder_state["frameCount"] if samplingUsed == "stride" else totalFrames
+        processingTime = time.time() - startTime
+
+        result = {
+            **summary.summarize(frameCount, processingTime),
+            "analysisTime": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "fileName": os.path.basename(videoPath),
+            "debugInfo": {
+                "model_loaded": self.detector.model_loaded,
+                "input_shape": self.detector.inputShape,
+                "total_video_frames": totalFrames,
+                "video_fps": fps,
+                "sampling": {
+                    "mode": samplingUsed,
+                    "requestedMode": sampling,
+                    "decodedFrames": decoder_state["decodedFrames"],
+                    "numFrames": numFrames if samplingUsed == "uniform" else None,
+                    "timeBudget": timeBudget,
+                    "budgetExhausted": budgetExhausted
+                },
+                "ensemble_used": len(self.detector.ensemble_models) > 1,
+                "pipeline": {
+                    "batchSize": self.batch_size,
+                    "batches": stats["batches"],
+                    "inferenceTime": round(stats["inferenceTime"], 3),
+                    "decodeWaitTime": round(stats["decodeWait"], 3),
+                    "reusedFrames": stats["reusedFrames"],
+                    "gatedFrames": stats["gatedFrames"]
+                },
+                "frameGate": self._gate.stats() if self._gate is not None else None
+            },
+            "frameResults": summary.head  # Limit frame results to first 10 for JSON size
+        }
+        if frameCallback is not None:
+            result["debugInfo"]["streamed"] = True
+        if verdict is not None:
+            lastFrame = summary.last_frame
+            result["earlyStopping"] = {
+                "stopped": stoppingReason.startswith("sprt_"),
+                "stoppingReason": stoppingReason,
+                "analysedFrames": summary.count,
+                "totalVideoFrames": totalFrames,
+                # Partea din video parcursă în ordine (stride); cu seek, cadrele sunt răspândite în tot video-ul
+                "videoCoverage": round(min(1.0, lastFrame / totalFrames), 3) if totalFrames > 0 and samplingUsed == "stride" else None,
+                **verdict.state()
+            }
+        if tracker is not None:
+            result["faceTracks"] = self._summarize_tracks()
+            result["debugInfo"]["faceTracking"] = {"detectEvery": self.detect_every, **tracker.stats}
+        return result
+
+    def _summarize_tracks(self):
+        """Scorul și cronologia fiecărei persoane urmărite"""
+        tracks = []
+        for track_id, timeline in sorted(self._timelines.items()):
+            timeline.sort(key=lambda point: point["frame"])
+            percentDeepfake = sum(1 for point in timeline if point["isDeepfake"]) / len(timeline) * 100
+            tracks.append({
+                "trackId": track_id,
+                "firstFrame": timeline[0]["frame"],
+                "lastFrame": timeline[-1]["frame"],
+                "framesScored": len(timeline),
+                "averageFakeScore": round(float(np.mean([point["fakeScore"] for point in timeline])), 2),
+                "maxFakeScore": max(point["fakeScore"] for point in timeline),
+                "percentDeepfake": round(percentDeepfake, 2),
+                "isDeepfake": percentDeepfake > 50,
+                "timeline": timeline
+            })
+        return tracks
+
+    def _decode(self, frame_source, keep_all, frames, stop, state, tracker=None):
+        """
+        Thread-ul decodor: pune în coadă (număr cadru, cadru BGR sau None, cadru preprocesat sau None,
+        fețe sau None). Cu tracker, fețele sunt (id track, casetă, decupaj preprocesat).
+        Cadrele neeșantionate ajung în coadă doar când trebuie scrise în video-ul de ieșire.
+        """
+        try:
+            for frameIndex, frame, sampled in frame_source:
+                state["frameCount"] = max(state["frameCount"], frameIndex)
+                if frame is None:
+                    continue
+
+                state["decodedFrames"] += 1
+                if not sampled:
+                    self._put(frames, (frameIndex, frame, None, None), stop)
+                    continue
+
+                preprocessed = self.detector.preprocessArray(frame)
+                faces = None
+                if tracker is not None:
+                    tracks = tracker.update(frameIndex, frame)
+                    faces = [
+                        (track.id, crop_box, self.detector.preprocessArray(region))
+                        for track, crop_box, region in tracker.crops(frame, tracks)
+                    ]
+                self._put(frames, (frameIndex, frame if keep_all else None, preprocessed, faces), stop)
+        except Exception as e:
+            state["error"] = str(e)
+        finally:
+            self._put(frames, _END, stop)
+
+    @staticmethod
+    def _report(progressCallback, results, stats, expectedFrames):
+        """Trimite progresul și rezultatele cadrelor evaluate de la ultimul raport"""
+        if progressCallback is None:
+            return
+        reported = stats.get("reported", 0)
+        stats["reported"] = len(results)
+        done = stats.get("streamed", 0) + len(results)
+        percent = min(99.0, done / expectedFrames * 100) if expectedFrames else 0.0
+        try:
+            progressCallback(percent, results[reported:])
+        except Exception as e:
+            print(f"Raportarea progresului a eșuat: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _stream(frameCallback, results, summary, stats):
+        """Trimite rezultatele noi prin frameCallback, le adaugă la sumar și le eliberează"""
+        for frame_result in results:
+            try:
+                frameCallback(frame_result)
+            except Exception as e:
+                print(f"Trimiterea rezultatului pentru cadrul {frame_result['frame']} a eșuat: {e}", file=sys.stderr)
+        summary.add(results)
+        stats["streamed"] = stats.get("streamed", 0) + len(results)
+        results.clear()
+        # _report numără cadrele raportate în lista curentă
+        stats["reported"] = 0
+
+    @staticmethod
+    def _put(frames, item, stop):
+        """Pune în coadă fără să rămână blocat după ce consumatorul s-a oprit"""
+        while True:
+            try:
+                frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    return
+
+    def _flush(self, pending, out, results, stats):
+        """Rulează inferența pe cadrele eșantionate din pending și scrie toate cadrele în ordine"""
+        sampled = [item for item in pending if item[2] is not None]
+        scores = {}
+
+        # Cadrele aproape identice cu ultimul cadru evaluat îi refolosesc rezultatul
+        gated = {}
+        if self._gate is not None and sampled:
+            remaining = []
+            for item in sampled:
+                if self._gate.should_reuse(item[2]):
+                    gated[item[0]] = self._gate_reference
+                else:
+                    self._gate_reference = item[0]
+                    remaining.append(item)
+            sampled = remaining
+
+        # Cadrele aproape identice cu unele deja analizate refolosesc scorul din index
+        index = self.detector.perceptual_index if not self.faces else None
+        hashes = {}
+        if index is not None and sampled:
+            remaining = []
+            for item in sampled:
+                hashes[item[0]] = index.hash(item[2])
+                reused, _ = index.lookup(item[2], kind="frame", hash_value=hashes[item[0]], commit=False)
+                if reused is not None:
+                    scores[item[0]] = reused
+                    stats["reusedFrames"] += 1
+                else:
+                    remaining.append(item)
+            sampled = remaining
+
+        if sampled:
+            infer_start = time.time()
+            try:
+                if self.faces:
+                    self._score_faces(sampled, scores)
+                else:
+                    batch = np.stack([item[2] for item in sampled], axis=0)
+                    for (frameIndex, _, preprocessed, _), score in zip(sampled, self.detector.scoreBatch(batch)):
+                        scores[frameIndex] = score
+                        if index is not None:
+                            index.add(preprocessed, score, kind="frame", hash_value=hashes.get(frameIndex), commit=False)
+            except Exception as batch_error:
+                first, last = sampled[0][0], sampled[-1][0]
+                print(f"Error processing frames {first}-{last}: {batch_error}", file=sys.stderr)
+            stats["inferenceTime"] += time.time() - infer_start
+            stats["batches"] += 1
+
+        if hashes:
+            # Un singur commit (și o singură evicție) pentru tot batch-ul
+            try:
+                index.commit()
+            except Exception as index_error:
+                print(f"Indexul perceptual nu a putut fi salvat: {index_error}", file=sys.stderr)
+
+        for frameIndex, reference in gated.items():
+            # Referința este în acest batch sau este ultimul cadru evaluat dintr-un batch anterior
+            source = scores.get(reference, self._gate_last)
+            if source is not None:
+                scores[frameIndex] = {**source, "gated": True}
+                stats["gatedFrames"] += 1
+        if self._gate is not None and self._gate_reference in scores:
+            self._gate_last = scores[self._gate_reference]
+
+        for frameIndex, frame, _, _ in pending:
+            result = scores.get(frameIndex)
+            if result is not None:
+                fakeScore = result["fakeScore"]
+                isDeepfake = result["isDeepfake"]
+                frame_result = {
+                    "frame": frameIndex,
+                    "fakeScore": round(fakeScore, 2),
+                    "confidenceScore": round(result["confidenceScore"], 2),
+                    "isDeepfake": isDeepfake
+                }
+                if self.faces:
+                    frame_result["facesScored"] = result.get("facesScored", 0)
+                if result.get("gated"):
+                    frame_result["gated"] = True
+                results.append(frame_result)
+
+                if out is not None:
+                    status = "FAKE" if isDeepfake else "REAL"
+                    color = (0, 0, 255) if isDeepfake else (0, 255, 0)
+                    cv2.putText(frame, f"{status}: {fakeScore:.1f}%", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+                    cv2.putText(frame, f"Confidence: {result['confidenceScore']:.1f}%", (10, 70),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+            if out is not None and frame is not None:
+                out.write(frame)
+
+        pending.clear()
+
+    def _score_faces(self, sampled, scores):
+        """
+        Un singur batch cu fețele tuturor cadrelor (cadrul întreg când nu are fețe).
+        Scorul cadrului este cel al feței celei mai suspecte, ca în predictFaces.
+        """
+        inputs, owners = [], []
+        for frameIndex, _, preprocessed, faces in sampled:
+            if faces:
+                for track_id, crop_box, crop in faces:
+                    inputs.append(crop)
+                    owners.append((frameIndex, track_id, crop_box))
+            else:
+                inputs.append(preprocessed)
+                owners.append((frameIndex, None, None))
+
+        for (frameIndex, track_id, crop_box), score in zip(owners, self.detector.scoreBatch(np.stack(inputs, axis=0))):
+            if track_id is None:
+                scores[frameIndex] = score
+                continue
+
+            self._timelines.setdefault(track_id, []).append({
+                "frame": frameIndex,
+                "fakeScore": round(score["fakeScore"], 2),
+                "confidenceScore": round(score["confidenceScore"], 2),
+                "isDeepfake": score["isDeepfake"],
+                "bbox": crop_box
+            })
+            current = scores.get(frameIndex)
+            faces_scored = current["facesScored"] + 1 if current else 1
+            if current is None or score["fakeScore"] > current["fakeScore"]:
+                current = dict(score)
+            current["facesScored"] = faces_scored
+            scores[frameIndex] = current
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Strategii de eșantionare a cadrelor pentru analiza video
+    stride   - fiecare al N-lea cadru; cadrele sărite sunt doar grab()-uite, fără decodare completă
+    uniform  - numFrames cadre distribuite uniform, accesate prin seek (CAP_PROP_POS_FRAMES),
+               ca în trainModel.extract_frames_from_video
+    budget   - cadrele de pe grila stride în ordine progresivă (întâi o acoperire grosieră a
+               întregului video, apoi tot mai fină), până la epuizarea bugetului de timp
+
+Cadrele sunt numerotate de la 1, la fel ca frameCount din predictVideo.
+"""
+
+import numpy as np
+import cv2
+
+SAMPLING_MODES = ("stride", "uniform", "budget")
+
+def uniform_indices(total_frames, num_frames):
+    """Pozițiile (de la 0) a num_frames cadre distribuite uniform în video"""
+    if total_frames <= 0 or num_frames <= 0:
+        return []
+    num_frames = min(int(num_frames), total_frames)
+    return sorted(set(np.linspace(0, total_frames - 1, num_frames, dtype=int).tolist()))
+
+def progressive_indices(total_frames, skip_frames):
+    """
+    Pozițiile de pe grila stride (aceleași cadre ca modul stride), ordonate progresiv:
+    orice prefix al listei acoperă uniform întregul video.
+    """
+    grid = list(range(skip_frames - 1, total_frames, skip_frames))
+    if not grid:
+        return []
+
+    order = []
+    seen = set()
+    step = 1
+    while step < len(grid):
+        step *= 2
+    while step >= 1:
+        for i in range(0, len(grid), step):
+            if i not in seen:
+                seen.add(i)
+                order.append(grid[i])
+        step //= 2
+    return order
+
+def stride_frames(cap, skip_frames, keep_all, stop):
+    """
+    Generează (număr cadru, cadru BGR sau None, eșantionat).
+    Cadrele sărite sunt doar grab()-uite, cu excepția cazului în care trebuie scrise în video-ul de ieșire.
+    """
+    frame_count = 0
+    while not stop.is_set():
+        if not cap.grab():
+            break
+
+        frame_count += 1
+        sampled = frame_count % skip_frames == 0
+        if not sampled and not keep_all:
+            yield frame_count, None, False
+            continue
+
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        yield frame_count, frame, sampled
+
+def seek_frames(cap, positions, stop):
+    """Generează (număr cadru, cadru BGR, True) pentru pozițiile date, prin seek direct"""
+    current = None
+    for position in positions:
+        if stop.is_set():
+            break
+        # Seek doar când cadrul nu urmează imediat după cel citit
+        if current is None or position != current + 1:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        ret, frame = cap.read()
+        current = position
+        if not ret:
+            continue
+        yield position + 1, frame, True
+
+def iter_frames(cap, mode, skip_frames, keep_all, stop, num_frames=None):
+    """
+    Alege strategia de eșantionare. Returnează (generator, modul efectiv folosit).
+    Video-ul de ieșire are nevoie de toate cadrele, deci forțează modul stride.
+    """
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode}")
+
+    # Fără număr de cadre cunoscut sau cu video de ieșire, seek-ul nu este posibil / util
+    if mode == "stride" or keep_all or total_frames <= 0:
+        return stride_frames(cap, skip_frames, keep_all, stop), "stride"
+
+    if mode == "uniform":
+        return seek_frames(cap, uniform_indices(total_frames, num_frames or 32), stop), "uniform"
+
+    return seek_frames(cap, progressive_indices(total_frames, skip_frames), stop), "budget"
@@ -6,24 +6,33 @@ Provides Node.js compatible interface for premium heatmap generation
 """
 
 import sys
-import json
 import os
-import traceback
-from pathlib import Path
 
 # Add current directory to path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
-try:
-    from heatmapGeneratorAvansat import HeatmapGeneratorAvansat
-except ImportError as e:
-    print(json.dumps({
-        'success': False,
-        'error': f'Import error: {str(e)}',
-        'type': 'import_error'
-    }))
-    sys.exit(1)
+from lazyImports import start_profiler, get_profiler
+start_profiler()
+
+import json
+import traceback
+from pathlib import Path
+
+from resultCache import open_cache, copy_cached_heatmap
+
+def load_generator_class():
+    """Import the generator (and TensorFlow) only when the result is not cached"""
+    try:
+        from heatmapGeneratorAvansat import HeatmapGeneratorAvansat
+    except ImportError as e:
+        print(json.dumps({
+            'success': False,
+            'error': f'Import error: {str(e)}',
+            'type': 'import_error'
+        }))
+        sys.exit(1)
+    return HeatmapGeneratorAvansat
 
 def extract_user_info(data):
     """Extract user information from input data"""
@@ -119,13 +128,14 @@ def format_response(results, user_info):
 def main():
     """Main wrapper function"""
     try:
-        # Read input from stdin or command line arguments
-        if len(sys.argv) > 1:
+        # Read input from stdin or command line arguments (--profileStartup is not positional)
+        args = [arg for arg in sys.argv[1:] if arg != '--profileStartup']
+        if args:
             # Command line mode
             input_data = {
-                'image_path': sys.argv[1],
-                'userTier': sys.argv[2] if len(sys.argv) > 2 else 'free',
-                'output_path': sys.argv[3] if len(sys.argv) > 3 else None
+                'image_path': args[0],
+                'userTier': args[1] if len(args) > 1 else 'free',
+                'output_path': args[2] if len(args) > 2 else None
             }
         else:
             # Stdin mode (for Node.js integration)
@@ -140,14 +150,34 @@ def main():
         # Extract user information
         user_info = extract_user_info(input_data)
         
-        # Initialize generator
-        generator = HeatmapGeneratorAvansat()
+        profiler = get_profiler()
+        with profiler.stage('generator_import'):
+            HeatmapGeneratorAvansat = load_generator_class()
         
-        # Generate heatmap (premium features automatically enabled based on user tier)
-        results = generator.generate_premium_heatmap(
-            input_data['image_path'],
-            input_data.get('output_path')
-        )
+        # Same image and model: answer from the result cache without loading the model
+        results, cache_context = None, None
+        cache = open_cache(input_data.get('cacheDir'), enabled=not input_data.get('noCache', False))
+        if cache is not None:
+            results, cache_context = cache.lookup(
+                input_data['image_path'], 'heatmapAvansat', [HeatmapGeneratorAvansat._find_best_model()]
+            )
+            if results is not None:
+                copy_cached_heatmap(results, input_data.get('output_path'), 'heatmap_path')
+        
+        if results is None:
+            # Initialize generator
+            with profiler.stage('model_load'):
+                generator = HeatmapGeneratorAvansat()
+            
+            # Generate heatmap (premium features automatically enabled based on user tier)
+            with profiler.stage('heatmap'):
+                results = generator.generate_premium_heatmap(
+                    input_data['image_path'],
+                    input_data.get('output_path')
+                )
+            
+            if cache is not None:
+                cache.store(cache_context, results)
         
         # Format response
         response = format_response(results, user_info)
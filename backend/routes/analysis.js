@@ -5,6 +5,7 @@ const path = require('path');
 const { exec } = require('child_process');
 const { promisify } = require('util');
 const execPromise = promisify(exec);
+const axios = require('axios');
 const db = require('../db');
 const { authenticateToken } = require('../middleware/authMiddleware');
 const TierService = require('../services/tierService');
@@ -226,6 +227,10 @@ function parseJsonFromOutput(output) {
         const jsonCandidate = line.substring(0, jsonEnd + 1);
         try {
           const parsed = JSON.parse(jsonCandidate);
+          // NDJSON output (--stream): per-frame lines come first, the summary line is the result
+          if (parsed && parsed.type === 'frame') {
+            continue;
+          }
           logger && logger.debug(`Successfully parsed JSON from line ${i}: ${jsonCandidate.substring(0, 100)}...`);
           return parsed;
         } catch (e) {
@@ -349,11 +354,35 @@ async function runTieredDetection(uploadPath, tierConfig, user) {
   }
 }
 
+// Serverul de inferență persistent (deepfakeDetector/inferenceServer.py), dacă este configurat
+async function runInferenceServer(endpoint, payload) {
+  const serverUrl = process.env.INFERENCE_SERVER_URL;
+  if (!serverUrl) {
+    return null;
+  }
+
+  try {
+    const response = await axios.post(`${serverUrl.replace(/\/$/, '')}${endpoint}`, payload, { timeout: 45000 });
+    return response.data;
+  } catch (err) {
+    logger && logger.warn(`Inference server request failed: ${err.message}`);
+    return null;
+  }
+}
+
 async function runBasicDetection(uploadPath) {
   try {
-    const basicDetectorScript = path.join(deepfakeDetectorDir, 'deepfakeDetector.py');
     const basicModelPath = path.join(savedModelDir, 'model_xception.keras');
 
+    // Același model ca în comanda CLI de mai jos, nu detectorul implicit al serverului
+    const served = await runInferenceServer('/predict', { inputPath: uploadPath, modelPath: basicModelPath });
+    if (served && served.fakeScore !== undefined) {
+      logger && logger.info(`Inference server result with fakeScore: ${served.fakeScore}`);
+      return { ...served, modelType: 'basic', fileName: path.basename(uploadPath) };
+    }
+
+    const basicDetectorScript = path.join(deepfakeDetectorDir, 'deepfakeDetector.py');
+
     if (!fs.existsSync(basicDetectorScript)) {
       logger && logger.error(`Python script not found: ${basicDetectorScript}`);
       return generateMockResult(uploadPath, 'Python script not found');
@@ -480,7 +509,11 @@ async function runAdvancedDetection(uploadPath, features, isAuthenticated) {
     
     const modelPath = fs.existsSync(advancedModelPath) ? advancedModelPath : basicModelPath;
     
-    let command = `python "${advancedDetectorScript}" "${uploadPath}" --imageSize 299`;
+    // fullAnalysis.py: predicție, fețe și heatmap dintr-o singură rulare, fără exec-uri separate
+    const fullAnalysisScript = path.join(deepfakeDetectorDir, 'fullAnalysis.py');
+    const useFullAnalysis = fs.existsSync(fullAnalysisScript);
+    
+    let command = `python "${useFullAnalysis ? fullAnalysisScript : advancedDetectorScript}" "${uploadPath}" --imageSize 299`;
     
     if (fs.existsSync(modelPath)) {
       command += ` --modelPath "${modelPath}"`;
@@ -490,6 +523,10 @@ async function runAdvancedDetection(uploadPath, features, isAuthenticated) {
       command += ` --generateHeatmap`;
     }
     
+    if (useFullAnalysis && !features.faceAnalysis) {
+      command += ` --noFaces`;
+    }
+    
     const commands = [
       command,
       command.replace('python', 'python3'),
@@ -546,7 +583,7 @@ async function runAdvancedDetection(uploadPath, features, isAuthenticated) {
             }
           }
           
-          if (features.faceAnalysis) {
+          if (features.faceAnalysis && (!result.faceAnalysis || result.faceAnalysis.error)) {
             result.faceAnalysis = await runFaceAnalysis(uploadPath);
           }
           
@@ -1373,8 +1410,23 @@ router.get('/download-report/:fileName', authenticateToken, async (req, res) =>
   }
 });
 
+// Job-urile asincrone rulează în serverul de inferență (coada persistentă din jobQueue.py)
 router.get('/job/:id', async (req, res) => {
-  res.status(404).json({ error: "Asynchronous analysis functionality is not currently available." });
+  const serverUrl = process.env.INFERENCE_SERVER_URL;
+  if (!serverUrl) {
+    return res.status(404).json({ error: "Asynchronous analysis functionality is not currently available." });
+  }
+
+  try {
+    const response = await axios.get(
+      `${serverUrl.replace(/\/$/, '')}/jobs/${encodeURIComponent(req.params.id)}`,
+      { timeout: 10000, validateStatus: () => true }
+    );
+    res.status(response.status).json(response.data);
+  } catch (err) {
+    logger && logger.warn(`Job status request failed: ${err.message}`);
+    res.status(503).json({ error: "Inference server unavailable" });
+  }
 });
 
 // Rută pentru browser extension
@@ -1,6 +1,5 @@
 import numpy as np
 import cv2
-import tensorflow as tf
 from tensorflow import keras
 import sys
 import json
@@ -9,6 +8,10 @@ from PIL import Image
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'deepfakeDetector'))
+from gradcamEngine import get_gradcam_engine
+from modelLoader import load_inference_model
+
 class GradCAMService:
     def __init__(self, model_path=None):
         """Inițializează serviciul Grad-CAM"""
@@ -45,7 +48,7 @@ class GradCAMService:
     def load_model(self, model_path):
         """Încarcă un model antrenat"""
         try:
-            self.model = keras.models.load_model(model_path)
+            self.model = load_inference_model(model_path)
             # Găsește ultimul layer convolutional
             for layer in reversed(self.model.layers):
                 if len(layer.output_shape) == 4:  # Conv layer
@@ -74,33 +77,14 @@ class GradCAMService:
             raise ValueError("Model sau layer conv nu sunt inițializate")
         
         try:
-            # Creează un model care mapează input-ul la activările conv layer-ului și la predicții
-            grad_model = keras.models.Model(
-                inputs=[self.model.inputs],
-                outputs=[self.model.get_layer(self.last_conv_layer_name).output, self.model.output]
-            )
-            
-            # Calculează gradientele
-            with tf.GradientTape() as tape:
-                last_conv_layer_output, preds = grad_model(img_array)
-                if pred_index is None:
-                    pred_index = tf.argmax(preds[0])
-                class_channel = preds[:, pred_index]
+            # Modelul de gradient și tf.function-ul sunt refolosite între apeluri
+            engine = get_gradcam_engine(self.model, self.last_conv_layer_name)
             
             # Gradientele feature map-ului ultimului conv layer cu privire la clasa predicată
-            grads = tape.gradient(class_channel, last_conv_layer_output)
-            
-            # Vector în care fiecare intrare este importanța medie a gradientului pe un anumit feature map
-            pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-            
-            # Înmulțește fiecare canal din feature map cu importanța lui
-            last_conv_layer_output = last_conv_layer_output[0]
-            heatmap = last_conv_layer_output @ pooled_grads[..., tf.newaxis]
-            heatmap = tf.squeeze(heatmap)
+            outputs = engine.run(img_array, pred_index)
             
-            # Normalizează heatmap-ul între 0 și 1
-            heatmap = tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
-            return heatmap.numpy()
+            # Heatmap-ul normalizat între 0 și 1
+            return outputs["heatmap"].numpy()[0]
             
         except Exception as e:
             print(f"Eroare la generarea Grad-CAM: {e}")